@@ -1,21 +1,40 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import os, subprocess, urllib.parse, shutil, re, json, io, sys, concurrent.futures
+import collections
 import hashlib
 import html
+import itertools
+import time
+import traceback
 from pathlib import Path
 from dataclasses import dataclass
 from urllib.parse import urlparse, quote
 from datetime import datetime, date, timezone
 from zoneinfo import ZoneInfo
-import yaml
-from feedgen.feed import FeedGenerator
+
+import site_feed
+from site_feed import (
+    FEED_CONTENT_MODES, FEED_FORMATS, FeedEntry, FeedEntryCache, atom_entry,
+    feed_head, feed_tail, rss_item, write_feed,
+)
+from site_manifest import BuildManifest, DepGraph, file_sha256
+from site_output import (
+    LINK_MODES, LINK_STATS, WRITE_STATS, WRITTEN, OutputTree, mark_written, place_file,
+    placement, source_date_epoch, write_if_changed,
+)
+from site_provcache import ParsedYamlCache, SafeLoader, safe_load
+from site_render import (
+    PRIORITY_HTML, PRIORITY_PRINT, RenderJob, RenderScheduler, default_concurrency,
+)
+from site_sitemap import SitemapWriter
+from site_watch import make_watcher
 
 # ---------- config ----------
 EXCLUDE_NAMES = {
     "site","venv",".venv","env",".env","node_modules",".git",
     "__pycache__", ".mypy_cache",".pytest_cache",".ruff_cache",".cache",
-    "Makefile","index.html","index.md.html","index.created.md.html","index.modified.md.html","_staging", "pnpmd.map", "requirements.txt",
+    "Makefile","index.html","index.md.html","index.created.md.html","index.modified.md.html","index.json","dir-index.js","_staging", "pnpmd.map", "requirements.txt",
     "gpt5push.sh",
     # Root pages that should be linked from nav but not listed in dir indexes
     "about.md",
@@ -46,6 +65,8 @@ DIR_INDEX_SORTS = [
 
 MD_EXTS = {".md", ".markdown", ".pandoc.md"}
 SKIP_COPY_EXTS = {".pdf"}
+# Written in place under OUT by book renders; never share an inode with the source.
+RENDERED_EXTS = {".pdf", ".epub"}
 
 # ---------- Journal naming based on CNAME ----------
 DEFAULT_JOURNAL = "Preferred Frame"
@@ -110,45 +131,92 @@ ROOT = Path(__file__).resolve().parents[2]
 OUT  = ROOT / "site"
 SRC  = ROOT / ".scripts" / "src"
 MD_TEMPLATE_DEPS = [SRC / "header.html", SRC / "footer.html", SRC / "coda.html"]
+# Manifest and caches stay outside OUT, so they are never published.
+BUILD_DIR = ROOT / ".build"
+MANIFEST_PATH = BUILD_DIR / "manifest.sqlite"
+YAML_CACHE_PATH = BUILD_DIR / "provenance.marshal"
+
+# Content-hash manifest of build steps (opened in main(); None => mtime checks).
+MANIFEST: BuildManifest | None = None
+# Dependency graph of the current build (None => rebuild everything).
+GRAPH: DepGraph | None = None
+# Every file placed under OUT (created in main(); kept across --watch passes).
+OUTPUT_TREE: OutputTree | None = None
+# Output -> mtime_ns of sitemap pages, as recorded at the last build and
+# refreshed for the pages written since (see _page_mtime).
+_OUTPUT_MTIMES: dict[Path, int | None] = {}
+# Parsed provenance keyed by content hash (opened in main(); None => always parse).
+YAML_CACHE: ParsedYamlCache | None = None
+# Processes rendering stale article groups (see --article-workers).
+ARTICLE_WORKERS = 1
+# Threads copying/wrapping mirror sources (see --io-workers).
+IO_WORKERS = 1
+# Threads hashing mirror sources ahead of the copy loop (see --hash-workers).
+HASH_WORKERS = 1
+# How copy_if_changed() materializes mirrored files (see --link-mode).
+LINK_MODE = "copy"
+# Write sitemap shards pre-gzipped (see --sitemap-gzip).
+SITEMAP_GZIP = False
+# Entries in rss.xml / atom.xml before archives (see --feed-items; 0 = all).
+FEED_ITEMS = 50
+# "full": entries carry the article HTML; "summary": abstract only.
+FEED_CONTENT = "full"
+# How version pages appear at their DOI aliases (see --doi-aliases).
+DOI_ALIAS_MODES = ("copy", "hardlink", "refresh", "redirects")
+DOI_ALIAS_MODE = "copy"
+REDIRECTS_FILE = OUT / "_redirects"
+# Render cache for render.py children (see --render-cache; None => their default).
+RENDER_CACHE: str | None = None
+# Seconds one render.py job may run before it is killed (see --render-timeout).
+RENDER_TIMEOUT: float | None = None
+# "page": every page carries the build stamp; "file": one shared build.txt.
+STAMP_MODE = "page"
+BUILD_STAMP_FILE = OUT / "build.txt"
+# Stamp appended to pages in this pass (set in build()).
+PAGE_STAMP = ""
 
 # ---------- .gitignore handling ----------
-def load_gitignored_paths() -> set[Path]:
+def load_gitignored_paths() -> set[str]:
+    """Absolute paths (as str) of every ignored file or directory git reports."""
     try:
         out = subprocess.check_output(
-            ["git", "ls-files", "-i", "--exclude-standard", "--others", "--directory"],
+            ["git", "ls-files", "-z", "-i", "--exclude-standard", "--others", "--directory"],
             cwd=ROOT,
             text=True,
             stderr=subprocess.DEVNULL,
         )
     except Exception:
         return set()
-    paths: set[Path] = set()
-    for line in out.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        p = (ROOT / line.rstrip("/")).resolve()
-        paths.add(p)
-    return paths
+    return {
+        os.fspath(ROOT / line.rstrip("/"))
+        for line in out.split("\0")
+        if line.strip()
+    }
 
 GITIGNORED_PATHS = load_gitignored_paths()
+_ROOT_STR = os.fspath(ROOT)
+
+def reload_gitignored_paths() -> None:
+    global GITIGNORED_PATHS
+    GITIGNORED_PATHS = load_gitignored_paths()
 
 def is_gitignored(path: Path) -> bool:
-    p = path.resolve()
-    for ign in GITIGNORED_PATHS:
-        try:
-            p.relative_to(ign)
+    """
+    Whether `path` or one of its ancestors is ignored: a set lookup per path
+    component, purely lexical (paths under ROOT, as built by the walkers).
+    """
+    if not GITIGNORED_PATHS:
+        return False
+    s = os.fspath(path)
+    while len(s) > len(_ROOT_STR):
+        if s in GITIGNORED_PATHS:
             return True
-        except ValueError:
-            continue
+        s = s[:s.rfind(os.sep)]
     return False
 
-def _file_sha256(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+def _file_digest(path: Path) -> str:
+    # manifest digests are cached by (inode, size, mtime_ns): hashed once per change
+    return MANIFEST.digest(path) if MANIFEST else file_sha256(path)
 
 def _files_identical(src: Path, dst: Path) -> bool:
     if not dst.exists():
@@ -163,15 +231,40 @@ def _files_identical(src: Path, dst: Path) -> bool:
     if int(s_stat.st_mtime) == int(d_stat.st_mtime):
         return True
     try:
-        return _file_sha256(src) == _file_sha256(dst)
+        return _file_digest(src) == _file_digest(dst)
     except Exception:
         return False
 
+def _link_mode_for(src: Path) -> str:
+    """
+    LINK_MODE for binary assets. Text files may be rewritten in place under
+    OUT (book concatenation, pandoc outputs), so a hardlink or symlink there
+    would write through to the source; those are copied (or reflinked, which
+    is copy-on-write and therefore safe).
+    """
+    if LINK_MODE in ("copy", "reflink"):
+        return LINK_MODE
+    suffix = src.suffix.lower()
+    if suffix in MIRROR_EXTS or suffix in RENDERED_EXTS:
+        return "copy"
+    return LINK_MODE
+
 def copy_if_changed(src: Path, dst: Path) -> bool:
-    if _files_identical(src, dst):
+    _track_output(dst)
+    mode = _link_mode_for(src)
+    params = {"link": mode} if mode != "copy" else None
+    key = MANIFEST.input_key("copy", [src], params) if MANIFEST else None
+    if key and MANIFEST.is_fresh(dst, key):
         return False
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(src, dst)
+    want = "copy" if mode == "reflink" else mode
+    if placement(src, dst) == want and (want != "copy" or _files_identical(src, dst)):
+        if key:
+            MANIFEST.record(dst, "copy", key)
+        return False
+    place_file(src, dst, mode)
+    if key:
+        MANIFEST.record(dst, "copy", key)
+    _note_output(dst)
     return True
 
 def _max_mtime(paths: list[Path]) -> float:
@@ -183,6 +276,113 @@ def _max_mtime(paths: list[Path]) -> float:
             continue
     return max(mtimes) if mtimes else 0.0
 
+# ---------- dependency graph ----------
+# provenance -> article:<top>/<stem> -> index:<dir> (+ ancestors) -> sitemap
+#                                    -> rss
+# provenance:<path> -> rss for every catalog record (see _link_feed_sources)
+# Every output written under OUT is an out:<path> node feeding the index of
+# its directory and the sitemap; only dirty nodes are regenerated. Outputs
+# the last build recorded but this pass did not produce are removed and
+# marked the same way (see _prune_orphaned_outputs).
+def _index_node(d: Path) -> str:
+    return "index:" + (rel_out(d).as_posix() if d != OUT else "")
+
+def _link_index_ancestors(d: Path) -> None:
+    while d != OUT and OUT in d.parents:
+        GRAPH.add_edge(_index_node(d), _index_node(d.parent))
+        d = d.parent
+
+def _track_output(path: Path) -> None:
+    """Record a file that exists under OUT after this pass (see OutputTree)."""
+    if OUTPUT_TREE is not None:
+        OUTPUT_TREE.add(path)
+
+def _note_output(path: Path) -> None:
+    """Mark an output under OUT as (re)written this build."""
+    mark_written(path)
+    if GRAPH is None or OUT not in path.parents:
+        return
+    node = f"out:{rel_out(path).as_posix()}"
+    GRAPH.add_edge(node, _index_node(path.parent))
+    GRAPH.add_edge(node, "sitemap")
+    _link_index_ancestors(path.parent)
+    GRAPH.mark(node)
+
+def _prune_orphaned_outputs() -> None:
+    """
+    Remove files the last build left under OUT that this pass did not place
+    there (their source was deleted or renamed) and dirty the indexes, the
+    sitemap and the feeds that listed them. Index pages of directories that
+    are still in the tree are left to build_out_indexes().
+    """
+    if GRAPH is None or OUTPUT_TREE is None:
+        return
+    index_names = {
+        _dir_index_page_name(1, "html"),
+        _dir_index_page_name(1, "json"),
+        *(_dir_index_alias_name(key) for key, _label, _dir in DIR_INDEX_SORTS),
+    }
+    live_dirs = set(OUTPUT_TREE.dirs())
+    removed = 0
+    for path in sorted(MANIFEST.outputs().keys() - set(OUTPUT_TREE.files())):
+        if OUT not in path.parents:
+            continue
+        if path.parent in live_dirs and (
+            path.name in index_names or _INDEX_PAGE_RE.match(path.name)
+        ):
+            continue
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[DEBUG] WARNING: could not remove {rel_out(path)}: {e}")
+            continue
+        _note_output(path)
+        removed += 1
+        print(f"[DEBUG] Removed {rel_out(path)} (source gone)")
+        d = path.parent
+        while d != OUT and d not in live_dirs:
+            try:
+                d.rmdir()
+            except OSError:
+                break
+            d = d.parent
+    if removed:
+        GRAPH.mark("rss")
+        print(f"[DEBUG] Removed {removed} output(s) of deleted or renamed sources")
+
+def _index_key() -> str:
+    """Signature of everything every directory index depends on but its listing."""
+    return MANIFEST.input_key(
+        "index",
+        MD_TEMPLATE_DEPS,
+        _generator_params(owner=OWNER, repo=REPO, branch=BRANCH, page_size=INDEX_PAGE_SIZE),
+    )
+
+def _dirty_index_dirs() -> set[Path] | None:
+    """Directories whose index must be rebuilt; None means all of them."""
+    if GRAPH is None:
+        return None
+    key = _index_key()
+    if MANIFEST.node_signature("index:*") != key:
+        MANIFEST.set_node_signature("index:*", key)
+        return None
+    dirs = set()
+    for node in GRAPH.dirty():
+        if node.startswith("index:"):
+            rel_dir = node[len("index:"):]
+            dirs.add(OUT / rel_dir if rel_dir else OUT)
+    return dirs
+
+def _singleton_dirty(node: str, output: Path, key: str | None) -> bool:
+    """True when a whole-site output (sitemap, rss) must be regenerated."""
+    if GRAPH is None or key is None:
+        return True
+    if not output.exists() or MANIFEST.node_signature(node) != key:
+        return True
+    return node in GRAPH.dirty()
+
 # ---------- base url ----------
 def compute_base_url() -> str:
     v = os.getenv("BASE_URL")
@@ -208,8 +408,8 @@ def write_cname_if_custom(base_url: str) -> None:
     if host in {"localhost", "127.0.0.1"}:
         return
 
-    OUT.mkdir(parents=True, exist_ok=True)
-    (OUT / "CNAME").write_text(host + "\n", encoding="utf-8")
+    write_if_changed(OUT / "CNAME", host + "\n")
+    _track_output(OUT / "CNAME")
 
 # ---------- helpers ----------
 def rel(p: Path) -> Path:
@@ -226,6 +426,18 @@ def load_text(p: Path) -> str:
         return text[:-1]
     return text
 
+# ---------- resident caches (stay warm across --watch rebuilds) ----------
+_TEMPLATE_CACHE: dict[Path, tuple[int, str]] = {}
+
+def load_template(p: Path) -> str:
+    mtime_ns = p.stat().st_mtime_ns
+    hit = _TEMPLATE_CACHE.get(p)
+    if hit and hit[0] == mtime_ns:
+        return hit[1]
+    text = load_text(p)
+    _TEMPLATE_CACHE[p] = (mtime_ns, text)
+    return text
+
 def _doi_suffix_number(doi_suffix: str) -> int:
     s = (doi_suffix or "").strip()
     if not s:
@@ -240,6 +452,7 @@ class Item:
     ctime: float
     mtime: float
     path: Path
+    size: int = 0
 
 def _asset_url(x) -> str:
     if not x:
@@ -262,25 +475,14 @@ def _is_pending_doi(doi_value: str) -> bool:
     return (doi_value or "").strip().lower().startswith("pending/")
 
 def _canonical_origin_from_provenance() -> str | None:
-    try:
-        prints_dir = ROOT / "prints"
-        if not prints_dir.exists():
-            return None
-        for prov in prints_dir.glob("*/*/*/provenance.yaml"):
-            try:
-                data = yaml.safe_load(prov.read_text(encoding="utf-8")) or {}
-                u = (data.get("permalink") or "").strip()
-                if not u:
-                    site_block = (data.get("site") or {})
-                    u = (site_block.get("permalink") or site_block.get("html_canonical") or "").strip()
-                if u.startswith("http"):
-                    p = urlparse(u)
-                    if p.scheme and p.netloc:
-                        return f"{p.scheme}://{p.netloc}"
-            except Exception:
-                continue
-    except Exception:
-        pass
+    for r in provenance_catalog():
+        if r.top != "prints" or len(rel(r.prov).parts) != 5:
+            continue
+        u = r.canonical_url
+        if u.startswith("http"):
+            p = urlparse(u)
+            if p.scheme and p.netloc:
+                return f"{p.scheme}://{p.netloc}"
     return None
 
 def iter_provenance_files():
@@ -298,26 +500,252 @@ def iter_provenance_files():
                 continue
             yield prov
 
+# ---------- provenance catalog ----------
+@dataclass(slots=True)
+class ProvenanceRecord:
+    """Normalized fields of one provenance.yaml, shared by every build phase."""
+    prov: Path
+    mtime_ns: int
+    top: str
+    stem: str
+    doi_prefix: str
+    doi_suffix: str
+    journal: str
+    title: str
+    authors: list[dict]
+    abstract: str        # summary first (article pages)
+    feed_abstract: str   # abstract only (RSS)
+    onesent: str
+    kws: list[str]
+    date: object
+    doi: str
+    concept: str
+    permalink: str
+    canonical_url: str
+    html_canonical: str
+    md_name: str | None
+    html_name: str | None
+    pmd_name: str | None
+    pdf_name: str | None
+    epub_name: str | None
+    embed_name: str | None
+    embed_url: str
+    assets_pdf: str
+    assets_epub: str
+    references_doi: list
+
+    @property
+    def mtime(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime_ns / 1e9)
+
+def _provenance_record(prov: Path, data: dict, mtime_ns: int) -> ProvenanceRecord | None:
+    rel_parts = rel(prov).parts
+    if len(rel_parts) < 2:
+        return None
+    top, stem = rel_parts[0], rel_parts[1]
+    doi_prefix = rel_parts[2] if len(rel_parts) > 3 else ""
+    doi_suffix = rel_parts[3] if len(rel_parts) > 3 else ""
+
+    pf_block = data.get("parsed_from_pnpmd") or {}
+
+    abstract = (
+        data.get("summary")
+        or data.get("abstract")
+        or pf_block.get("summary")
+        or pf_block.get("abstract")
+        or ""
+    )
+    kws = (data.get("keywords") or pf_block.get("keywords") or []) or []
+    if not isinstance(kws, list):
+        kws = [kws]
+    kws = [str(k).strip() for k in kws if k is not None and str(k).strip()]
+    onesent = (
+        data.get("one_sentence_summary")
+        or pf_block.get("one_sentence_summary")
+        or pf_block.get("one_sentence")
+        or ""
+    )
+
+    zenodo = data.get("zenodo") or {}
+    permalink = (data.get("permalink") or "").strip()
+    site_block = data.get("site") or {}
+    html_canonical = (
+        site_block.get("html_canonical")
+        or site_block.get("permalink")
+        or permalink
+        or ""
+    ).strip()
+    canonical_url = permalink or (
+        site_block.get("permalink") or site_block.get("html_canonical") or ""
+    ).strip()
+
+    assets = (data.get("assets") or {})
+    canonical_assets = (data.get("canonical_assets") or {})
+    artifacts = (data.get("artifacts") or {})
+
+    md_name   = (artifacts.get("md") or artifacts.get("main") or None)
+    html_name = (artifacts.get("html_name") or None)
+    pmd_name  = (artifacts.get("pandoc_md_name") or artifacts.get("pandoc_md") or None)
+    pdf_name  = (artifacts.get("pdf_name") or artifacts.get("pdf") or None)
+    epub_name = (artifacts.get("epub_name") or artifacts.get("epub") or None)
+    add_old   = artifacts.get("additional") or {}
+    if not html_name:
+        html_name = add_old.get("html")
+    if not pmd_name:
+        pmd_name  = add_old.get("pandoc_md")
+    if not pdf_name:
+        pdf_name = add_old.get("pdf")
+    if not epub_name:
+        epub_name = add_old.get("epub")
+
+    if not md_name and artifacts.get("md_url"):
+        md_name = Path(artifacts["md_url"]).name
+    if not html_name and artifacts.get("html_url"):
+        html_name = Path(artifacts["html_url"]).name
+    if not pmd_name and artifacts.get("pandoc_md_url"):
+        pmd_name = Path(artifacts["pandoc_md_url"]).name
+    if not pdf_name and artifacts.get("pdf_url"):
+        pdf_name = Path(artifacts["pdf_url"]).name
+    if not epub_name and artifacts.get("epub_url"):
+        epub_name = Path(artifacts["epub_url"]).name
+
+    references_doi = data.get("references_doi") or pf_block.get("references_doi") or []
+    if not isinstance(references_doi, list):
+        references_doi = [references_doi]
+
+    return ProvenanceRecord(
+        prov=prov,
+        mtime_ns=mtime_ns,
+        top=top,
+        stem=stem,
+        doi_prefix=doi_prefix,
+        doi_suffix=doi_suffix,
+        journal=(data.get("journal") or "").strip(),
+        title=(data.get("title") or pf_block.get("title") or ""),
+        authors=normalize_authors(data.get("authors") or pf_block.get("authors")),
+        abstract=(abstract or "").strip(),
+        feed_abstract=(data.get("abstract") or pf_block.get("abstract") or ""),
+        onesent=(onesent or "").strip(),
+        kws=kws,
+        date=(
+            data.get("publication_date")
+            or data.get("creation_date")
+            or pf_block.get("date")
+            or ""
+        ),
+        doi=(data.get("doi") or zenodo.get("doi") or ""),
+        concept=(data.get("concept_doi") or zenodo.get("concept_doi") or ""),
+        permalink=permalink,
+        canonical_url=canonical_url,
+        html_canonical=html_canonical,
+        md_name=md_name,
+        html_name=html_name,
+        pmd_name=pmd_name,
+        pdf_name=pdf_name,
+        epub_name=epub_name,
+        embed_name=(
+            artifacts.get("embed_html_name")
+            or artifacts.get("embed_html")
+            or None
+        ),
+        embed_url=(
+            artifacts.get("embed_url")
+            or _asset_url(assets.get("embed"))
+            or _asset_url(assets.get("embed_html"))
+            or _asset_url(canonical_assets.get("embed"))
+            or _asset_url(canonical_assets.get("embed_html"))
+            or ""
+        ),
+        assets_pdf=(
+            artifacts.get("pdf_url")
+            or _asset_url(assets.get("pdf"))
+            or _asset_url(canonical_assets.get("pdf"))
+            or ""
+        ),
+        assets_epub=(
+            artifacts.get("epub_url")
+            or _asset_url(assets.get("epub"))
+            or _asset_url(canonical_assets.get("epub"))
+            or ""
+        ),
+        references_doi=references_doi,
+    )
+
+# Records stay resident across --watch passes; re-parsed only when size/mtime change.
+_PROVENANCE_CACHE: dict[Path, tuple[int, int, ProvenanceRecord | None]] = {}
+# Catalog of the current pass (None => walk again on next use).
+_CATALOG: list[ProvenanceRecord] | None = None
+
+def load_provenance_record(prov: Path) -> ProvenanceRecord | None:
+    st = prov.stat()
+    hit = _PROVENANCE_CACHE.get(prov)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    try:
+        if YAML_CACHE:
+            data = YAML_CACHE.load(prov) or {}
+        else:
+            data = safe_load(prov.read_text(encoding="utf-8")) or {}
+        record = _provenance_record(prov, data, st.st_mtime_ns)
+    except Exception:
+        record = None
+    _PROVENANCE_CACHE[prov] = (st.st_mtime_ns, st.st_size, record)
+    return record
+
+def provenance_catalog() -> list[ProvenanceRecord]:
+    """
+    Every provenance.yaml in the tree, walked and parsed once per build pass.
+    Unreadable or malformed files are skipped.
+    """
+    global _CATALOG
+    if _CATALOG is None:
+        records = []
+        # sorted by parts so each (top, stem) group is contiguous
+        for prov in sorted(iter_provenance_files(), key=lambda p: p.parts):
+            try:
+                record = load_provenance_record(prov)
+            except OSError:
+                continue
+            if record is not None:
+                records.append(record)
+        _CATALOG = records
+    return _CATALOG
+
+def invalidate_catalog() -> None:
+    global _CATALOG
+    _CATALOG = None
+
+def iter_article_groups():
+    """
+    Versioned records grouped by (top, stem), streamed in catalog order; only
+    one group is materialized at a time.
+    """
+    versioned = (r for r in provenance_catalog() if r.doi_prefix)
+    for key, items in itertools.groupby(versioned, key=lambda r: (r.top, r.stem)):
+        yield key, list(items)
+
+def dump_catalog(path: Path) -> None:
+    """Write the provenance catalog as a JSON array, one record at a time."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        f.write("[")
+        for i, r in enumerate(provenance_catalog()):
+            f.write(",\n" if i else "\n")
+            rec = {name: getattr(r, name) for name in ProvenanceRecord.__slots__}
+            rec["prov"] = rel(r.prov).as_posix()
+            f.write(json.dumps(rec, ensure_ascii=False, default=str))
+        f.write("\n]\n")
+    print(f"[DEBUG] catalog dumped to {path}")
+
 def hidden_stems_from_provenance() -> set[tuple[str, str]]:
     stems_with_pref: set[tuple[str, str]] = set()
     stems_with_nonpref: set[tuple[str, str]] = set()
 
-    for prov in iter_provenance_files():
-        try:
-            data = yaml.safe_load(prov.read_text(encoding="utf-8")) or {}
-        except Exception:
-            continue
-
-        j = (data.get("journal") or "").strip()
-        rel_parts = rel(prov).parts
-        if len(rel_parts) < 2:
-            continue
-        top, stem = rel_parts[0], rel_parts[1]
-        key = (top, stem)
-
-        if not j:
+    for r in provenance_catalog():
+        if not r.journal:
             continue
-        if j == PREFERRED_JOURNAL:
+        key = (r.top, r.stem)
+        if r.journal == PREFERRED_JOURNAL:
             stems_with_pref.add(key)
         else:
             stems_with_nonpref.add(key)
@@ -361,12 +789,43 @@ def _normalize_feed_url(url: str) -> str:
         return url
 
 # ---------- templating ----------
+_HEAD_CLOSE_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+
+@dataclass(frozen=True, slots=True)
+class PageShell:
+    """header/footer/coda split once at the </head> offset of the header."""
+    head: str          # header up to </head> (whole header if it has none)
+    after_head: str    # header from </head> on ("" if it has none)
+    footer: str
+    coda: str
+    head_split: bool
+
+# Compiled shell of the current pass (None => load on next write_html()).
+_PAGE_SHELL: PageShell | None = None
+
+def page_shell() -> PageShell:
+    global _PAGE_SHELL
+    if _PAGE_SHELL is None:
+        header = load_template(SRC / "header.html")
+        m = _HEAD_CLOSE_RE.search(header)
+        _PAGE_SHELL = PageShell(
+            head=header[:m.start()] if m else header,
+            after_head=header[m.start():] if m else "",
+            footer=load_template(SRC / "footer.html"),
+            coda=load_template(SRC / "coda.html"),
+            head_split=m is not None,
+        )
+    return _PAGE_SHELL
+
 def write_html(out_html: Path, body_html: str, head_extra: str = "", title: str = ""):
+    write_if_changed(out_html, render_html(out_html, body_html, head_extra, title))
+    _track_output(out_html)
+    _note_output(out_html)
+
+def render_html(out_html: Path, body_html: str, head_extra: str = "", title: str = "") -> str:
     # All pages (including *.md.html mirrors) get header + breadcrumb (for mirrors)
     # + body + footer + coda.
-    header = load_text(SRC / "header.html")
-    footer = load_text(SRC / "footer.html")
-    coda   = load_text(SRC / "coda.html")
+    shell = page_shell()
 
     rel_html = rel_out(out_html).as_posix()
     is_md_html = rel_html.endswith(".md.html")
@@ -383,43 +842,44 @@ def write_html(out_html: Path, body_html: str, head_extra: str = "", title: str
     if is_md_html:
         body_block = f'<div class="md-container">\n{body_block}\n</div>\n'
 
-    doc = "".join(
-        s for s in (
-            header,
-            breadcrumb_html + "\n" if breadcrumb_html else "",
-            body_block,
-            footer,
-        ) if s
-    )
-
-    # NOTE: head_extra injection is currently disabled. Re-enable this block
-    # if per-page <title>/<meta> should be injected again.
     if head_extra:
         charset = '<!DOCTYPE html><meta charset="UTF-8">'
         title_tag = f"<title>{title} - {PREFERRED_JOURNAL}</title>"
         if charset not in head_extra:
             head_extra = charset + "\n" + title_tag + "\n" + head_extra
-        m = re.search(r"</head\s*>", doc, re.IGNORECASE)
-        if m:
-            doc = doc[:m.start()] + head_extra + doc[m.start():]
-        else:
-            doc = head_extra + doc
 
+    chunks = [
+        shell.head,
+        head_extra if shell.head_split else "",
+        shell.after_head,
+        breadcrumb_html + "\n" if breadcrumb_html else "",
+        body_block,
+        shell.footer,
+    ]
+    if head_extra and not shell.head_split:
+        # header without </head>: inject before one in the page, else prepend
+        doc = "".join(chunks)
+        m = _HEAD_CLOSE_RE.search(doc)
+        doc = doc[:m.start()] + head_extra + doc[m.start():] if m else head_extra + doc
+        chunks = [doc]
+
+    last = next((c for c in reversed(chunks) if c), "")
+    if not last.endswith("\n"):
+        chunks.append("\n")
+    chunks.append(PAGE_STAMP)
+    chunks.append(shell.coda)
+    return "".join(chunks)
+
+def build_stamp() -> str:
+    """
+    "(built: ...)" for this pass, in New York time. SOURCE_DATE_EPOCH, when
+    set, replaces the clock so repeated builds are byte-identical.
+    """
     ny = ZoneInfo("America/New_York")
-    now = datetime.now(ny)
+    now = (source_date_epoch() or datetime.now(timezone.utc)).astimezone(ny)
     offset = now.utcoffset()
     hrs = int(offset.total_seconds() // 3600) if offset else 0
-    stamp = f"(built: {now.strftime('%Y-%m-%d %H:%M %Z')} UTC{hrs:+d})"
-
-    if not doc.endswith("\n"):
-        doc += "\n"
-    doc += stamp
-
-    if coda:
-        doc += coda
-
-    out_html.parent.mkdir(parents=True, exist_ok=True)
-    out_html.write_text(doc, encoding="utf-8")
+    return f"(built: {now.strftime('%Y-%m-%d %H:%M %Z')} UTC{hrs:+d})"
 
 def _should_render_markdown(src: Path, dst_html: Path) -> bool:
     if not dst_html.exists():
@@ -430,8 +890,28 @@ def _should_render_markdown(src: Path, dst_html: Path) -> bool:
     except Exception:
         return True
 
+def _generator_params(**extra) -> dict:
+    """Non-file inputs that change generated pages (origin, journal, this script)."""
+    params = {
+        "origin": _current_origin(),
+        "journal": PREFERRED_JOURNAL,
+        "generator": MANIFEST.digest(Path(__file__).resolve()) if MANIFEST else "",
+        "stamp": STAMP_MODE,
+    }
+    params.update(extra)
+    return params
+
 def render_markdown_file(src: Path, dst_html: Path, title: str):
-    if not _should_render_markdown(src, dst_html):
+    _track_output(dst_html)
+    if MANIFEST:
+        key = MANIFEST.input_key(
+            "md.html",
+            [src, *MD_TEMPLATE_DEPS],
+            _generator_params(title=title),
+        )
+        if MANIFEST.is_fresh(dst_html, key):
+            return
+    elif not _should_render_markdown(src, dst_html):
         return
     md = src.read_text(encoding="utf-8")
     # Replace YAML front matter with a Markdown H1 so mirrors show the title, not raw YAML.
@@ -461,39 +941,31 @@ def render_markdown_file(src: Path, dst_html: Path, title: str):
     )
 
     write_html(dst_html, body_html, head_extra=head_extra, title=title)
-
-def render_md_formats(src_in_site: Path, rel_path: Path, *, do_pdf: bool, do_epub: bool):
-    """
-    Render PDF/EPUB for a mirrored Markdown file (already under OUT) using render.py.
-    Outputs are written next to the mirrored file in OUT.
-    """
-    if not (do_pdf or do_epub):
-        return
-
-    render_py = ROOT / ".scripts" / "render" / "render.py"
-    if not render_py.exists():
-        print(f"[DEBUG] render.py not found at {render_py}; skipping md formats for {rel_path}")
-        return
-
-    cmd = [sys.executable, str(render_py)]
-    if do_pdf:
-        cmd.append("--pdf")
-    if do_epub:
-        cmd.append("--epub")
-    cmd.append(src_in_site.name)
-
-    proc = subprocess.run(
-        cmd,
-        cwd=src_in_site.parent,
-        text=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-    )
-    out = proc.stdout or ""
-    if out:
-        print(out, end="" if out.endswith("\n") else "\n")
-    if proc.returncode != 0:
-        print(f"[DEBUG] WARNING: md render failed (rc={proc.returncode}) for {rel_path}; continuing")
+    if MANIFEST:
+        MANIFEST.record(dst_html, "md.html", key)
+
+# render.py children share one long-lived pandoc container (started on first
+# use, removed when this process exits); None until then, False => one-shot.
+_PANDOC_WORKER = None
+
+def _render_env() -> dict[str, str]:
+    """Environment for render.py subprocesses (see pnpmd_pandoc.WORKER_ENV)."""
+    global _PANDOC_WORKER
+    if _PANDOC_WORKER is None:
+        render_dir = str(ROOT / ".scripts" / "render")
+        if render_dir not in sys.path:
+            sys.path.append(render_dir)
+        import pnpmd_pandoc
+        _PANDOC_WORKER = pnpmd_pandoc.pandoc_worker() or False
+        if _PANDOC_WORKER:
+            print(f"[DEBUG] pandoc worker container: {_PANDOC_WORKER.name}")
+    env = dict(os.environ)
+    if _PANDOC_WORKER:
+        env["PNPMD_PANDOC_WORKER"] = _PANDOC_WORKER.name
+        env["PNPMD_PANDOC_WORKDIR"] = str(_PANDOC_WORKER.mount)
+    if RENDER_CACHE is not None:
+        env["PNPMD_CACHE_DIR"] = RENDER_CACHE
+    return env
 
 def _book_base_from_yaml(path: Path) -> str:
     try:
@@ -542,6 +1014,22 @@ def _book_output_files(
         outputs.append(book_dir / f"{base}.epub")
     return outputs
 
+def _book_render_key(
+    book_dir: Path,
+    meta_path: Path,
+    *,
+    include_pdf: bool,
+    include_epub: bool,
+    include_html: bool,
+) -> str:
+    base = _book_base_from_yaml(meta_path)
+    inputs = sorted(_book_input_files(book_dir, meta_path, base))
+    return MANIFEST.input_key(
+        "book",
+        inputs,
+        {"pdf": include_pdf, "epub": include_epub, "html": include_html},
+    )
+
 def _book_needs_render(
     book_dir: Path,
     meta_path: Path,
@@ -561,6 +1049,15 @@ def _book_needs_render(
     )
     if any(not p.exists() for p in outputs):
         return True
+    if MANIFEST:
+        key = _book_render_key(
+            book_dir,
+            meta_path,
+            include_pdf=include_pdf,
+            include_epub=include_epub,
+            include_html=include_html,
+        )
+        return not all(MANIFEST.is_fresh(p, key) for p in outputs)
     input_mtime = _max_mtime(inputs)
     output_mtimes = []
     for p in outputs:
@@ -571,7 +1068,7 @@ def _book_needs_render(
     output_min_mtime = min(output_mtimes) if output_mtimes else 0.0
     return input_mtime > output_min_mtime
 
-def _render_single_book(
+def _book_render_job(
     book_dir: Path,
     meta_name: str,
     render_py: Path,
@@ -579,74 +1076,32 @@ def _render_single_book(
     include_epub: bool = True,
     include_pdf: bool = True,
     include_html: bool = True,
-) -> tuple[Path, int, str]:
+) -> RenderJob:
     """
-    Render a single book directory with render.py.
-
-    include_pdf/include_html/include_epub request those formats. include_html=False
-    will skip both PDF/HTML renders and just run preprocessing to emit concatenated
-    .md/.pandoc.md files. By default we ask for PDF+HTML+EPUB; on PDF failure we
-    retry HTML-only so concatenated outputs still exist.
+    The render.py run for one book directory: one concatenation and
+    preprocessing pass for every requested format (render_outputs() starts
+    HTML first); with no formats requested it only writes the concatenated
+    .md/.pandoc.md. Runs at HTML priority when it renders HTML.
     """
-    cmd = [sys.executable, str(render_py)]
-
-    if include_pdf and include_html:
-        cmd.append("--all")  # PDF+HTML
-    elif include_pdf:
-        cmd.append("--pdf")
-    elif include_html:
-        cmd.append("--html")
-
-    if include_epub and (include_html or include_pdf):
-        cmd.append("--epub")
-
-    cmd.extend(
-        [
-            "--omit-numbering",
-            "--toc-depth",
-            "1",
-            meta_name,
-        ]
-    )
-
-    proc = subprocess.run(
-        cmd,
+    try:
+        label = rel(book_dir).as_posix()
+    except Exception:
+        label = book_dir.name
+    if include_html and include_pdf and include_epub:
+        flags = ["--all"]
+    else:
+        flags = (
+            (["--html"] if include_html else [])
+            + (["--pdf"] if include_pdf else [])
+            + (["--epub"] if include_epub else [])
+        )
+    return RenderJob(
+        label=label,
+        cmd=[sys.executable, str(render_py), *flags, "--omit-numbering", "--toc-depth", "1", meta_name],
         cwd=book_dir,
-        text=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
+        priority=PRIORITY_HTML if include_html else PRIORITY_PRINT,
+        timeout=RENDER_TIMEOUT,
     )
-    out = proc.stdout or ""
-
-    # If PDF+HTML failed (likely due to PDF), retry HTML-only (no EPUB) so the
-    # build keeps going and concatenated outputs exist.
-    if include_pdf and proc.returncode != 0:
-        out += (
-            ("\n" if out and not out.endswith("\n") else "")
-            + "[DEBUG] PDF+HTML render failed; retrying HTML-only without EPUB\n"
-        )
-        fallback_cmd = [sys.executable, str(render_py)]
-        if include_html:
-            fallback_cmd.append("--html")
-        fallback_cmd.extend(
-            [
-                "--omit-numbering",
-                "--toc-depth",
-                "1",
-                meta_name,
-            ]
-        )
-        proc2 = subprocess.run(
-            fallback_cmd,
-            cwd=book_dir,
-            text=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-        )
-        out += proc2.stdout or ""
-        return book_dir, proc2.returncode, out
-
-    return book_dir, proc.returncode, out
 
 def render_book_dirs(
     skip_epub: bool = False,
@@ -654,16 +1109,18 @@ def render_book_dirs(
     include_html: bool = True,
     max_workers: int | None = None,
     base_dir: Path | None = None,
+    only_dirs: set[Path] | None = None,
 ):
     """
     Find directories that declare a book.yml/book.yaml and render them before
     mirroring the tree into site(). By default renders PDF+HTML+EPUB.
+    only_dirs restricts the search to those directories (--watch rebuilds).
 
-    skip_epub=True renders without EPUB. include_pdf=True attempts PDF+HTML
-    (still skipping EPUB if skip_epub is set), and on failure falls back to
-    HTML-only so the build can continue. include_html=False will only run the
-    preprocessing step to emit concatenated .md/.pandoc.md files. max_workers
-    limits parallelism; default uses min(4, number of books).
+    skip_epub=True renders without EPUB; include_pdf=False without PDF.
+    include_html=False will only run the preprocessing step to emit
+    concatenated .md/.pandoc.md files. Each book is one render.py job (see
+    _book_render_job()) on one RenderScheduler. max_workers limits how many
+    jobs run at once; default sizes it from CPUs and available memory.
     """
     base = base_dir or ROOT
     skip_gitignore = base == OUT
@@ -678,7 +1135,10 @@ def render_book_dirs(
     seen: set[Path] = set()
     candidates: list[Path] = []
     for ext in ("book.yml", "book.yaml"):
-        candidates.extend(base.rglob(ext))
+        if only_dirs is None:
+            candidates.extend(base.rglob(ext))
+        else:
+            candidates.extend(d / ext for d in sorted(only_dirs) if (d / ext).is_file())
 
     book_entries: list[tuple[Path, Path]] = []
     for meta in candidates:
@@ -714,6 +1174,7 @@ def render_book_dirs(
         return
 
     render_entries: list[tuple[Path, str]] = []
+    render_keys: dict[Path, tuple[str | None, list[Path]]] = {}
     for book_dir, meta in book_entries:
         if _book_needs_render(
             book_dir,
@@ -723,6 +1184,23 @@ def render_book_dirs(
             include_html=include_html,
         ):
             render_entries.append((book_dir, meta.name))
+            key = None
+            if MANIFEST:
+                key = _book_render_key(
+                    book_dir,
+                    meta,
+                    include_pdf=include_pdf,
+                    include_epub=include_epub,
+                    include_html=include_html,
+                )
+            outputs = _book_output_files(
+                book_dir,
+                _book_base_from_yaml(meta),
+                include_pdf=include_pdf,
+                include_epub=include_epub,
+                include_html=include_html,
+            )
+            render_keys[book_dir] = (key, outputs)
         else:
             try:
                 rel_root = rel(book_dir)
@@ -730,7 +1208,20 @@ def render_book_dirs(
                 rel_root = book_dir
             print(f"[DEBUG] Skipping book render (up to date): {rel_root}")
 
-    workers = max_workers or min(4, len(render_entries)) if render_entries else 0
+    scheduler = RenderScheduler(1)
+    book_jobs: dict[Path, RenderJob] = {}
+    for book_dir, meta_name in render_entries:
+        book_jobs[book_dir] = scheduler.submit(
+            _book_render_job(
+                book_dir,
+                meta_name,
+                render_py,
+                include_epub=include_epub,
+                include_pdf=include_pdf,
+                include_html=include_html,
+            )
+        )
+    scheduler.concurrency = max_workers or default_concurrency(len(scheduler.jobs))
     if not include_html and not include_pdf and not include_epub:
         mode = "preprocess only (no HTML/PDF/EPUB)"
     elif include_pdf and include_epub:
@@ -744,37 +1235,41 @@ def render_book_dirs(
     if render_entries:
         print(
             f"[DEBUG] Rendering {len(render_entries)}/{len(book_entries)} book(s) ({mode}) "
-            f"with {workers} worker(s) from base={base}"
+            f"with {scheduler.concurrency} worker(s) from base={base}"
         )
-        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
-            futures = []
-            for book_dir, meta_name in render_entries:
-                futures.append(
-                    ex.submit(
-                        _render_single_book,
-                        book_dir,
-                        meta_name,
-                        render_py,
-                        include_epub=include_epub,
-                        include_pdf=include_pdf,
-                        include_html=include_html,
-                    )
+        if include_html or include_pdf or include_epub:
+            scheduler.env = _render_env()
+        scheduler.run()
+        for book_dir, job in book_jobs.items():
+            key, outputs = render_keys[book_dir]
+            for p in outputs:
+                if p.exists():
+                    _note_output(p)
+            if job.returncode != 0:
+                # Nothing is recorded, so the next build retries the book;
+                # formats that did render come back from the render cache.
+                print(
+                    f"[DEBUG] WARNING: book render failed (rc={job.returncode}) "
+                    f"for {job.label}; continuing build"
                 )
-
-            for fut in concurrent.futures.as_completed(futures):
-                book_dir, rc, out = fut.result()
-                if out:
-                    print(out, end="" if out.endswith("\n") else "\n")
-                if rc != 0:
-                    print(
-                        f"[DEBUG] WARNING: book render failed (rc={rc}) "
-                        f"for {rel(book_dir)}; continuing build"
-                    )
+            elif key:
+                for p in outputs:
+                    MANIFEST.record(p, "book", key)
     else:
         print(f"[DEBUG] All books up to date; skipping renders from base={base}")
 
     # Ensure every .md (including combined book .md) has a .md.html wrapper.
-    for book_dir, _meta in book_entries:
+    # Formats skipped this pass keep the files an earlier build rendered.
+    for book_dir, meta in book_entries:
+        for p in _book_output_files(
+            book_dir,
+            _book_base_from_yaml(meta),
+            include_pdf=".pdf" not in SKIP_COPY_EXTS,
+            include_epub=".epub" not in SKIP_COPY_EXTS,
+            include_html=True,
+        ):
+            if p.exists():
+                _track_output(p)
         try:
             for md_file in book_dir.glob("*.md"):
                 render_markdown_file(
@@ -798,6 +1293,7 @@ def write_md_like_page(
     title: str | None = None,
     *,
     escape_html: bool = True,
+    head_extra: str = "",
 ):
     body = md_body
     if escape_html:
@@ -814,6 +1310,7 @@ def write_md_like_page(
         f"{title_tag}"
         f'<link rel="canonical" href="{html.escape(page_url, quote=True)}">'
         '<meta name="robots" content="index,follow">\n'
+        f"{head_extra}"
     )
 
     write_html(out_html, body, head_extra=head_extra, title=t or "Index")
@@ -927,17 +1424,17 @@ def fmt_author(a):
         return f'{nm} (<a href="{oc}">ORCID</a>)'
     return nm
 
-def _doi_value(it: dict) -> str:
-    doi_clean = (it.get("doi") or "").replace(" ", "")
+def _doi_value(it: ProvenanceRecord) -> str:
+    doi_clean = (it.doi or "").replace(" ", "")
     if doi_clean:
         return doi_clean
-    if it.get("doi_prefix") and it.get("doi_suffix"):
-        return f"{it['doi_prefix']}/{it['doi_suffix']}"
+    if it.doi_prefix and it.doi_suffix:
+        return f"{it.doi_prefix}/{it.doi_suffix}"
     return ""
 
-def _doi_alias(origin: str, it: dict) -> str:
-    if it.get("doi_prefix") and it.get("doi_suffix"):
-        return f"{origin}/doi/{it['doi_prefix']}/{it['doi_suffix']}"
+def _doi_alias(origin: str, it: ProvenanceRecord) -> str:
+    if it.doi_prefix and it.doi_suffix:
+        return f"{origin}/doi/{it.doi_prefix}/{it.doi_suffix}"
     return ""
 
 def _share_lines_versions(
@@ -945,9 +1442,9 @@ def _share_lines_versions(
     origin: str,
     top: str,
     stem: str,
-    versions: list[dict],
-    latest: dict,
-    current: dict | None = None,
+    versions: list[ProvenanceRecord],
+    latest: ProvenanceRecord,
+    current: ProvenanceRecord | None = None,
 ) -> list[str]:
     stem_seg = quote(stem, safe="")
     stem_url = f"{origin}/{top}/{stem_seg}/"
@@ -959,14 +1456,14 @@ def _share_lines_versions(
 
     lines = [f'latest version: <a href="{latest_alias}">{latest_alias}</a>']
     current_key = (
-        current.get("doi_prefix"),
-        current.get("doi_suffix"),
+        current.doi_prefix,
+        current.doi_suffix,
     ) if current else (None, None)
     for v in versions:
-        date_disp = iso_date_str(v.get("date") or "")
+        date_disp = iso_date_str(v.date or "")
         alias = _doi_alias(origin, v)
-        label = date_disp or f"{v.get('doi_prefix','')}/{v.get('doi_suffix','')}"
-        if (v.get("doi_prefix"), v.get("doi_suffix")) == current_key:
+        label = date_disp or f"{v.doi_prefix}/{v.doi_suffix}"
+        if (v.doi_prefix, v.doi_suffix) == current_key:
             label = f"{label} (this version)"
         if not alias or _is_pending_doi(_doi_value(v)):
             lines.append(f"{label}: (DOI pending)" if label else "(DOI pending)")
@@ -975,449 +1472,187 @@ def _share_lines_versions(
     return lines
 
 # ---------- article pages ----------
-def build_article_pages() -> set[Path]:
-    origin = _current_origin()
-    article_dirs: set[Path] = set()
+def _version_dir(top: str, stem: str, it: ProvenanceRecord) -> Path:
+    return OUT / top / stem / it.doi_prefix / it.doi_suffix
 
-    records = []
-    for prov in iter_provenance_files():
-        try:
-            data = yaml.safe_load(prov.read_text(encoding="utf-8")) or {}
-        except Exception:
-            continue
+def _doi_alias_dirs(top: str, stem: str, it: ProvenanceRecord) -> list[Path]:
+    """
+    Dirs that also answer for one version: the top-level and root DOI paths
+    and the mirror of its source dir (when that differs from the version dir).
+    """
+    primary = _version_dir(top, stem, it)
+    dirs: list[Path] = []
+    for d in (
+        OUT / top / "doi" / it.doi_prefix / it.doi_suffix,
+        OUT / "doi" / it.doi_prefix / it.doi_suffix,
+        OUT / rel(it.prov.parent),
+    ):
+        if d != primary and d not in dirs:
+            dirs.append(d)
+    return dirs
+
+def _article_group_dirs(
+    top: str, stem: str, versions: list[ProvenanceRecord], aliases: bool = True
+) -> list[Path]:
+    """Output dirs of one (top, stem) group: stem page plus four per version."""
+    dirs = [OUT / top / stem]
+    for it in versions:
+        for d in (_version_dir(top, stem, it), *(_doi_alias_dirs(top, stem, it) if aliases else ())):
+            if d not in dirs:
+                dirs.append(d)
+    return dirs
+
+def _out_url_path(d: Path) -> str:
+    """Site-relative URL of an OUT directory, with a trailing slash."""
+    if d == OUT:
+        return "/"
+    return "/" + quote(rel_out(d).as_posix(), safe="/:@-._~") + "/"
+
+def _redirect_stub(url: str, title: str, canonical: str | None = None) -> str:
+    """Tiny page pointing search engines and browsers at `url`."""
+    u = html.escape(url, quote=True)
+    c = html.escape(canonical or url, quote=True)
+    return (
+        '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">\n'
+        f"<title>{html.escape(title)} - {html.escape(PREFERRED_JOURNAL)}</title>\n"
+        f'<link rel="canonical" href="{c}">\n'
+        '<meta name="robots" content="noindex">\n'
+        f'<meta http-equiv="refresh" content="0; url={u}">\n'
+        f'</head><body><p>Moved to <a href="{u}">{u}</a>.</p></body></html>\n'
+    )
 
-        rel_parts = rel(prov).parts
-        if len(rel_parts) < 4:
+def _write_doi_aliases(
+    primary: Path, aliases: list[Path], doc: str, url: str, title: str
+) -> list[Path]:
+    """
+    Materialize the already-rendered version page `doc` (written at `primary`)
+    at each alias dir per DOI_ALIAS_MODE. Returns the pages written; in
+    "redirects" mode nothing is written and leftover alias pages are removed.
+    """
+    pages: list[Path] = []
+    for d in aliases:
+        page = d / "index.html"
+        if DOI_ALIAS_MODE == "redirects":
+            if page.exists():
+                page.unlink()
             continue
+        d.mkdir(parents=True, exist_ok=True)
+        if DOI_ALIAS_MODE != "hardlink" and placement(primary, page) != "copy":
+            # a link left by "hardlink" mode may hold exactly these bytes,
+            # which write_if_changed() would keep in place
+            page.unlink()
+        if DOI_ALIAS_MODE == "hardlink":
+            if placement(primary, page) != "hardlink":
+                place_file(primary, page, "hardlink")
+        elif DOI_ALIAS_MODE == "refresh":
+            write_if_changed(page, _redirect_stub(url, title))
+        else:
+            write_if_changed(page, doc)
+        pages.append(page)
+    return pages
 
-        top = rel_parts[0]
-        stem = rel_parts[1]
-        doi_prefix = rel_parts[2]
-        doi_suffix = rel_parts[3]
-
-        journal = (data.get("journal") or "").strip()
-
-        pf_block = data.get("parsed_from_pnpmd") or {}
-
-        title    = (data.get("title") or pf_block.get("title") or "") or ""
-        abstract = (
-            data.get("summary")
-            or data.get("abstract")
-            or pf_block.get("summary")
-            or pf_block.get("abstract")
-            or ""
-        )
-        abstract = (abstract or "").strip()
-        kws      = (data.get("keywords") or pf_block.get("keywords") or []) or []
-        if not isinstance(kws, list):
-            kws = [kws]
-        kws_list = []
-        for k in kws:
-            if k is None:
-                continue
-            ks = str(k).strip()
-            if ks:
-                kws_list.append(ks)
-        kws = kws_list
-        onesent  = (
-            data.get("one_sentence_summary")
-            or pf_block.get("one_sentence_summary")
-            or pf_block.get("one_sentence")
-            or ""
-        )
-        onesent = (onesent or "").strip()
-
-        authors  = normalize_authors(data.get("authors") or pf_block.get("authors"))
-
-        date_norm = (
-            data.get("publication_date")
-            or data.get("creation_date")
-            or pf_block.get("date")
-            or ""
-        )
-
-        zenodo = data.get("zenodo") or {}
-        doi     = (data.get("doi") or zenodo.get("doi") or "") or ""
-        concept = (data.get("concept_doi") or zenodo.get("concept_doi") or "") or ""
-
-        permalink = (data.get("permalink") or "").strip()
-        site_block = data.get("site") or {}
-        html_canonical = (
-            site_block.get("html_canonical")
-            or site_block.get("permalink")
-            or permalink
-            or ""
-        ).strip()
-
-        assets = (data.get("assets") or {})
-        canonical_assets = (data.get("canonical_assets") or {})
-        artifacts = (data.get("artifacts") or {})
-
-        md_name   = (artifacts.get("md") or artifacts.get("main") or None)
-        html_name = (artifacts.get("html_name") or None)
-        pmd_name  = (artifacts.get("pandoc_md_name") or artifacts.get("pandoc_md") or None)
-        pdf_name  = (artifacts.get("pdf_name") or artifacts.get("pdf") or None)
-        epub_name = (artifacts.get("epub_name") or artifacts.get("epub") or None)
-        add_old   = artifacts.get("additional") or {}
-        if not html_name:
-            html_name = add_old.get("html")
-        if not pmd_name:
-            pmd_name  = add_old.get("pandoc_md")
-        if not pdf_name:
-            pdf_name = add_old.get("pdf")
-        if not epub_name:
-            epub_name = add_old.get("epub")
-
-        if not md_name and artifacts.get("md_url"):
-            md_name = Path(artifacts["md_url"]).name
-        if not html_name and artifacts.get("html_url"):
-            html_name = Path(artifacts["html_url"]).name
-        if not pmd_name and artifacts.get("pandoc_md_url"):
-            pmd_name = Path(artifacts["pandoc_md_url"]).name
-        if not pdf_name and artifacts.get("pdf_url"):
-            pdf_name = Path(artifacts["pdf_url"]).name
-        if not epub_name and artifacts.get("epub_url"):
-            epub_name = Path(artifacts["epub_url"]).name
-
-        assets_pdf = (
-            artifacts.get("pdf_url")
-            or _asset_url(assets.get("pdf"))
-            or _asset_url(canonical_assets.get("pdf"))
-            or ""
-        )
-        assets_epub = (
-            artifacts.get("epub_url")
-            or _asset_url(assets.get("epub"))
-            or _asset_url(canonical_assets.get("epub"))
-            or ""
-        )
-        embed_name = (
-            artifacts.get("embed_html_name")
-            or artifacts.get("embed_html")
-            or None
-        )
-        embed_url = (
-            artifacts.get("embed_url")
-            or _asset_url(assets.get("embed"))
-            or _asset_url(assets.get("embed_html"))
-            or _asset_url(canonical_assets.get("embed"))
-            or _asset_url(canonical_assets.get("embed_html"))
-            or ""
-        )
-
-        references_doi = data.get("references_doi") or pf_block.get("references_doi") or []
-        if not isinstance(references_doi, list):
-            references_doi = [references_doi]
-
-        records.append({
-            "prov": prov, "top": top, "stem": stem,
-            "doi_prefix": doi_prefix, "doi_suffix": doi_suffix,
-            "title": title, "authors": authors,
-            "abstract": abstract, "onesent": onesent,
-            "kws": kws,
-            "date": date_norm, "doi": doi, "concept": concept,
-            "assets_pdf": assets_pdf,
-            "assets_epub": assets_epub,
-            "md_name": md_name, "html_name": html_name, "pmd_name": pmd_name,
-            "pdf_name": pdf_name, "epub_name": epub_name,
-            "embed_name": embed_name, "embed_url": embed_url,
-            "html_canonical": html_canonical,
-            "references_doi": references_doi,
-            "journal": journal,
-        })
-
-        json.dumps(records, indent=2, default=str)
-
-    if not records:
-        return set()
-
-    # group by (top-level folder, stem)
-    groups: dict[tuple[str, str], list[dict]] = {}
-    for r in records:
-        key = (r["top"], r["stem"])
-        groups.setdefault(key, []).append(r)
-
-    for (top, stem), items in groups.items():
-        def sort_key(it):
-            mtime = datetime.fromtimestamp(it["prov"].stat().st_mtime)
-            dt = _to_datetime(it["date"]) or mtime
-            doi_num = _doi_suffix_number(it.get("doi_suffix") or "")
-            return (dt, doi_num, it.get("doi_suffix") or "", mtime)
-
-        versions = sorted(items, key=sort_key, reverse=True)
-        latest = versions[0]
-
-        # --- each VERSION page ---
+def write_redirects_map(groups: list[tuple[str, str, list[ProvenanceRecord]]]) -> None:
+    """
+    site/_redirects (Netlify / Cloudflare Pages format) with a 301 from every
+    DOI alias to its version page. Removed when another alias mode is active.
+    """
+    if DOI_ALIAS_MODE != "redirects":
+        if REDIRECTS_FILE.exists():
+            REDIRECTS_FILE.unlink()
+        return
+    # a shared alias goes to the last version claiming it, as alias pages do
+    targets: dict[str, str] = {}
+    for top, stem, versions in groups:
         for it in versions:
-            src = it["prov"].parent
-            out_dir = OUT / top / stem / it["doi_prefix"] / it["doi_suffix"]
-            out_dir.mkdir(parents=True, exist_ok=True)
-
-            for f in src.iterdir():
-                if not f.is_file():
-                    continue
-                if f.suffix.lower() in SKIP_COPY_EXTS:
-                    continue
-                # Mirror assets and all rendered outputs; also mirror the parent stem dir (for DOI alias).
-                if f.suffix.lower() in MIRROR_EXTS or f.name.endswith(".md.html"):
-                    dst = OUT / rel(f)
-                    copy_if_changed(f, dst)
-
-            local_md   = f"/{(OUT/rel(src/it['md_name'])).relative_to(OUT).as_posix()}" if it["md_name"] else None
-            local_html = f"/{(OUT/rel(src/it['html_name'])).relative_to(OUT).as_posix()}" if it["html_name"] else None
-            local_embed = _local_artifact_url(src, it.get("embed_name")) if it.get("embed_name") else ""
-            embed_link = it.get("embed_url") or local_embed or ""
-            pdf_link = it.get("assets_pdf") or ""
-            local_epub = _local_artifact_url(src, it.get("epub_name")) if it.get("epub_name") else ""
-            epub_link = it.get("assets_epub") or local_epub or ""
-
-            html_body = ""
-            if it["html_name"] and (src/it["html_name"]).exists():
-                try:
-                    htxt = (src/it["html_name"]).read_text(encoding="utf-8")
-                    html_body = extract_html_body(htxt)
-                except Exception:
-                    html_body = ""
-
-            local_md_html = f"{local_md}.html" if local_md else ""
-            link_items = []
-            if local_html:
-                link_items.append(("HTML", local_html))
-            if embed_link:
-                link_items.append(("HTML Embed", embed_link))
-            if local_md_html:
-                link_items.append(("MD.HTML", local_md_html))
-            if local_md:
-                link_items.append(("MD (raw)", local_md))
-            if pdf_link:
-                link_items.append(("PDF", pdf_link))
-            if epub_link:
-                link_items.append(("EPUB", epub_link))
-
-            same_family = []
-            for v in versions:
-                if it["concept"] and v["concept"] == it["concept"]:
-                    same_family.append(v)
-                elif not it["concept"] and not v["concept"]:
-                    same_family.append(v)
-
-            share_lines = _share_lines_versions(
-                origin=origin,
-                top=top,
-                stem=stem,
-                versions=same_family,
-                latest=latest,
-                current=it,
-            )
-            share_html = (
-                "<div class=\"share\"><strong>Share as:</strong><br>"
-                + "<br>".join(share_lines)
-                + "</div>"
-            )
-            links_html = ""
-            if link_items:
-                links_html = (
-                    "<p class=\"links\"><strong>Latest:</strong></p>"
-                    + "<ul class=\"links\">"
-                    + "".join(
-                        f'<li><a href="{href}">{label}</a></li>'
-                        for label, href in link_items
-                    )
-                    + "</ul>"
-                )
+            target = _out_url_path(_version_dir(top, stem, it))
+            for d in _doi_alias_dirs(top, stem, it):
+                targets[_out_url_path(d)] = target
+    write_if_changed(
+        REDIRECTS_FILE,
+        "".join(f"{src} {dst} 301\n" for src, dst in sorted(targets.items())),
+    )
 
-            breadcrumbs = crumb_link([top, stem, it["doi_prefix"], it["doi_suffix"]])
-            stem_seg = quote(stem, safe="")
-            versions_list = []
-            for v in same_family:
-                ver_url = f"/{top}/{stem_seg}/{v['doi_prefix']}/{v['doi_suffix']}/"
-                doi_disp = f"{v['doi_prefix']}/{v['doi_suffix']}"
-                date_disp = v["date"] or ""
-                versions_list.append(f"<li>{date_disp} — <a href=\"{ver_url}\">{doi_disp}</a></li>")
-            versions_ul = "<ul>" + "".join(versions_list) + "</ul>" if versions_list else ""
-            display_authors = it["authors"]
-            authors_html = ", ".join(filter(None, (fmt_author(a) for a in display_authors)))
-
-            body = []
-            body.append(breadcrumbs)
-            body.append("<main class='paper'>")
-            body.append(f"<h1>{it['title']}</h1>")
-            if authors_html:
-                body.append(f"<p class='authors'>{authors_html}</p>")
-            body.append(f"<p class='publine'>{PREFERRED_JOURNAL} — {month_year(it['date'])}</p>")
-            if it["onesent"]:
-                body.append("<h2>One-Sentence Summary</h2>")
-                body.append(f"<p>{it['onesent']}</p>")
-
-            if it["abstract"]:
-                body.append("<h2>Summary</h2>")
-                body.append(f"<p>{it['abstract']}</p>")
-
-            if it["kws"]:
-                body.append("<h2>Keywords</h2>")
-                body.append(
-                    "<ul class='keywords'>"
-                    + "".join(f"<li>{k}</li>" for k in it["kws"])
-                    + "</ul>"
-                )
+def _article_group_signature(versions: list[ProvenanceRecord]) -> str | None:
+    if not MANIFEST:
+        return None
+    # prov mtime only matters for ordering undated versions
+    undated = sorted(
+        f"{rel(it.prov).as_posix()}@{it.mtime_ns}"
+        for it in versions
+        if not _to_datetime(it.date)
+    )
+    return MANIFEST.input_key(
+        "article",
+        sorted(it.prov for it in versions),
+        _generator_params(undated=undated, aliases=DOI_ALIAS_MODE),
+    )
 
-            if share_html or versions_ul or links_html:
-                body.append("<h2>Version</h2>" if len(same_family) <= 1 else "<h2>Versions</h2>")
-                if share_html:
-                    body.append(share_html)
-                if versions_ul:
-                    body.append(versions_ul)
-                if links_html:
-                    body.append(links_html)
-
-            body.append("</main>")
-
-            version_url = f"{origin}/{top}/{stem_seg}/{it['doi_prefix']}/{it['doi_suffix']}/"
-
-            head = []
-            head.append('<meta charset="utf-8">')
-            head.append(f'<link rel="canonical" href="{version_url}">')
-            if pdf_link:
-                head.append(f'<link rel="alternate" type="application/pdf" href="{pdf_link}">')
-            if epub_link:
-                head.append(f'<link rel="alternate" type="application/epub+zip" href="{epub_link}">')
-            head.append('<meta name="robots" content="index,follow">')
-            if it["title"]:
-                head.append(f'<meta name="citation_title" content="{it["title"]}">')
-            for a in display_authors:
-                nm = a.get("name", "")
-                if nm:
-                    head.append(f'<meta name="citation_author" content="{nm}">')
-            if it["date"]:
-                head.append(f'<meta name="citation_publication_date" content="{scholar_date(it["date"])}">')
-            head.append(f'<meta name="citation_journal_title" content="{PREFERRED_JOURNAL}">')
-            if pdf_link:
-                head.append(f'<meta name="citation_pdf_url" content="{pdf_link}">')
-            if it["doi"] and not _is_pending_doi(it["doi"]):
-                head.append(f'<meta name="citation_doi" content="{it["doi"]}">')
-            desc = it["abstract"] or it["onesent"] or it["title"]
-            if desc:
-                head.append(f'<meta name="description" content="{desc}">')
-                head.append(f'<meta property="og:description" content="{desc}">')
-            head.append('<meta property="og:type" content="article">')
-            head.append(f'<meta property="og:title" content="{it["title"]}">')
-            head.append(f'<meta property="og:url" content="{version_url}">')
-
-            authors_ld = []
-            for a in display_authors:
-                nm = a.get("name", "").strip()
-                oc = _orcid_url(a.get("orcid", "").strip())
-                if not nm:
-                    continue
-                ent = {"@type": "Person", "name": nm}
-                if oc:
-                    ent["sameAs"] = [oc]
-                authors_ld.append(ent)
-            enc = []
-            if pdf_link:
-                enc.append({
-                    "@type": "MediaObject",
-                    "contentUrl": pdf_link,
-                    "encodingFormat": "application/pdf",
-                })
-            if epub_link:
-                enc.append({
-                    "@type": "MediaObject",
-                    "contentUrl": epub_link,
-                    "encodingFormat": "application/epub+zip",
-                })
-            article_ld = {
-                "@context": "https://schema.org",
-                "@type": "Article",
-                "headline": it["title"],
-                "author": authors_ld or [{"@type": "Person", "name": "Unknown"}],
-                "datePublished": iso_date_str(it["date"]),
-                "isPartOf": {"@type": "Periodical", "name": PREFERRED_JOURNAL},
-                "url": version_url,
-            }
-            if enc:
-                article_ld["encoding"] = enc
-            if it["doi"] and not _is_pending_doi(it["doi"]):
-                article_ld["sameAs"] = [f"https://doi.org/{it['doi'].split('/')[-1]}"]
-            head.append(
-                '<script type="application/ld+json">'
-                + json.dumps(article_ld, ensure_ascii=False)
-                + "</script>"
-            )
-            head_extra = "\n".join(head) + "\n"
-            body_html = "\n".join(body)
-
-            write_html(out_dir/"index.html", body_html, head_extra=head_extra, title=it["title"])
-            article_dirs.add(out_dir)
-
-            # DOI aliases live under the same top-level plus a root /doi/ alias.
-            alias_dir = OUT / top / "doi" / it["doi_prefix"] / it["doi_suffix"]
-            alias_dir.mkdir(parents=True, exist_ok=True)
-            write_html(alias_dir/"index.html", body_html, head_extra=head_extra, title=it["title"])
-            article_dirs.add(alias_dir)
-
-            root_alias_dir = OUT / "doi" / it["doi_prefix"] / it["doi_suffix"]
-            root_alias_dir.mkdir(parents=True, exist_ok=True)
-            write_html(root_alias_dir/"index.html", body_html, head_extra=head_extra, title=it["title"])
-            article_dirs.add(root_alias_dir)
-
-            mirror_dir = OUT / rel(src)
-            mirror_dir.mkdir(parents=True, exist_ok=True)
-            write_html(mirror_dir/"index.html", body_html, head_extra=head_extra, title=it["title"])
-            article_dirs.add(mirror_dir)
-
-        # --- STEM page (latest) ---
-        it = latest
-        src = it["prov"].parent
-        stem_out = OUT / top / stem
-        stem_out.mkdir(parents=True, exist_ok=True)
-
-        for f in src.iterdir():
-            if not f.is_file():
-                continue
-            if f.suffix.lower() in SKIP_COPY_EXTS:
-                continue
-            if f.suffix.lower() in MIRROR_EXTS:
-                dst = OUT / rel(f)
-                copy_if_changed(f, dst)
-
-        local_md   = f"/{(OUT/rel(src/it['md_name'])).relative_to(OUT).as_posix()}" if it["md_name"] else None
-        local_html = f"/{(OUT/rel(src/it['html_name'])).relative_to(OUT).as_posix()}" if it["html_name"] else None
-        local_embed = _local_artifact_url(src, it.get("embed_name")) if it.get("embed_name") else ""
-        embed_link = it.get("embed_url") or local_embed or ""
-        pdf_link = it.get("assets_pdf") or ""
-        local_epub = _local_artifact_url(src, it.get("epub_name")) if it.get("epub_name") else ""
-        epub_link = it.get("assets_epub") or local_epub or ""
+def _link_article_group(node: str, group_dirs: list[Path], versions: list[ProvenanceRecord]) -> None:
+    for d in group_dirs:
+        GRAPH.add_edge(node, _index_node(d.parent))
+        _link_index_ancestors(d.parent)
+    GRAPH.add_edge(node, "sitemap")
+    GRAPH.add_edge(node, "rss")
+    for it in versions:
+        if it.html_name:
+            html_rel = rel(it.prov.parent / it.html_name).as_posix()
+            GRAPH.add_edge(f"out:{html_rel}", "rss")
+
+def _link_feed_sources() -> None:
+    """
+    provenance:<path> -> rss for every record _feed_records() reads, marked
+    when the record or the HTML its full-text entry embeds changed. Article
+    groups link only versioned records; unversioned ones feed rss.xml too.
+    """
+    if GRAPH is None:
+        return
+    for r in provenance_catalog():
+        node = f"provenance:{rel(r.prov).as_posix()}"
+        inputs = [r.prov]
+        if r.html_name:
+            inputs.append(r.prov.parent / r.html_name)
+        signature = MANIFEST.input_key("provenance", inputs)
+        GRAPH.add_edge(node, "rss")
+        if MANIFEST.node_signature(node) != signature:
+            MANIFEST.set_node_signature(node, signature)
+            GRAPH.mark(node)
+
+def _render_article_group(
+    origin: str, top: str, stem: str, versions: list[ProvenanceRecord]
+) -> list[Path]:
+    """
+    Write every page of one (top, stem) group: each version page, rendered
+    once and then placed at its DOI aliases (see _write_doi_aliases), plus the
+    stem page. Reads only its arguments and PREFERRED_JOURNAL / PAGE_STAMP /
+    DOI_ALIAS_MODE, so it can run in a worker process. Returns the pages
+    written.
+    """
+    latest = versions[0]
+    pages: list[Path] = []
+
+    # --- each VERSION page ---
+    for it in versions:
+        src = it.prov.parent
+        out_dir = _version_dir(top, stem, it)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        local_md   = f"/{(OUT/rel(src/it.md_name)).relative_to(OUT).as_posix()}" if it.md_name else None
+        local_html = f"/{(OUT/rel(src/it.html_name)).relative_to(OUT).as_posix()}" if it.html_name else None
+        local_embed = _local_artifact_url(src, it.embed_name) if it.embed_name else ""
+        embed_link = it.embed_url or local_embed or ""
+        pdf_link = it.assets_pdf or ""
+        local_epub = _local_artifact_url(src, it.epub_name) if it.epub_name else ""
+        epub_link = it.assets_epub or local_epub or ""
 
         html_body = ""
-        if it["html_name"] and (src/it["html_name"]).exists():
+        if it.html_name and (src/it.html_name).exists():
             try:
-                htxt = (src/it["html_name"]).read_text(encoding="utf-8")
+                htxt = (src/it.html_name).read_text(encoding="utf-8")
                 html_body = extract_html_body(htxt)
             except Exception:
                 html_body = ""
 
-        breadcrumbs = crumb_link([top, stem])
-
-        # Only treat records with the SAME concept DOI as versions
-        same_family = []
-        for v in versions:
-            if it["concept"] and v["concept"] == it["concept"]:
-                same_family.append(v)
-            elif not it["concept"] and not v["concept"]:
-                same_family.append(v)
-
-        stem_seg = quote(stem, safe="")
-        versions_list = []
-        for v in same_family:
-            ver_url = f"/{top}/{stem_seg}/{v['doi_prefix']}/{v['doi_suffix']}/"
-            doi_disp = f"{v['doi_prefix']}/{v['doi_suffix']}"
-            date_disp = v["date"] or ""
-            versions_list.append(f"<li>{date_disp} — <a href=\"{ver_url}\">{doi_disp}</a></li>")
-        versions_ul = "<ul>" + "".join(versions_list) + "</ul>" if versions_list else ""
-
         local_md_html = f"{local_md}.html" if local_md else ""
-
         link_items = []
         if local_html:
             link_items.append(("HTML", local_html))
@@ -1432,13 +1667,20 @@ def build_article_pages() -> set[Path]:
         if epub_link:
             link_items.append(("EPUB", epub_link))
 
+        same_family = []
+        for v in versions:
+            if it.concept and v.concept == it.concept:
+                same_family.append(v)
+            elif not it.concept and not v.concept:
+                same_family.append(v)
+
         share_lines = _share_lines_versions(
             origin=origin,
             top=top,
             stem=stem,
             versions=same_family,
             latest=latest,
-            current=None,
+            current=it,
         )
         share_html = (
             "<div class=\"share\"><strong>Share as:</strong><br>"
@@ -1457,31 +1699,41 @@ def build_article_pages() -> set[Path]:
                 + "</ul>"
             )
 
-        display_authors = it["authors"]
+        breadcrumbs = crumb_link([top, stem, it.doi_prefix, it.doi_suffix])
+        stem_seg = quote(stem, safe="")
+        versions_list = []
+        for v in same_family:
+            ver_url = f"/{top}/{stem_seg}/{v.doi_prefix}/{v.doi_suffix}/"
+            doi_disp = f"{v.doi_prefix}/{v.doi_suffix}"
+            date_disp = v.date or ""
+            versions_list.append(f"<li>{date_disp} — <a href=\"{ver_url}\">{doi_disp}</a></li>")
+        versions_ul = "<ul>" + "".join(versions_list) + "</ul>" if versions_list else ""
+        display_authors = it.authors
         authors_html = ", ".join(filter(None, (fmt_author(a) for a in display_authors)))
 
         body = []
         body.append(breadcrumbs)
         body.append("<main class='paper'>")
-        body.append(f"<h1>{it['title']}</h1>")
+        body.append(f"<h1>{it.title}</h1>")
         if authors_html:
             body.append(f"<p class='authors'>{authors_html}</p>")
-        body.append(f"<p class='publine'>{PREFERRED_JOURNAL} — {month_year(it['date'])}</p>")
-        if it["onesent"]:
+        body.append(f"<p class='publine'>{PREFERRED_JOURNAL} — {month_year(it.date)}</p>")
+        if it.onesent:
             body.append("<h2>One-Sentence Summary</h2>")
-            body.append(f"<p>{it['onesent']}</p>")
+            body.append(f"<p>{it.onesent}</p>")
 
-        if it["abstract"]:
+        if it.abstract:
             body.append("<h2>Summary</h2>")
-            body.append(f"<p>{it['abstract']}</p>")
+            body.append(f"<p>{it.abstract}</p>")
 
-        if it["kws"]:
+        if it.kws:
             body.append("<h2>Keywords</h2>")
             body.append(
                 "<ul class='keywords'>"
-                + "".join(f"<li>{k}</li>" for k in it["kws"])
+                + "".join(f"<li>{k}</li>" for k in it.kws)
                 + "</ul>"
             )
+
         if share_html or versions_ul or links_html:
             body.append("<h2>Version</h2>" if len(same_family) <= 1 else "<h2>Versions</h2>")
             if share_html:
@@ -1490,37 +1742,39 @@ def build_article_pages() -> set[Path]:
                 body.append(versions_ul)
             if links_html:
                 body.append(links_html)
+
         body.append("</main>")
 
-        stem_url = f"{origin}/{top}/{stem_seg}/"
+        version_url = f"{origin}/{top}/{stem_seg}/{it.doi_prefix}/{it.doi_suffix}/"
+
         head = []
         head.append('<meta charset="utf-8">')
-        head.append(f'<link rel="canonical" href="{stem_url}">')
+        head.append(f'<link rel="canonical" href="{version_url}">')
         if pdf_link:
             head.append(f'<link rel="alternate" type="application/pdf" href="{pdf_link}">')
         if epub_link:
             head.append(f'<link rel="alternate" type="application/epub+zip" href="{epub_link}">')
         head.append('<meta name="robots" content="index,follow">')
-        if it["title"]:
-            head.append(f'<meta name="citation_title" content="{it["title"]}">')
+        if it.title:
+            head.append(f'<meta name="citation_title" content="{it.title}">')
         for a in display_authors:
             nm = a.get("name", "")
             if nm:
                 head.append(f'<meta name="citation_author" content="{nm}">')
-        if it["date"]:
-            head.append(f'<meta name="citation_publication_date" content="{scholar_date(it["date"])}">')
+        if it.date:
+            head.append(f'<meta name="citation_publication_date" content="{scholar_date(it.date)}">')
         head.append(f'<meta name="citation_journal_title" content="{PREFERRED_JOURNAL}">')
         if pdf_link:
             head.append(f'<meta name="citation_pdf_url" content="{pdf_link}">')
-        if it["doi"] and not _is_pending_doi(it["doi"]):
-            head.append(f'<meta name="citation_doi" content="{it["doi"]}">')
-        desc = it["abstract"] or it["onesent"] or it["title"]
+        if it.doi and not _is_pending_doi(it.doi):
+            head.append(f'<meta name="citation_doi" content="{it.doi}">')
+        desc = it.abstract or it.onesent or it.title
         if desc:
             head.append(f'<meta name="description" content="{desc}">')
             head.append(f'<meta property="og:description" content="{desc}">')
         head.append('<meta property="og:type" content="article">')
-        head.append(f'<meta property="og:title" content="{it["title"]}">')
-        head.append(f'<meta property="og:url" content="{stem_url}">')
+        head.append(f'<meta property="og:title" content="{it.title}">')
+        head.append(f'<meta property="og:url" content="{version_url}">')
 
         authors_ld = []
         for a in display_authors:
@@ -1548,25 +1802,315 @@ def build_article_pages() -> set[Path]:
         article_ld = {
             "@context": "https://schema.org",
             "@type": "Article",
-            "headline": it["title"],
+            "headline": it.title,
             "author": authors_ld or [{"@type": "Person", "name": "Unknown"}],
-            "datePublished": iso_date_str(it["date"]),
+            "datePublished": iso_date_str(it.date),
             "isPartOf": {"@type": "Periodical", "name": PREFERRED_JOURNAL},
-            "url": stem_url,
+            "url": version_url,
         }
         if enc:
             article_ld["encoding"] = enc
-        if it["doi"] and not _is_pending_doi(it["doi"]):
-            article_ld["sameAs"] = [f"https://doi.org/{it['doi'].split('/')[-1]}"]
+        if it.doi and not _is_pending_doi(it.doi):
+            article_ld["sameAs"] = [f"https://doi.org/{it.doi.split('/')[-1]}"]
         head.append(
             '<script type="application/ld+json">'
             + json.dumps(article_ld, ensure_ascii=False)
             + "</script>"
         )
         head_extra = "\n".join(head) + "\n"
+        body_html = "\n".join(body)
+
+        doc = render_html(out_dir/"index.html", body_html, head_extra=head_extra, title=it.title)
+        write_if_changed(out_dir/"index.html", doc)
+        pages.append(out_dir/"index.html")
+
+        # DOI aliases (same top-level, root /doi/, source mirror) reuse the page.
+        pages.extend(_write_doi_aliases(
+            out_dir/"index.html", _doi_alias_dirs(top, stem, it), doc, version_url, it.title,
+        ))
+
+
+    # --- STEM page (latest) ---
+    it = latest
+    src = it.prov.parent
+    stem_out = OUT / top / stem
+    stem_out.mkdir(parents=True, exist_ok=True)
+
+    local_md   = f"/{(OUT/rel(src/it.md_name)).relative_to(OUT).as_posix()}" if it.md_name else None
+    local_html = f"/{(OUT/rel(src/it.html_name)).relative_to(OUT).as_posix()}" if it.html_name else None
+    local_embed = _local_artifact_url(src, it.embed_name) if it.embed_name else ""
+    embed_link = it.embed_url or local_embed or ""
+    pdf_link = it.assets_pdf or ""
+    local_epub = _local_artifact_url(src, it.epub_name) if it.epub_name else ""
+    epub_link = it.assets_epub or local_epub or ""
+
+    html_body = ""
+    if it.html_name and (src/it.html_name).exists():
+        try:
+            htxt = (src/it.html_name).read_text(encoding="utf-8")
+            html_body = extract_html_body(htxt)
+        except Exception:
+            html_body = ""
+
+    breadcrumbs = crumb_link([top, stem])
+
+    # Only treat records with the SAME concept DOI as versions
+    same_family = []
+    for v in versions:
+        if it.concept and v.concept == it.concept:
+            same_family.append(v)
+        elif not it.concept and not v.concept:
+            same_family.append(v)
+
+    stem_seg = quote(stem, safe="")
+    versions_list = []
+    for v in same_family:
+        ver_url = f"/{top}/{stem_seg}/{v.doi_prefix}/{v.doi_suffix}/"
+        doi_disp = f"{v.doi_prefix}/{v.doi_suffix}"
+        date_disp = v.date or ""
+        versions_list.append(f"<li>{date_disp} — <a href=\"{ver_url}\">{doi_disp}</a></li>")
+    versions_ul = "<ul>" + "".join(versions_list) + "</ul>" if versions_list else ""
+
+    local_md_html = f"{local_md}.html" if local_md else ""
+
+    link_items = []
+    if local_html:
+        link_items.append(("HTML", local_html))
+    if embed_link:
+        link_items.append(("HTML Embed", embed_link))
+    if local_md_html:
+        link_items.append(("MD.HTML", local_md_html))
+    if local_md:
+        link_items.append(("MD (raw)", local_md))
+    if pdf_link:
+        link_items.append(("PDF", pdf_link))
+    if epub_link:
+        link_items.append(("EPUB", epub_link))
+
+    share_lines = _share_lines_versions(
+        origin=origin,
+        top=top,
+        stem=stem,
+        versions=same_family,
+        latest=latest,
+        current=None,
+    )
+    share_html = (
+        "<div class=\"share\"><strong>Share as:</strong><br>"
+        + "<br>".join(share_lines)
+        + "</div>"
+    )
+    links_html = ""
+    if link_items:
+        links_html = (
+            "<p class=\"links\"><strong>Latest:</strong></p>"
+            + "<ul class=\"links\">"
+            + "".join(
+                f'<li><a href="{href}">{label}</a></li>'
+                for label, href in link_items
+            )
+            + "</ul>"
+        )
+
+    display_authors = it.authors
+    authors_html = ", ".join(filter(None, (fmt_author(a) for a in display_authors)))
+
+    body = []
+    body.append(breadcrumbs)
+    body.append("<main class='paper'>")
+    body.append(f"<h1>{it.title}</h1>")
+    if authors_html:
+        body.append(f"<p class='authors'>{authors_html}</p>")
+    body.append(f"<p class='publine'>{PREFERRED_JOURNAL} — {month_year(it.date)}</p>")
+    if it.onesent:
+        body.append("<h2>One-Sentence Summary</h2>")
+        body.append(f"<p>{it.onesent}</p>")
+
+    if it.abstract:
+        body.append("<h2>Summary</h2>")
+        body.append(f"<p>{it.abstract}</p>")
+
+    if it.kws:
+        body.append("<h2>Keywords</h2>")
+        body.append(
+            "<ul class='keywords'>"
+            + "".join(f"<li>{k}</li>" for k in it.kws)
+            + "</ul>"
+        )
+    if share_html or versions_ul or links_html:
+        body.append("<h2>Version</h2>" if len(same_family) <= 1 else "<h2>Versions</h2>")
+        if share_html:
+            body.append(share_html)
+        if versions_ul:
+            body.append(versions_ul)
+        if links_html:
+            body.append(links_html)
+    body.append("</main>")
+
+    stem_url = f"{origin}/{top}/{stem_seg}/"
+    head = []
+    head.append('<meta charset="utf-8">')
+    head.append(f'<link rel="canonical" href="{stem_url}">')
+    if pdf_link:
+        head.append(f'<link rel="alternate" type="application/pdf" href="{pdf_link}">')
+    if epub_link:
+        head.append(f'<link rel="alternate" type="application/epub+zip" href="{epub_link}">')
+    head.append('<meta name="robots" content="index,follow">')
+    if it.title:
+        head.append(f'<meta name="citation_title" content="{it.title}">')
+    for a in display_authors:
+        nm = a.get("name", "")
+        if nm:
+            head.append(f'<meta name="citation_author" content="{nm}">')
+    if it.date:
+        head.append(f'<meta name="citation_publication_date" content="{scholar_date(it.date)}">')
+    head.append(f'<meta name="citation_journal_title" content="{PREFERRED_JOURNAL}">')
+    if pdf_link:
+        head.append(f'<meta name="citation_pdf_url" content="{pdf_link}">')
+    if it.doi and not _is_pending_doi(it.doi):
+        head.append(f'<meta name="citation_doi" content="{it.doi}">')
+    desc = it.abstract or it.onesent or it.title
+    if desc:
+        head.append(f'<meta name="description" content="{desc}">')
+        head.append(f'<meta property="og:description" content="{desc}">')
+    head.append('<meta property="og:type" content="article">')
+    head.append(f'<meta property="og:title" content="{it.title}">')
+    head.append(f'<meta property="og:url" content="{stem_url}">')
+
+    authors_ld = []
+    for a in display_authors:
+        nm = a.get("name", "").strip()
+        oc = _orcid_url(a.get("orcid", "").strip())
+        if not nm:
+            continue
+        ent = {"@type": "Person", "name": nm}
+        if oc:
+            ent["sameAs"] = [oc]
+        authors_ld.append(ent)
+    enc = []
+    if pdf_link:
+        enc.append({
+            "@type": "MediaObject",
+            "contentUrl": pdf_link,
+            "encodingFormat": "application/pdf",
+        })
+    if epub_link:
+        enc.append({
+            "@type": "MediaObject",
+            "contentUrl": epub_link,
+            "encodingFormat": "application/epub+zip",
+        })
+    article_ld = {
+        "@context": "https://schema.org",
+        "@type": "Article",
+        "headline": it.title,
+        "author": authors_ld or [{"@type": "Person", "name": "Unknown"}],
+        "datePublished": iso_date_str(it.date),
+        "isPartOf": {"@type": "Periodical", "name": PREFERRED_JOURNAL},
+        "url": stem_url,
+    }
+    if enc:
+        article_ld["encoding"] = enc
+    if it.doi and not _is_pending_doi(it.doi):
+        article_ld["sameAs"] = [f"https://doi.org/{it.doi.split('/')[-1]}"]
+    head.append(
+        '<script type="application/ld+json">'
+        + json.dumps(article_ld, ensure_ascii=False)
+        + "</script>"
+    )
+    head_extra = "\n".join(head) + "\n"
+
+    write_html(stem_out/"index.html", "\n".join(body), head_extra=head_extra, title=it.title)
+
+    pages.append(stem_out/"index.html")
+    return pages
+
+def _init_article_worker(journal: str, page_stamp: str, alias_mode: str) -> None:
+    """Process-pool initializer: the state a worker needs, passed explicitly."""
+    global PREFERRED_JOURNAL, PAGE_STAMP, DOI_ALIAS_MODE, MANIFEST, GRAPH, YAML_CACHE
+    PREFERRED_JOURNAL = journal
+    PAGE_STAMP = page_stamp
+    DOI_ALIAS_MODE = alias_mode
+    # the parent owns the manifest and graph; written pages are reported back
+    MANIFEST = GRAPH = YAML_CACHE = None
+
+def _article_worker(job: tuple) -> tuple[list[Path], dict[str, int]]:
+    before = dict(WRITE_STATS)
+    pages = _render_article_group(*job)
+    return pages, {k: n - before.get(k, 0) for k, n in WRITE_STATS.items()}
+
+def build_article_pages() -> set[Path]:
+    origin = _current_origin()
+    article_dirs: set[Path] = set()
+    jobs: list[tuple[str, tuple, str | None]] = []
+    groups: list[tuple[str, str, list[ProvenanceRecord]]] = []
+
+    for (top, stem), items in iter_article_groups():
+        def sort_key(it):
+            dt = _to_datetime(it.date) or it.mtime
+            doi_num = _doi_suffix_number(it.doi_suffix)
+            return (dt, doi_num, it.doi_suffix, it.mtime)
+
+        versions = sorted(items, key=sort_key, reverse=True)
+        groups.append((top, stem, versions))
+
+        group_node = f"article:{top}/{stem}"
+        group_dirs = _article_group_dirs(top, stem, versions)
+        # alias dirs stay article dirs (no listing there) even without a page
+        article_dirs.update(group_dirs)
+        page_dirs = _article_group_dirs(top, stem, versions, aliases=DOI_ALIAS_MODE != "redirects")
+        for d in page_dirs:
+            _track_output(d / "index.html")
+        signature = _article_group_signature(versions)
+        stale = (
+            signature is None
+            or MANIFEST.node_signature(group_node) != signature
+            or not all((d / "index.html").exists() for d in page_dirs)
+        )
+        if GRAPH is not None:
+            _link_article_group(group_node, group_dirs, versions)
+            if stale:
+                GRAPH.mark(group_node)
 
-        write_html(stem_out/"index.html", "\n".join(body), head_extra=head_extra, title=it["title"])
-        article_dirs.add(stem_out)
+        # Mirror assets and all rendered outputs of every version dir (the
+        # latest version's dir also backs the stem page).
+        for it in versions:
+            for f in it.prov.parent.iterdir():
+                if not f.is_file():
+                    continue
+                if f.suffix.lower() in SKIP_COPY_EXTS:
+                    continue
+                if f.suffix.lower() in MIRROR_EXTS or f.name.endswith(".md.html"):
+                    copy_if_changed(f, OUT / rel(f))
+
+        if stale:
+            jobs.append((group_node, (origin, top, stem, versions), signature))
+
+    def done(group_node: str, signature: str | None, pages: list[Path]) -> None:
+        for page in pages:
+            _note_output(page)
+        if signature:
+            MANIFEST.set_node_signature(group_node, signature)
+
+    write_redirects_map(groups)
+
+    workers = min(ARTICLE_WORKERS, len(jobs))
+    if workers <= 1:
+        for group_node, job, signature in jobs:
+            done(group_node, signature, _render_article_group(*job))
+        return article_dirs
+
+    print(f"[DEBUG] rendering {len(jobs)} article group(s) with {workers} processes")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_article_worker,
+        initargs=(PREFERRED_JOURNAL, PAGE_STAMP, DOI_ALIAS_MODE),
+    ) as pool:
+        results = pool.map(_article_worker, [job for _, job, _ in jobs])
+        for (group_node, _, signature), (pages, stats) in zip(jobs, results):
+            for k, n in stats.items():
+                WRITE_STATS[k] += n
+            done(group_node, signature, pages)
 
     return article_dirs
 
@@ -1581,8 +2125,9 @@ def breadcrumbs(rel_dir: Path) -> str:
     return " ".join(items)
 
 def _fmt_dir_index_ts(ts: float) -> str:
+    """Listing timestamp in UTC, as dir-index.js formats it."""
     try:
-        return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+        return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
     except Exception:
         return ""
 
@@ -1601,6 +2146,74 @@ def _sort_dir_index_items(items: list[Item], sort_key: str, sort_dir: str) -> li
 
     return sorted(items, key=key_fn, reverse=reverse)
 
+# Re-sorts index listings client-side from index.json (copied by copy_static()).
+DIR_INDEX_SCRIPT = '<script src="/dir-index.js" defer></script>\n'
+# Entries per directory index page / index.json chunk (see --index-page-size).
+INDEX_PAGE_SIZE = 500
+_INDEX_PAGE_RE = re.compile(r"^index\.p\d+\.(?:html|json)$")
+
+def _dir_index_page_name(page: int, ext: str) -> str:
+    """index.<ext> for the first page of a listing, index.p<N>.<ext> after it."""
+    return f"index.{ext}" if page == 1 else f"index.p{page}.{ext}"
+
+def _dir_index_alias_name(sort_key: str) -> str:
+    """Pre-sorted index page name of older builds, now a stub (see _write_out_index)."""
+    return "index.md.html" if sort_key == "name" else f"index.{sort_key}.md.html"
+
+def _dir_index_entry(it: Item, rel_dir: Path, *, use_root_links: bool) -> dict:
+    """One listing entry, as index.json carries it and the page renders it."""
+    entry: dict = {"name": it.name, "is_dir": it.is_dir, "mtime": int(it.mtime)}
+    if it.is_dir:
+        href_rel = rel(it.path) if use_root_links else rel_out(it.path)
+        href = (it.name + "/") if rel_dir.parts else (href_rel.as_posix() + "/")
+        entry["href"] = quote(href, safe="/:@-._~")
+        return entry
+
+    entry["size"] = it.size
+    p_rel = rel(it.path) if use_root_links else rel_out(it.path)
+    ext = it.path.suffix.lower()
+
+    if ext in MD_EXTS:
+        # rendered file lives at: OUT / <p_rel>.html
+        rendered = (OUT / p_rel).with_suffix(p_rel.suffix + ".html")
+        mirrored = OUT / p_rel
+        rel_url = rel_out(mirrored).as_posix()
+        url_local_raw = "/" + quote(rel_url, safe="/:@-._~")
+        # assume it exists; if it doesn't, that's a build bug
+        rel_rendered = rel_out(rendered).as_posix()
+        entry["href"] = "/" + quote(rel_rendered, safe="/:@-._~")
+
+        links = {"Raw": url_local_raw}
+        gh_path = quote(p_rel.as_posix(), safe="/:@-._~")
+        if use_root_links and (ROOT / p_rel).exists():
+            links["GH"] = f"https://github.com/{OWNER}/{REPO}/blob/{BRANCH}/{gh_path}"
+        entry["links"] = links
+    else:
+        mirrored = OUT / p_rel
+        if mirrored.exists():
+            rel_url = rel_out(mirrored).as_posix()
+            entry["href"] = "/" + quote(rel_url, safe="/:@-._~")
+        # else: file exists in repo but wasn't mirrored (should not happen)
+    return entry
+
+def _dir_index_row(entry: dict, mtime: float) -> str:
+    """One line of the <pre> listing; dir-index.js renders the same from index.json."""
+    name = html.escape(entry["name"])
+    href = entry.get("href")
+    if entry["is_dir"]:
+        name_html = f'📂 <a href="{html.escape(href, quote=True)}">{name}/</a>'
+    elif href:
+        name_html = f'<a href="{html.escape(href, quote=True)}">📄 {name}</a>'
+        links = entry.get("links")
+        if links:
+            name_html += " (" + ", ".join(
+                f'<a href="{html.escape(url, quote=True)}">{html.escape(label)}</a>'
+                for label, url in links.items()
+            ) + ")"
+    else:
+        name_html = f"📄 {name}"
+    return f"{html.escape(_fmt_dir_index_ts(mtime)).ljust(16)}  {name_html}"
+
 def _format_dir_index_common(
     rel_dir: Path,
     items: list[Item],
@@ -1608,11 +2221,18 @@ def _format_dir_index_common(
     use_root_links: bool,
     sort_key: str = "name",
     sort_dir: str = "asc",
-) -> tuple[str, str]:
+    data_url: str = "",
+    page: int = 1,
+    page_size: int = 0,
+) -> tuple[str, str, list[dict]]:
     """
-    Shared index formatter.
+    Shared index formatter. Returns (title, page body, index.json entries).
 
     use_root_links=False => paths are relative to OUT (mirrored tree).
+    data_url, when set, is where the page finds its index.json to re-sort
+    the listing client-side (see dir-index.js). page_size > 0 limits the
+    body and entries to that slice of the sorted listing, with links to the
+    neighbouring pages (index.html, index.p2.html, ...).
     """
     title = (rel_dir.name or f"{REPO} index")
 
@@ -1621,11 +2241,11 @@ def _format_dir_index_common(
     lines.append("")
 
     sort_links = []
-    for key, label, _default_dir in DIR_INDEX_SORTS:
-        href = "index.md.html" if key == "name" else f"index.{key}.md.html"
+    for key, label, default_dir in DIR_INDEX_SORTS:
         cls = " class=\"is-active\"" if key == sort_key else ""
         sort_links.append(
-            f'<a href="{href}#sort={key}" data-sort-link="{key}"{cls}>{html.escape(label)}</a>'
+            f'<a href="index.html#sort={key}" data-sort-link="{key}" '
+            f'data-dir="{default_dir}"{cls}>{html.escape(label)}</a>'
         )
     lines.append(
         "<div class=\"dir-index-controls\">Sort: "
@@ -1635,90 +2255,39 @@ def _format_dir_index_common(
     lines.append("")
 
     items_sorted = _sort_dir_index_items(items, sort_key, sort_dir)
+    pages = max(1, -(-len(items_sorted) // page_size)) if page_size > 0 else 1
+    if pages > 1:
+        items_sorted = items_sorted[(page - 1) * page_size:page * page_size]
+        nav = []
+        if page > 1:
+            nav.append(f'<a href="{_dir_index_page_name(page - 1, "html")}" rel="prev">← prev</a>')
+        if page < pages:
+            nav.append(f'<a href="{_dir_index_page_name(page + 1, "html")}" rel="next">next →</a>')
+        lines.append(
+            f'<div class="dir-index-pager">Page {page} of {pages}: '
+            + " | ".join(nav)
+            + "</div>"
+        )
+        lines.append("")
+    entries = [_dir_index_entry(it, rel_dir, use_root_links=use_root_links) for it in items_sorted]
 
     date_width = 16
     gap = "  "
-
-    def pad_date(val: str) -> str:
-        return (val or "").ljust(date_width)
-
     table_lines = []
-    table_lines.append(
-        f"{pad_date('Modified')}{gap}Name"
-    )
-    table_lines.append(
-        f"{'-'*date_width}{gap}{'-'*4}"
-    )
-
-    for it in items_sorted:
-        modified_disp = _fmt_dir_index_ts(it.mtime)
-
-        if it.is_dir:
-            href_rel = rel(it.path) if use_root_links else rel_out(it.path)
-            href = (it.name + "/") if rel_dir.parts else (href_rel.as_posix() + "/")
-            href = quote(href, safe="/:@-._~")
-            name_html = (
-                f'📂 <a href="{html.escape(href, quote=True)}">'
-                f'{html.escape(it.name)}/</a>'
-            )
-        else:
-            p_rel = rel(it.path) if use_root_links else rel_out(it.path)
-            ext = it.path.suffix.lower()
-
-            if ext in MD_EXTS:
-                # rendered file lives at: OUT / <p_rel>.html
-                rendered = (OUT / p_rel).with_suffix(p_rel.suffix + ".html")
-                mirrored = OUT / p_rel
-                rel_url = rel_out(mirrored).as_posix()
-                url_local_raw = "/" + quote(rel_url, safe="/:@-._~")
-                # assume it exists; if it doesn't, that's a build bug
-                rel_rendered = rel_out(rendered).as_posix()
-                url_local = "/" + quote(rel_rendered, safe="/:@-._~")
-
-                gh_path = quote(p_rel.as_posix(), safe="/:@-._~")
-                gh_url = None
-                if use_root_links and (ROOT / p_rel).exists():
-                    gh_url = (
-                        f"https://github.com/{OWNER}/{REPO}/blob/"
-                        f"{BRANCH}/{gh_path}"
-                    )
-
-                extra = [f'<a href="{html.escape(url_local_raw, quote=True)}">Raw</a>']
-                if gh_url:
-                    extra.append(f'<a href="{html.escape(gh_url, quote=True)}">GH</a>')
-                extra_html = ""
-                if extra:
-                    extra_html = " (" + ", ".join(extra) + ")"
-
-                name_html = (
-                    f'<a href="{html.escape(url_local, quote=True)}">'
-                    f'📄 {html.escape(it.name)}</a>'
-                    f"{extra_html}"
-                )
-            else:
-                mirrored = OUT / p_rel
-                if mirrored.exists():
-                    rel_url = rel_out(mirrored).as_posix()
-                    url_local = "/" + quote(rel_url, safe="/:@-._~")
-                    name_html = (
-                        f'<a href="{html.escape(url_local, quote=True)}">'
-                        f'📄 {html.escape(it.name)}</a>'
-                    )
-                else:
-                    # file exists in repo but wasn't mirrored (should not happen)
-                    name_html = f"📄 {html.escape(it.name)}"
-
-        table_lines.append(
-            f"{pad_date(html.escape(modified_disp))}"
-            f"{gap}{name_html}"
-        )
-
+    table_lines.append(f"{'Modified'.ljust(date_width)}{gap}Name")
+    table_lines.append(f"{'-'*date_width}{gap}{'-'*4}")
+    for it, entry in zip(items_sorted, entries):
+        table_lines.append(_dir_index_row(entry, it.mtime))
+
+    data_attr = f' data-index="{html.escape(data_url, quote=True)}"' if data_url else ""
+    if data_url and page_size > 0:
+        data_attr += f' data-page="{page}" data-page-size="{page_size}"'
     lines.append(
-        f'<pre class="dir-index-table" data-sort="{sort_key}" data-dir="{sort_dir}">'
+        f'<pre class="dir-index-table" data-sort="{sort_key}" data-dir="{sort_dir}"{data_attr}>'
     )
     lines.extend(table_lines)
     lines.append("</pre>")
-    return title, "\n".join(lines)
+    return title, "\n".join(lines), entries
 
 def format_dir_index(
     dir_abs: Path,
@@ -1727,28 +2296,45 @@ def format_dir_index(
     sort_dir: str = "asc",
 ) -> tuple[str, str]:
     rel_dir = rel(dir_abs) if dir_abs != ROOT else Path()
-    return _format_dir_index_common(
+    title, body, _entries = _format_dir_index_common(
         rel_dir,
         items,
         use_root_links=True,
         sort_key=sort_key,
         sort_dir=sort_dir,
     )
+    return title, body
 
-def format_dir_index_out(
-    dir_abs: Path,
-    items: list[Item],
-    sort_key: str = "name",
-    sort_dir: str = "asc",
-) -> tuple[str, str]:
+def format_dir_index_out(dir_abs: Path, items: list[Item]) -> tuple[str, list[tuple[str, str]]]:
+    """
+    (title, [(page body, index.json chunk text), ...]) for an OUT directory,
+    sorted by name and split into INDEX_PAGE_SIZE pages. The first chunk
+    (index.json) also lists every chunk, so a client can load them all.
+    """
     rel_dir = rel_out(dir_abs) if dir_abs != OUT else Path()
-    return _format_dir_index_common(
-        rel_dir,
-        items,
-        use_root_links=False,
-        sort_key=sort_key,
-        sort_dir=sort_dir,
-    )
+    key, _label, default_dir = DIR_INDEX_SORTS[0]
+    size = INDEX_PAGE_SIZE
+    pages = max(1, -(-len(items) // size)) if size else 1
+    data_url = _out_url_path(dir_abs) + "index.json"
+    title = ""
+    out = []
+    for page in range(1, pages + 1):
+        title, body, entries = _format_dir_index_common(
+            rel_dir,
+            items,
+            use_root_links=False,
+            sort_key=key,
+            sort_dir=default_dir,
+            data_url=data_url,
+            page=page,
+            page_size=size if pages > 1 else 0,
+        )
+        listing = {"dir": rel_dir.as_posix() if rel_dir.parts else "", "entries": entries}
+        if page == 1 and pages > 1:
+            listing["count"] = len(items)
+            listing["chunks"] = [_dir_index_page_name(n, "json") for n in range(1, pages + 1)]
+        out.append((body, json.dumps(listing, ensure_ascii=False, separators=(",", ":"))))
+    return title, out
 
 def _book_artifact_hide_names(dir_abs: Path) -> set[str]:
     if not ((dir_abs / "book.yml").exists() or (dir_abs / "book.yaml").exists()):
@@ -1761,89 +2347,183 @@ def _book_artifact_hide_names(dir_abs: Path) -> set[str]:
         hidden.add(f"{base}.pandoc.md.html")
     return hidden
 
-def _index_is_article_page(dir_abs: Path) -> bool:
-    idx = dir_abs / "index.html"
-    if not idx.exists():
+def _out_dir_listing(
+    d: Path,
+    dirnames: list[str],
+    filenames: list[str],
+    hidden_stems: set[tuple[str, str]],
+) -> tuple[list[str], list[Item]]:
+    """
+    Filter one OUT directory's entries; returns (kept subdirs, index items).
+    Times are capped at SOURCE_DATE_EPOCH, like sitemap lastmod, so listings
+    of reproducible builds do not carry the build host's clock.
+    """
+    hide_names = _book_artifact_hide_names(d)
+    epoch = source_date_epoch()
+    cap = epoch.timestamp() if epoch else float("inf")
+    # prune hidden dirs
+    keep = []
+    for dd in list(dirnames):
+        if dd.startswith(".") and dd != ".well-known":
+            continue
+        child = d / dd
+        child_rel_parts = rel_out(child).parts
+        if len(child_rel_parts) >= 2 and (child_rel_parts[0], child_rel_parts[1]) in hidden_stems:
+            continue
+        if (child/"pyvenv.cfg").exists():
+            continue
+        keep.append(dd)
+
+    items: list[Item] = []
+    for sub in sorted([d/nn for nn in keep], key=lambda x: x.name.lower()):
+        try:
+            st = sub.stat()
+        except OSError:
+            continue
+        items.append(Item(
+            name=sub.name,
+            is_dir=True,
+            ctime=min(st.st_ctime, cap),
+            mtime=min(st.st_mtime, cap),
+            path=sub,
+        ))
+    for fname in sorted(filenames, key=lambda x: x.lower()):
+        if fname.startswith("."):
+            continue
+        p = d / fname
+        if p.name in EXCLUDE_NAMES or p in (BUILD_STAMP_FILE, REDIRECTS_FILE):
+            continue
+        if _INDEX_PAGE_RE.match(p.name):
+            continue
+        lower_name = p.name.lower()
+        if lower_name.endswith(".md.html") or lower_name.endswith(".markdown.html"):
+            continue
+        if p.name in hide_names:
+            continue
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        items.append(Item(
+            name=p.name,
+            is_dir=False,
+            ctime=min(st.st_ctime, cap),
+            mtime=min(st.st_mtime, cap),
+            path=p,
+            size=st.st_size,
+        ))
+    return keep, items
+
+def _out_dir_indexable(d: Path, hidden_stems: set[tuple[str, str]]) -> bool:
+    """Whether d gets an index (no hidden/venv/hidden-stem ancestor)."""
+    if not d.is_dir():
         return False
-    try:
-        html = idx.read_text(encoding="utf-8")
-    except Exception:
+    if d == OUT:
+        return True
+    parts = rel_out(d).parts
+    if len(parts) >= 2 and (parts[0], parts[1]) in hidden_stems:
         return False
-    return "<main class='paper'>" in html or '<main class="paper">' in html
+    for i, part in enumerate(parts):
+        if part.startswith(".") and part != ".well-known":
+            return False
+        if (OUT.joinpath(*parts[:i + 1]) / "pyvenv.cfg").exists():
+            return False
+    return True
 
-def build_out_indexes(hidden_stems: set[tuple[str, str]], article_dirs: set[Path] | None = None):
-    article_dirs = article_dirs or set()
-    for dirpath, dirnames, filenames in os.walk(OUT):
-        d = Path(dirpath)
-        rel_parts = rel_out(d).parts if d != OUT else ()
-        in_hidden = (
-            len(rel_parts) >= 2 and (rel_parts[0], rel_parts[1]) in hidden_stems
+def _write_out_index(d: Path, items: list[Item], base_key: str | None = None) -> bool:
+    """
+    Write d's index.html (sorted by name, re-sorted client-side), its
+    index.json, and a redirect stub at each pre-sorted page name older builds
+    published (index.md.html, index.<key>.md.html -> index.html#sort=<key>).
+    Listings longer than INDEX_PAGE_SIZE continue in index.p2.html /
+    index.p2.json and so on; pages left over from a longer listing are removed.
+    With base_key (see _index_key), a listing whose rendered pages and data
+    match the last build's is left alone (returns False).
+    """
+    title, pages = format_dir_index_out(d, items)
+    aliases = [d / _dir_index_alias_name(key) for key, _label, _dir in DIR_INDEX_SORTS]
+    outputs = []
+    for n in range(1, len(pages) + 1):
+        outputs += [d / _dir_index_page_name(n, "html"), d / _dir_index_page_name(n, "json")]
+
+    node = "listing:" + (rel_out(d).as_posix() if d != OUT else "")
+    signature = None
+    if base_key and MANIFEST:
+        h = hashlib.sha256(base_key.encode("utf-8"))
+        for part in (title, *itertools.chain.from_iterable(pages)):
+            h.update(b"\0")
+            h.update(part.encode("utf-8"))
+        signature = h.hexdigest()
+        if MANIFEST.node_signature(node) == signature and all(
+            p.exists() for p in (*outputs, *aliases)
+        ):
+            return False
+
+    for n, (md_body, chunk_json) in enumerate(pages, start=1):
+        write_md_like_page(
+            d / _dir_index_page_name(n, "html"), md_body, title=title,
+            escape_html=False, head_extra=DIR_INDEX_SCRIPT,
         )
-        hide_names = _book_artifact_hide_names(d)
-        # prune hidden dirs
-        keep = []
-        for dd in list(dirnames):
-            if dd.startswith(".") and dd != ".well-known":
-                continue
-            child = d / dd
-            child_rel_parts = rel_out(child).parts
-            if len(child_rel_parts) >= 2 and (child_rel_parts[0], child_rel_parts[1]) in hidden_stems:
-                continue
-            if (child/"pyvenv.cfg").exists():
-                continue
-            keep.append(dd)
-        dirnames[:] = keep
+        write_if_changed(d / _dir_index_page_name(n, "json"), chunk_json)
+        _track_output(d / _dir_index_page_name(n, "json"))
+    for stale in d.glob("index.p*.*"):
+        if _INDEX_PAGE_RE.match(stale.name) and stale not in outputs:
+            stale.unlink()
+            if OUTPUT_TREE is not None:
+                OUTPUT_TREE.discard(stale)
+    canonical = _current_origin() + _out_url_path(d)
+    for (key, _label, _dir), alias in zip(DIR_INDEX_SORTS, aliases):
+        target = "./" if key == DIR_INDEX_SORTS[0][0] else f"./#sort={key}"
+        write_if_changed(alias, _redirect_stub(target, title, canonical))
+        _track_output(alias)
+    if signature:
+        MANIFEST.set_node_signature(node, signature)
+    return True
 
-        items: list[Item] = []
-        for sub in sorted([d/nn for nn in dirnames], key=lambda x: x.name.lower()):
-            st = sub.stat()
-            items.append(Item(
-                name=sub.name,
-                is_dir=True,
-                ctime=st.st_ctime,
-                mtime=st.st_mtime,
-                path=sub,
-            ))
-        for fname in sorted(filenames, key=lambda x: x.lower()):
-            if fname.startswith("."):
-                continue
-            p = d / fname
-            if p.name in EXCLUDE_NAMES:
-                continue
-            lower_name = p.name.lower()
-            if lower_name.endswith(".md.html") or lower_name.endswith(".markdown.html"):
-                continue
-            if p.name in hide_names:
-                continue
-            st = p.stat()
-            items.append(Item(
-                name=p.name,
-                is_dir=False,
-                ctime=st.st_ctime,
-                mtime=st.st_mtime,
-                path=p,
-            ))
-
-        if in_hidden:
+def build_out_indexes(
+    hidden_stems: set[tuple[str, str]],
+    article_dirs: set[Path] | None = None,
+    only_dirs: set[Path] | None = None,
+):
+    """
+    Write directory indexes for OUT from OUTPUT_TREE (no walk of OUT).
+    only_dirs limits the rebuild to those directories (from the dependency
+    graph); None covers every directory in the tree. Article dirs keep their
+    article page.
+    """
+    article_dirs = article_dirs or set()
+    base_key = _index_key() if MANIFEST else None
+    if only_dirs is not None:
+        print(f"[DEBUG] Rebuilding {len(only_dirs)} directory index(es)")
+        dirs = sorted(only_dirs)
+    else:
+        dirs = OUTPUT_TREE.dirs()
+    unchanged = 0
+    for d in dirs:
+        if d in article_dirs:
             continue
-        if d in article_dirs or _index_is_article_page(d):
+        if not _out_dir_indexable(d, hidden_stems):
             continue
-        for key, _label, default_dir in DIR_INDEX_SORTS:
-            filename = "index.md.html" if key == "name" else f"index.{key}.md.html"
-            out_html = d / filename
-            title, md_body = format_dir_index_out(
-                d,
-                items,
-                sort_key=key,
-                sort_dir=default_dir,
-            )
-            write_md_like_page(out_html, md_body, title=title, escape_html=False)
-            if key == "name":
-                write_md_like_page(d / "index.html", md_body, title=title, escape_html=False)
+        dirnames, filenames = OUTPUT_TREE.entries(d)
+        _keep, items = _out_dir_listing(d, dirnames, filenames, hidden_stems)
+        if not _write_out_index(d, items, base_key):
+            unchanged += 1
+    if unchanged:
+        print(f"[DEBUG] {unchanged} directory index(es) with an unchanged listing skipped")
+    # Index pages not rewritten this pass are still part of the site (the
+    # sitemap takes its pages from the tree).
+    for d in OUTPUT_TREE.dirs():
+        if d in article_dirs:
+            continue
+        n = 1
+        while (d / _dir_index_page_name(n, "html")).exists():
+            _track_output(d / _dir_index_page_name(n, "html"))
+            _track_output(d / _dir_index_page_name(n, "json"))
+            n += 1
 
 def copy_static():
     OUT.mkdir(parents=True, exist_ok=True)
-    for name in ["submit.html"]:
+    for name in ["submit.html", "dir-index.js"]:
         src = SRC / name
         if src.exists():
             dst = OUT / name
@@ -1868,166 +2548,429 @@ def _url_from_out_path(p: Path) -> str:
 
     return quote(path, safe="/:@-._~")
 
-def build_sitemap_and_robots():
-    origin = _current_origin()
+_SITEMAP_SUFFIXES = {".html", ".md"}
+
+def _page_mtime(path: Path) -> int | None:
+    """
+    mtime_ns of an output page. Only pages written this pass (or never
+    recorded) are statted; the others keep the mtime recorded when they were
+    last written, since write_if_changed leaves unchanged pages alone.
+    """
+    mtime_ns = _OUTPUT_MTIMES.get(path)
+    if mtime_ns is None:
+        try:
+            mtime_ns = _OUTPUT_MTIMES[path] = path.stat().st_mtime_ns
+        except OSError:
+            return None
+    return mtime_ns
 
-    urls = []
-    for path in OUT.rglob("*"):
-        if path.name.startswith("."):
+def _sitemap_entries():
+    """
+    (loc, lastmod) for every page the build placed under OUT, streamed from
+    OUTPUT_TREE in path order. lastmod is the page's mtime (see _page_mtime),
+    capped at SOURCE_DATE_EPOCH.
+    """
+    origin = _current_origin()
+    epoch = source_date_epoch()
+    index_aliases = {_dir_index_alias_name(key) for key, _label, _dir in DIR_INDEX_SORTS}
+    for path in OUTPUT_TREE.files():
+        if path.name.startswith(".") or path.name in index_aliases:
             continue
-        if path.suffix.lower() not in {".html", ".md"}:
+        if path.suffix.lower() not in _SITEMAP_SUFFIXES:
             continue
-
         rel_url = _url_from_out_path(path)
         if not rel_url:
             continue
+        mtime_ns = _page_mtime(path)
+        if mtime_ns is None:
+            continue
+        mtime = datetime.fromtimestamp(mtime_ns / 1e9, tz=timezone.utc)
+        if epoch and mtime > epoch:
+            mtime = epoch
+        yield origin + rel_url, mtime.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        loc = origin + rel_url
-        mtime = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
-        lastmod = mtime.strftime("%Y-%m-%dT%H:%M:%SZ")
-        urls.append((loc, lastmod))
-
-    seen = {}
-    for loc, lastmod in urls:
-        if (loc not in seen) or (lastmod > seen[loc]):
-            seen[loc] = lastmod
-
-    items = []
-    for loc, lastmod in sorted(seen.items()):
-        items.append(
-            "  <url>\n"
-            f"    <loc>{loc}</loc>\n"
-            f"    <lastmod>{lastmod}</lastmod>\n"
-            "    <changefreq>weekly</changefreq>\n"
-            "    <priority>0.6</priority>\n"
-            "  </url>"
-        )
-
-    sitemap = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        + "\n".join(items) + "\n</urlset>\n"
-    )
-    (OUT / "sitemap.xml").write_text(sitemap, encoding="utf-8")
+def build_sitemap_and_robots():
+    origin = _current_origin()
+    writer = SitemapWriter(OUT, origin, compress=SITEMAP_GZIP)
+    for loc, lastmod in _sitemap_entries():
+        writer.add(loc, lastmod)
+    files = writer.close()
+    print(f"[DEBUG] sitemap: {writer.urls} URL(s) in {', '.join(p.name for p in files)}")
 
     robots = (
         "User-agent: *\n"
         "Allow: /\n"
         f"Sitemap: {origin}/sitemap.xml\n"
     )
-    (OUT / "robots.txt").write_text(robots, encoding="utf-8")
+    write_if_changed(OUT / "robots.txt", robots)
 
 # ---------- RSS ----------
-def build_rss_feed():
+# Feed documents: rss.xml (RSS 2.0) and atom.xml, each holding the newest
+# FEED_ITEMS entries, with older entries in RFC 5005 archives
+# (rss-archive-1.xml holds the oldest FEED_ITEMS, and so on).
+FEED_ENTRY_CACHE_PATH = BUILD_DIR / "feed-entries.marshal"
+_FEED_ARCHIVE_RE = re.compile(r"^(?:rss|atom)-archive-\d+\.xml$")
+
+def _feed_records() -> list[tuple[ProvenanceRecord, str, datetime]]:
+    """Latest (record, item url, date) per (top, stem), newest first."""
     origin = _current_origin()
-
     by_stem = {}
-    for prov in iter_provenance_files():
-        try:
-            data = yaml.safe_load(prov.read_text(encoding="utf-8")) or {}
-        except Exception:
+    for r in provenance_catalog():
+        if r.journal and r.journal != PREFERRED_JOURNAL:
             continue
-
-        journal = (data.get("journal") or "").strip()
-        if journal and journal != PREFERRED_JOURNAL:
+        dt = _to_datetime(r.date) or r.mtime
+        sort_key = (dt, _doi_suffix_number(r.doi_suffix), r.doi_suffix, r.mtime)
+        keep = by_stem.get((r.top, r.stem))
+        if keep and sort_key <= keep[0]:
             continue
+        if r.permalink and r.permalink.startswith("http"):
+            item_url = r.permalink.rstrip("/")
+        else:
+            item_url = f"{origin}/{quote(r.top, safe='')}/{quote(r.stem, safe='')}/"
+        by_stem[(r.top, r.stem)] = (sort_key, r, _normalize_feed_url(item_url), dt)
+    recs = [(r, url, dt) for _key, r, url, dt in by_stem.values()]
+    return sorted(recs, key=lambda x: x[2], reverse=True)
+
+def _feed_pages(n_entries: int) -> list[int]:
+    """Sizes of the current feed and its archives (oldest archive first)."""
+    cap = FEED_ITEMS
+    if not cap or n_entries <= cap:
+        return [n_entries]
+    older = n_entries - cap
+    return [cap] + [min(cap, older - i) for i in range(0, older, cap)]
+
+def _feed_archive_name(fmt: str, k: int) -> str:
+    return f"{fmt}-archive-{k}.xml"
+
+def _feed_paths(n_entries: int) -> list[Path]:
+    """Every feed document for `n_entries` entries, current feeds first."""
+    n_archives = len(_feed_pages(n_entries)) - 1
+    return [OUT / f"{fmt}.xml" for fmt in FEED_FORMATS] + [
+        OUT / _feed_archive_name(fmt, k)
+        for fmt in FEED_FORMATS
+        for k in range(1, n_archives + 1)
+    ]
 
-        rel_parts = rel(prov).parts
-        if len(rel_parts) < 2:
-            continue
-        top  = rel_parts[0]
-        stem = rel_parts[1]
-        doi_suffix = rel_parts[3] if len(rel_parts) > 3 else ""
-
-        pf_block = data.get("parsed_from_pnpmd") or {}
-        title    = (data.get("title") or pf_block.get("title") or stem)
-        authors  = normalize_authors(data.get("authors") or pf_block.get("authors"))
-        abstract = (data.get("abstract") or pf_block.get("abstract") or "")
-        onesent  = (
-            data.get("one_sentence_summary")
-            or pf_block.get("one_sentence_summary")
-            or pf_block.get("one_sentence")
-            or ""
+def _prune_feed_archives(keep: list[Path]) -> None:
+    names = {p.name for p in keep}
+    for old in OUT.glob("*-archive-*.xml"):
+        if _FEED_ARCHIVE_RE.match(old.name) and old.name not in names:
+            old.unlink(missing_ok=True)
+            if OUTPUT_TREE is not None:
+                OUTPUT_TREE.discard(old)
+
+def _feed_entry(r: ProvenanceRecord, url: str, dt: datetime) -> FeedEntry:
+    html_body = ""
+    if r.html_name:
+        html_path = r.prov.parent / r.html_name
+        if html_path.exists():
+            try:
+                html_body = extract_html_body(html_path.read_text(encoding="utf-8"))
+            except Exception:
+                html_body = ""
+    return FeedEntry(
+        url=url,
+        title=r.title or r.stem,
+        date=dt,
+        authors=[nm for a in r.authors if (nm := a.get("name", "").strip())],
+        summary=r.feed_abstract or r.onesent,
+        content_html=html_body,
+        related=f'https://doi.org/{r.doi.split("/")[-1]}' if r.doi else "",
+    )
+
+def _feed_writer_digest() -> str:
+    return MANIFEST.digest(Path(site_feed.__file__).resolve()) if MANIFEST else ""
+
+def _feed_entry_key(fmt: str, r: ProvenanceRecord, url: str, dt: datetime) -> str | None:
+    """Signature of everything one serialized entry depends on (None => no cache)."""
+    if not MANIFEST:
+        return None
+    inputs = [r.prov]
+    if r.html_name and (r.prov.parent / r.html_name).exists():
+        inputs.append(r.prov.parent / r.html_name)
+    return MANIFEST.input_key(
+        "feed-entry",
+        inputs,
+        _generator_params(
+            fmt=fmt, content=FEED_CONTENT, url=url, date=dt.isoformat(),
+            writer=_feed_writer_digest(),
+        ),
+    )
+
+def build_feeds(recs: list[tuple[ProvenanceRecord, str, datetime]]) -> None:
+    """
+    Write rss.xml / atom.xml and their archives from `recs` (see
+    _feed_records()). Entry XML is cached by _feed_entry_key(), so only
+    entries whose provenance or HTML changed are read and serialized again;
+    documents are streamed to disk and replaced only when their bytes change.
+    """
+    if not recs:
+        return
+
+    origin = _current_origin()
+    journal = PREFERRED_JOURNAL
+    full = FEED_CONTENT == "full"
+    cache = FeedEntryCache(FEED_ENTRY_CACHE_PATH)
+    entries: dict[tuple[str, int], FeedEntry] = {}
+
+    def entry_xml(fmt: str, i: int) -> str:
+        r, url, dt = recs[i]
+        key = _feed_entry_key(fmt, r, url, dt)
+        xml = cache.get(key) if key else None
+        if xml is None:
+            e = entries.get(i)
+            if e is None:
+                e = entries[i] = _feed_entry(r, url, dt)
+            xml = (rss_item if fmt == "rss" else atom_entry)(e, full)
+            if key:
+                cache.put(key, xml)
+        return xml
+
+    sizes = _feed_pages(len(recs))
+    n_archives = len(sizes) - 1
+    # recs are newest first: the current feed, then archives newest to oldest
+    bounds, start = [], 0
+    for size in [sizes[0]] + sizes[:0:-1]:
+        bounds.append((start, start + size))
+        start += size
+    epoch = source_date_epoch()
+    written = 0
+    for fmt in FEED_FORMATS:
+        current = f"{origin}/{fmt}.xml"
+        for page, (lo, hi) in enumerate(bounds):
+            k = n_archives - page + 1  # archive number; page 0 is the current feed
+            if page == 0:
+                path, links = OUT / f"{fmt}.xml", []
+                if n_archives:
+                    links.append(("prev-archive", f"{origin}/{_feed_archive_name(fmt, n_archives)}"))
+                updated = epoch or recs[0][2]
+            else:
+                path, links = OUT / _feed_archive_name(fmt, k), [("current", current)]
+                if k > 1:
+                    links.append(("prev-archive", f"{origin}/{_feed_archive_name(fmt, k - 1)}"))
+                if k < n_archives:
+                    links.append(("next-archive", f"{origin}/{_feed_archive_name(fmt, k + 1)}"))
+                updated = recs[lo][2]
+            head = feed_head(
+                fmt,
+                title=f"{journal} — Publications",
+                description=f"Latest publications from {journal}",
+                home=origin + "/",
+                self_url=f"{origin}/{path.name}",
+                updated=updated,
+                links=links,
+                archive=page > 0,
+            )
+            xml = (entry_xml(fmt, i) for i in range(lo, hi))
+            written += write_feed(path, head, xml, feed_tail(fmt))
+            _track_output(path)
+    cache.save()
+    print(
+        f"[DEBUG] feeds: {len(recs)} entries in {len(_feed_paths(len(recs)))} file(s) "
+        f"({written} written; entry cache {cache.hits} hit(s), {cache.misses} miss(es))"
+    )
+
+# ---------- source mirror ----------
+def _mirror_file(p: Path) -> None:
+    dst = OUT / rel(p)
+    copy_if_changed(p, dst)
+
+    if p.suffix.lower() == ".md":
+        rendered_dst = dst.with_suffix(dst.suffix + ".html")
+        render_markdown_file(p, rendered_dst, title=p.stem)
+
+def _mirror_parts_included(parts: tuple[str, ...]) -> bool:
+    """Name-only part of the mirror rules for a file at ROOT/<parts>."""
+    if not parts or parts[-1].startswith("."):
+        return False
+    for part in parts[:-1]:
+        if part in EXCLUDE_NAMES:
+            return False
+        if part.startswith(".") and part != ".well-known":
+            return False
+    if Path(parts[-1]).suffix.lower() in SKIP_COPY_EXTS:
+        return False
+    if parts == ("index.html",):
+        return False
+    return True
+
+def git_source_files() -> list[Path] | None:
+    """
+    Publishable files according to the git index plus untracked, non-ignored
+    files, from a single `git ls-files` call. None outside a git checkout.
+    """
+    try:
+        out = subprocess.check_output(
+            ["git", "ls-files", "-z", "-t", "-s",
+             "--cached", "--deleted", "--others", "--exclude-standard"],
+            cwd=ROOT,
+            text=True,
+            stderr=subprocess.DEVNULL,
         )
-        date_norm= (data.get("publication_date") or data.get("creation_date") or pf_block.get("date") or None)
-        doi      = (data.get("doi") or (data.get("zenodo") or {}).get("doi") or "")
+    except Exception:
+        return None
 
-        permalink = (data.get("permalink") or "").strip()
-        if permalink and permalink.startswith("http"):
-            item_url = permalink.rstrip("/")
+    entries: dict[str, str] = {}
+    deleted: set[str] = set()
+    venvs: set[str] = set()
+    for line in out.split("\0"):
+        if not line:
+            continue
+        tag, rest = line.split(" ", 1)
+        if "\t" in rest:
+            # "<mode> <object> <stage>\t<path>" for index entries
+            meta, path = rest.split("\t", 1)
+            mode = meta.split(" ", 1)[0]
         else:
-            item_url = f"{origin}/{quote(top, safe='')}/{quote(stem, safe='')}/"
-        item_url = _normalize_feed_url(item_url)
-
-        mtime = datetime.fromtimestamp(prov.stat().st_mtime)
-        dt = _to_datetime(date_norm) or mtime
-        sort_key = (dt, _doi_suffix_number(doi_suffix), doi_suffix or "", mtime)
-        keep = by_stem.get((top, stem))
-        if not keep or sort_key > keep["sort_key"]:
-            html_body = ""
-            artifacts = data.get("artifacts") or {}
-            html_name = (artifacts.get("html_name") or None)
-            add_old = artifacts.get("additional") or {}
-            if not html_name:
-                html_name = add_old.get("html")
-            if not html_name and artifacts.get("html_url"):
-                html_name = Path(artifacts["html_url"]).name
-            if html_name:
-                html_path = prov.parent / html_name
-                if html_path.exists():
-                    try:
-                        html_body = extract_html_body(
-                            html_path.read_text(encoding="utf-8")
-                        )
-                    except Exception:
-                        html_body = ""
-
-            by_stem[(top, stem)] = {
-                "stem": stem,
-                "top": top,
-                "title": title,
-                "authors": authors,
-                "abstract": abstract,
-                "onesent": onesent,
-                "date": dt,
-                "url": item_url,
-                "doi": doi,
-                "content_html": html_body,
-                "sort_key": sort_key,
-            }
+            path, mode = rest, ""
+        if tag == "R":
+            deleted.add(path)
+            continue
+        entries[path] = mode
+        if path.endswith("/pyvenv.cfg") or path == "pyvenv.cfg":
+            venvs.add(path.rpartition("/")[0])
 
-    if not by_stem:
-        return
+    files: list[Path] = []
+    for path, mode in sorted(entries.items()):
+        if path in deleted or mode == "160000":  # removed from worktree / submodule
+            continue
+        parts = tuple(path.split("/"))
+        if any("/".join(parts[:i]) in venvs for i in range(1, len(parts))):
+            continue
+        if not _mirror_parts_included(parts):
+            continue
+        p = ROOT.joinpath(*parts)
+        if mode == "120000" and not p.is_file():
+            continue
+        files.append(p)
+    return files
 
-    fg = FeedGenerator()
-    fg.load_extension("podcast")
-    fg.title(f"{PREFERRED_JOURNAL} — Publications")
-    fg.link(href=origin + "/rss.xml", rel="self")
-    fg.link(href=origin + "/", rel="alternate")
-    fg.description(f"Latest publications from {PREFERRED_JOURNAL}")
-    fg.language("en")
-
-    items = sorted(by_stem.values(), key=lambda x: x["date"], reverse=True)
-    for it in items:
-        fe = fg.add_entry()
-        fe.id(it["url"])
-        fe.link(href=it["url"])
-        fe.title(it["title"])
-        desc = it["abstract"] or it["onesent"]
-        if desc:
-            fe.description(desc)
-        if it.get("content_html"):
-            fe.content(it["content_html"], type="CDATA")
-        for a in it["authors"]:
-            nm = a.get("name", "").strip()
-            if nm:
-                fe.author({"name": nm})
-        fe.pubDate(it["date"].astimezone(timezone.utc))
-        if it["doi"]:
-            fe.link(href=f'https://doi.org/{it["doi"].split("/")[-1]}', rel="related")
+def _walk_source_files():
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        d = Path(dirpath)
+
+        if is_gitignored(d):
+            dirnames.clear()
+            continue
+
+        if d == OUT:
+            dirnames.clear()
+            continue
+
+        if dirpath != str(ROOT):
+            first = Path(dirpath).relative_to(ROOT).parts[0]
+            if first in EXCLUDE_NAMES:
+                dirnames.clear()
+                continue
+            if (Path(dirpath)/"pyvenv.cfg").exists():
+                dirnames.clear()
+                continue
+
+        keep=[]
+        for dd in list(dirnames):
+            child = Path(dirpath) / dd
+            if is_gitignored(child):
+                continue
+            if dd in EXCLUDE_NAMES:
+                continue
+            if dd.startswith(".") and dd != ".well-known":
+                continue
+            if (Path(dirpath)/dd/"pyvenv.cfg").exists():
+                continue
+            keep.append(dd)
+        dirnames[:] = keep
 
-    rss_xml = fg.rss_str(pretty=True).decode("utf-8")
-    (OUT / "rss.xml").write_text(rss_xml, encoding="utf-8")
+        for fname in filenames:
+            p = d / fname
+            if fname.startswith("."):
+                continue
+            if is_gitignored(p):
+                continue
+            if p.suffix.lower() in SKIP_COPY_EXTS:
+                continue
+
+            if d == ROOT and fname == "index.html":
+                continue
+
+            yield p
+
+def run_bounded(fn, items, workers: int):
+    """
+    Yield fn(item) for each item in input order while `workers` threads run
+    ahead; at most 2 * workers items are in flight, so a lazy producer (the
+    tree walker) is consumed incrementally. Exceptions surface in order.
+    """
+    pending = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def mirror_tree(enumerate_with: str = "git"):
+    """
+    Mirror every publishable file under ROOT into OUT. The file list comes
+    from the git index when possible, else from walking the tree.
+    """
+    files = git_source_files() if enumerate_with == "git" else None
+    if files is None:
+        print("[DEBUG] source files: walking the tree")
+        files = _walk_source_files()
+    else:
+        print(f"[DEBUG] source files: {len(files)} from git ls-files")
+    if IO_WORKERS > 1:
+        # copy, hash and wrap run on the pool; hashing happens per file there
+        n = sum(1 for _ in run_bounded(_mirror_file, files, IO_WORKERS))
+        print(f"[DEBUG] mirrored {n} source file(s) with {IO_WORKERS} I/O workers")
+        return
+    if MANIFEST and HASH_WORKERS > 1:
+        files = list(files)
+        MANIFEST.prime_digests(files, HASH_WORKERS)
+    for p in files:
+        _mirror_file(p)
+
+def _mirror_source_included(p: Path) -> bool:
+    """Whether mirror_tree() would mirror the file p (used for single changes)."""
+    if p == OUT or OUT in p.parents:
+        return False
+    try:
+        parts = rel(p).parts
+    except ValueError:
+        return False
+    if not _mirror_parts_included(parts):
+        return False
+    for i in range(1, len(parts)):
+        if (ROOT.joinpath(*parts[:i]) / "pyvenv.cfg").exists():
+            return False
+    return not is_gitignored(p)
+
+def _unmirror_file(p: Path) -> None:
+    dst = OUT / rel(p)
+    outs = [dst]
+    if p.suffix.lower() == ".md":
+        outs.append(dst.with_suffix(dst.suffix + ".html"))
+    for out in outs:
+        if out.is_file():
+            out.unlink()
+            if OUTPUT_TREE is not None:
+                OUTPUT_TREE.discard(out)
+            _note_output(out)
+            print(f"[DEBUG] Removed {rel_out(out)}")
+
+def mirror_changed(changed: set[Path]) -> None:
+    """Mirror only the given source paths (files, new dirs, or deletions)."""
+    for p in sorted(changed):
+        if p.is_dir():
+            for f in sorted(p.rglob("*")):
+                if f.is_file() and _mirror_source_included(f):
+                    _mirror_file(f)
+        elif p.is_file():
+            if _mirror_source_included(p):
+                _mirror_file(p)
+        elif _mirror_source_included(p):
+            _unmirror_file(p)
 
 # ---------- build ----------
 def main():
@@ -2053,15 +2996,245 @@ def main():
         "--book-workers",
         type=int,
         default=None,
-        help="Max parallel workers for book renders (default: min(4, #books)).",
+        help="Books rendered at once, one render.py run each "
+        "(default: one per CPU, capped by available memory).",
+    )
+    ap.add_argument(
+        "--render-timeout",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Kill a render job (and its docker clients) after this long (default: 0 = no limit).",
+    )
+    ap.add_argument(
+        "--watch",
+        action="store_true",
+        help="After building, watch the source tree and rebuild what changes.",
+    )
+    ap.add_argument(
+        "--watch-poll",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Use the polling watcher with this interval instead of inotify.",
+    )
+    ap.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help=f"Ignore the content-hash build manifest ({MANIFEST_PATH.relative_to(ROOT)}) "
+        "and fall back to mtime checks.",
+    )
+    ap.add_argument(
+        "--enumerate",
+        choices=("git", "walk"),
+        default="git",
+        help="How to list source files for the mirror: one `git ls-files` call "
+        "(default; falls back to walking outside a git checkout) or os.walk.",
+    )
+    ap.add_argument(
+        "--article-workers",
+        type=int,
+        default=None,
+        help="Processes rendering stale article groups in parallel "
+        "(default: min(4, #CPUs); 1 renders in-process).",
+    )
+    ap.add_argument(
+        "--io-workers",
+        type=int,
+        default=4,
+        help="Threads copying, hashing and wrapping (.md.html) mirrored source "
+        "files concurrently (default: 4; 1 mirrors serially).",
+    )
+    ap.add_argument(
+        "--hash-workers",
+        type=int,
+        default=None,
+        help="With --io-workers=1: threads hashing changed source files before "
+        "mirroring (default: min(4, #CPUs); 1 hashes inline).",
+    )
+    ap.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="copy",
+        help="How to mirror binary assets into site/: copy (default), hardlink, "
+        "reflink (copy-on-write clone) or relative symlink; falls back to copying "
+        "where the filesystem refuses. Text files are always copied or reflinked.",
+    )
+    ap.add_argument(
+        "--doi-aliases",
+        choices=DOI_ALIAS_MODES,
+        default="copy",
+        help="How version pages appear at their DOI alias URLs (/<top>/doi/..., "
+        "/doi/..., source mirror): copy of the rendered page (default), hardlink "
+        "to it, refresh (tiny canonical + meta-refresh stub) or redirects (no "
+        "alias pages; 301s in site/_redirects for Netlify/Cloudflare Pages).",
+    )
+    ap.add_argument(
+        "--index-page-size",
+        type=int,
+        default=500,
+        help="Entries per directory index page; longer listings continue in "
+        "index.p2.html (with index.p2.json) and so on (default: 500; 0 = one page).",
+    )
+    ap.add_argument(
+        "--sitemap-gzip",
+        action="store_true",
+        help="Write the sitemap as gzipped shards (sitemap-1.xml.gz, ...) behind "
+        "a sitemap.xml index. Shards are always split at 50,000 URLs / 50 MB.",
+    )
+    ap.add_argument(
+        "--feed-items",
+        type=int,
+        default=50,
+        help="Newest entries in rss.xml / atom.xml; older ones go to RFC 5005 "
+        "archive feeds (rss-archive-1.xml, ... oldest first) linked via "
+        "prev-archive (default: 50; 0 = all in one feed).",
+    )
+    ap.add_argument(
+        "--feed-content",
+        choices=FEED_CONTENT_MODES,
+        default="full",
+        help="Feed entries carry the article HTML (full, default) or only the "
+        "abstract (summary).",
+    )
+    ap.add_argument(
+        "--render-cache",
+        default=None,
+        metavar="DIR",
+        help="Content-addressed cache of pandoc ASTs and PDF/HTML/EPUB outputs "
+        "used by render.py (default: $PNPMD_CACHE_DIR or ~/.cache/pnpmd; "
+        "'off' disables it).",
+    )
+    ap.add_argument(
+        "--build-stamp",
+        choices=("page", "file"),
+        default="page",
+        help="Put the build time on every page (default) or only in site/build.txt, "
+        "so unchanged pages stay byte-identical. SOURCE_DATE_EPOCH, if set, "
+        "replaces the clock either way.",
+    )
+    ap.add_argument(
+        "--dump-catalog",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Also write the parsed provenance catalog as JSON to PATH (debugging).",
     )
     args = ap.parse_args()
 
-    global PREFERRED_JOURNAL
+    global PREFERRED_JOURNAL, MANIFEST, YAML_CACHE, OUTPUT_TREE
+    global STAMP_MODE, LINK_MODE, HASH_WORKERS, IO_WORKERS, ARTICLE_WORKERS, DOI_ALIAS_MODE
+    global INDEX_PAGE_SIZE, SITEMAP_GZIP, FEED_ITEMS, FEED_CONTENT, RENDER_CACHE, RENDER_TIMEOUT
+    STAMP_MODE = args.build_stamp
+    DOI_ALIAS_MODE = args.doi_aliases
+    INDEX_PAGE_SIZE = max(0, args.index_page_size)
+    SITEMAP_GZIP = args.sitemap_gzip
+    FEED_ITEMS = max(0, args.feed_items)
+    FEED_CONTENT = args.feed_content
+    RENDER_CACHE = args.render_cache
+    RENDER_TIMEOUT = args.render_timeout or None
+    LINK_MODE = args.link_mode
+    HASH_WORKERS = args.hash_workers or min(4, os.cpu_count() or 1)
+    IO_WORKERS = max(1, args.io_workers)
+    ARTICLE_WORKERS = args.article_workers or min(4, os.cpu_count() or 1)
+    YAML_CACHE = ParsedYamlCache(YAML_CACHE_PATH, ROOT)
+    OUTPUT_TREE = OutputTree(OUT)
     PREFERRED_JOURNAL = _compute_preferred_journal()
 
+    if not args.no_manifest:
+        MANIFEST = BuildManifest(MANIFEST_PATH, ROOT)
+    try:
+        build(args)
+        if MANIFEST:
+            MANIFEST.commit()
+        YAML_CACHE.save()
+        if args.watch:
+            watch(args)
+    finally:
+        if MANIFEST:
+            MANIFEST.close()
+            MANIFEST = None
+
+def _watch_skip_dir(d: Path) -> bool:
+    if d == OUT or d.name in EXCLUDE_NAMES:
+        return True
+    if d.name.startswith(".") and d.name not in {".well-known", ".scripts"}:
+        return True
+    return is_gitignored(d)
+
+def watch(args):
+    """
+    Rebuild on every change under ROOT until interrupted. Parsed provenance,
+    templates and the gitignore set stay resident between passes; changes to
+    .scripts/ or a .gitignore trigger a full pass.
+    """
+    scripts_dir = ROOT / ".scripts"
+    watcher = make_watcher(
+        ROOT,
+        _watch_skip_dir,
+        interval=args.watch_poll or 1.0,
+        polling=args.watch_poll is not None,
+    )
+    print(f"[DEBUG] Watching {ROOT} ({watcher.kind}); Ctrl-C to stop")
+    try:
+        while True:
+            changed = {
+                p for p in watcher.wait()
+                if p == ROOT or not p.name.startswith(".") or p.name == ".gitignore"
+            }
+            if not changed:
+                continue
+            if any(p.name == ".gitignore" for p in changed):
+                reload_gitignored_paths()
+            full = ROOT in changed or any(
+                p.name == ".gitignore" or scripts_dir in p.parents for p in changed
+            )
+            if any(p.suffix == ".py" and scripts_dir in p.parents for p in changed):
+                print("[DEBUG] NOTE: build scripts changed; restart --watch to load them")
+            print(
+                f"[DEBUG] {len(changed)} change(s); rebuilding "
+                + ("everything" if full else "affected outputs")
+            )
+            started = time.monotonic()
+            invalidate_catalog()
+            try:
+                build(args, changed=None if full else changed)
+            except Exception:
+                traceback.print_exc()
+                if MANIFEST:
+                    MANIFEST.rollback()
+                continue
+            if MANIFEST:
+                MANIFEST.commit()
+            YAML_CACHE.save()
+            print(f"[DEBUG] Rebuilt in {time.monotonic() - started:.2f}s")
+    except KeyboardInterrupt:
+        print("[DEBUG] Watch stopped")
+    finally:
+        watcher.close()
+
+def build(args, changed: set[Path] | None = None):
+    """
+    One build pass. `changed` (from --watch) limits the source mirror and book
+    renders to those paths; None mirrors the whole tree.
+    """
+    global GRAPH, PAGE_STAMP, _PAGE_SHELL, _OUTPUT_MTIMES
+    GRAPH = DepGraph() if MANIFEST else None
+    _PAGE_SHELL = None
+    if MANIFEST:
+        _OUTPUT_MTIMES = MANIFEST.outputs()
+    WRITTEN.clear()
+
     OUT.mkdir(parents=True, exist_ok=True)
-    (OUT/".nojekyll").write_text("", encoding="utf-8")
+    write_if_changed(OUT / ".nojekyll", "")
+    stamp = build_stamp()
+    if STAMP_MODE == "file":
+        write_if_changed(BUILD_STAMP_FILE, stamp + "\n")
+        # Tracked like any output, so a later page-mode build prunes it.
+        _track_output(BUILD_STAMP_FILE)
+        PAGE_STAMP = f'(<a href="/{rel_out(BUILD_STAMP_FILE).as_posix()}">build info</a>)'
+    else:
+        PAGE_STAMP = stamp
     write_cname_if_custom(BASE_URL)
 
     print(f"[DEBUG] ROOT: {ROOT}")
@@ -2069,6 +3242,8 @@ def main():
     print(f"[DEBUG] SRC:  {SRC}")
     print(f"[DEBUG] BASE_URL: {BASE_URL}")
     print(f"[DEBUG] gitignored paths: {len(GITIGNORED_PATHS)}")
+    print(f"[DEBUG] manifest: {MANIFEST.path if MANIFEST else 'disabled'}")
+    print(f"[DEBUG] yaml loader: {SafeLoader.__name__}")
 
     site_src = SRC / "site"
     print(f"[DEBUG] site_src: {site_src} (exists={site_src.exists()})")
@@ -2099,77 +3274,79 @@ def main():
 
     hidden_stems = hidden_stems_from_provenance()
 
-    for dirpath, dirnames, filenames in os.walk(ROOT):
-        d = Path(dirpath)
-
-        if is_gitignored(d):
-            dirnames.clear()
-            continue
-
-        if d == OUT:
-            dirnames.clear()
-            continue
-
-        if dirpath != str(ROOT):
-            first = Path(dirpath).relative_to(ROOT).parts[0]
-            if first in EXCLUDE_NAMES:
-                dirnames.clear()
-                continue
-            if (Path(dirpath)/"pyvenv.cfg").exists():
-                dirnames.clear()
-                continue
-
-        keep=[]
-        for dd in list(dirnames):
-            child = Path(dirpath) / dd
-            if is_gitignored(child):
-                continue
-            if dd in EXCLUDE_NAMES:
-                continue
-            if dd.startswith(".") and dd != ".well-known":
-                continue
-            if (Path(dirpath)/dd/"pyvenv.cfg").exists():
-                continue
-            keep.append(dd)
-        dirnames[:] = keep
-
-        for fname in filenames:
-            p = d / fname
-            if fname.startswith("."):
-                continue
-            if is_gitignored(p):
-                continue
-            if p.suffix.lower() in SKIP_COPY_EXTS:
-                continue
-
-            if d == ROOT and fname == "index.html":
-                continue
-
-            dst = OUT / rel(p)
-            copy_if_changed(p, dst)
-
-            if p.suffix.lower() == ".md":
-                rendered_dst = dst.with_suffix(dst.suffix + ".html")
-                render_markdown_file(p, rendered_dst, title=p.stem)
+    if changed is None:
+        mirror_tree(args.enumerate)
+    else:
+        mirror_changed(changed)
 
     copy_static()
     # Render books from the mirrored copies under OUT to avoid touching source.
     book_include_pdf = not (args.skip_pdf or args.skip_books or ".pdf" in SKIP_COPY_EXTS)
     book_include_epub = not (args.skip_epub or args.skip_books or ".epub" in SKIP_COPY_EXTS)
     book_include_html = not args.skip_books
+    book_dirs = None
+    if changed is not None:
+        book_dirs = {OUT / rel(p.parent) for p in changed if ROOT in p.parents and OUT not in p.parents}
     render_book_dirs(
         skip_epub=not book_include_epub,
         include_pdf=book_include_pdf,
         include_html=book_include_html,
         max_workers=args.book_workers,
         base_dir=OUT,
+        only_dirs=book_dirs,
     )
 
-    # Build directory indexes based on the final OUT tree (includes rendered books).
-    build_out_indexes(hidden_stems, article_dirs)
+    # Build directory indexes from the output tree (includes rendered books).
+    # The whole-site files below are written after the indexes but listed by them.
+    feed_recs = _feed_records()
+    _link_feed_sources()
+    feed_paths = _feed_paths(len(feed_recs))
+    _prune_feed_archives(feed_paths)
+    for path in [OUT / "sitemap.xml", OUT / "robots.txt", *feed_paths]:
+        _track_output(path)
+    _prune_orphaned_outputs()
+    build_out_indexes(hidden_stems, article_dirs, only_dirs=_dirty_index_dirs())
+    # Every page is in place: forget the recorded mtimes of those rewritten.
+    for path in WRITTEN:
+        _OUTPUT_MTIMES.pop(path, None)
+
+    sitemap_key = (
+        MANIFEST.input_key("sitemap", [], _generator_params(gzip=SITEMAP_GZIP)) if MANIFEST else None
+    )
+    if _singleton_dirty("sitemap", OUT / "sitemap.xml", sitemap_key):
+        build_sitemap_and_robots()
+        if sitemap_key:
+            MANIFEST.set_node_signature("sitemap", sitemap_key)
+    else:
+        print("[DEBUG] sitemap.xml up to date")
+    feed_params = _generator_params(
+        items=FEED_ITEMS, content=FEED_CONTENT, entries=len(feed_recs), writer=_feed_writer_digest()
+    )
+    rss_key = MANIFEST.input_key("rss", [], feed_params) if MANIFEST else None
+    feeds_missing = any(not p.exists() for p in feed_paths) if feed_recs else False
+    if feeds_missing or _singleton_dirty("rss", OUT / "rss.xml", rss_key):
+        build_feeds(feed_recs)
+        if rss_key:
+            MANIFEST.set_node_signature("rss", rss_key)
+    else:
+        print("[DEBUG] feeds up to date")
+    if MANIFEST:
+        MANIFEST.set_outputs({
+            path: _page_mtime(path) if path.suffix.lower() in _SITEMAP_SUFFIXES else None
+            for path in OUTPUT_TREE.files()
+        })
 
-    build_sitemap_and_robots()
-    build_rss_feed()
+    if args.dump_catalog:
+        dump_catalog(args.dump_catalog)
+    print(
+        f"[DEBUG] outputs: {WRITE_STATS['written']} written, "
+        f"{WRITE_STATS['unchanged']} unchanged (write skipped)"
+    )
+    if LINK_STATS:
+        placed = ", ".join(f"{n} {how}" for how, n in sorted(LINK_STATS.items()))
+        print(f"[DEBUG] mirrored files ({LINK_MODE} mode): {placed}")
+    if YAML_CACHE:
+        print(f"[DEBUG] provenance parse cache: {YAML_CACHE.hits} hit(s), {YAML_CACHE.misses} parsed")
 
 def _compute_preferred_journal() -> str:
     """
@@ -0,0 +1,210 @@
+# site_feed.py
+
+import marshal
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from site_output import replace_if_changed
+
+FEED_FORMATS = ("rss", "atom")
+FEED_CONTENT_MODES = ("full", "summary")
+FORMAT_VERSION = 1
+
+RSS_NS = (
+    'xmlns:atom="http://www.w3.org/2005/Atom" '
+    'xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+    'xmlns:fh="http://purl.org/syndication/history/1.0"'
+)
+ATOM_NS = (
+    'xmlns="http://www.w3.org/2005/Atom" '
+    'xmlns:fh="http://purl.org/syndication/history/1.0"'
+)
+
+
+@dataclass(slots=True)
+class FeedEntry:
+    url: str
+    title: str
+    date: datetime
+    authors: list[str]
+    summary: str = ""
+    content_html: str = ""
+    related: str = ""   # e.g. the DOI resolver URL
+
+
+def _cdata(text: str) -> str:
+    return "<![CDATA[" + text.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc)
+
+
+def rss_item(e: FeedEntry, full: bool) -> str:
+    """
+    One RSS <item>: the abstract as <description> and, with `full`, the HTML
+    body as <content:encoded>.
+    """
+    parts = [
+        "    <item>\n",
+        f"      <title>{escape(e.title)}</title>\n",
+        f"      <link>{escape(e.url)}</link>\n",
+    ]
+    if e.summary:
+        parts.append(f"      <description>{escape(e.summary)}</description>\n")
+    if full and e.content_html:
+        parts.append(f"      <content:encoded>{_cdata(e.content_html)}</content:encoded>\n")
+    parts.append(f'      <guid isPermaLink="false">{escape(e.url)}</guid>\n')
+    parts.append(f"      <pubDate>{format_datetime(_utc(e.date))}</pubDate>\n")
+    parts.append("    </item>\n")
+    return "".join(parts)
+
+
+def atom_entry(e: FeedEntry, full: bool) -> str:
+    """One Atom <entry>; with `full` it adds the HTML body as <content>."""
+    stamp = _utc(e.date).isoformat().replace("+00:00", "Z")
+    parts = [
+        "  <entry>\n",
+        f"    <id>{escape(e.url)}</id>\n",
+        f"    <title>{escape(e.title)}</title>\n",
+        f"    <link href={quoteattr(e.url)}/>\n",
+    ]
+    if e.related:
+        parts.append(f'    <link href={quoteattr(e.related)} rel="related"/>\n')
+    parts.append(f"    <published>{stamp}</published>\n")
+    parts.append(f"    <updated>{stamp}</updated>\n")
+    for name in e.authors:
+        parts.append(f"    <author><name>{escape(name)}</name></author>\n")
+    if e.summary:
+        parts.append(f"    <summary>{escape(e.summary)}</summary>\n")
+    if full and e.content_html:
+        parts.append(f'    <content type="html">{escape(e.content_html)}</content>\n')
+    parts.append("  </entry>\n")
+    return "".join(parts)
+
+
+def feed_head(
+    fmt: str,
+    *,
+    title: str,
+    description: str,
+    home: str,
+    self_url: str,
+    updated: datetime,
+    links: list[tuple[str, str]],
+    archive: bool = False,
+) -> str:
+    """
+    Document head up to the first entry. `links` are (rel, href) pairs such
+    as RFC 5005 "current" / "prev-archive" / "next-archive"; `archive` marks
+    the document as an archive (fh:archive).
+    """
+    if fmt == "rss":
+        parts = [
+            "<?xml version='1.0' encoding='UTF-8'?>\n",
+            f'<rss {RSS_NS} version="2.0">\n',
+            "  <channel>\n",
+            f"    <title>{escape(title)}</title>\n",
+            f"    <link>{escape(home)}</link>\n",
+            f"    <description>{escape(description)}</description>\n",
+            f'    <atom:link href={quoteattr(self_url)} rel="self"/>\n',
+        ]
+        parts += [f"    <atom:link href={quoteattr(href)} rel={quoteattr(rel)}/>\n" for rel, href in links]
+        if archive:
+            parts.append("    <fh:archive/>\n")
+        parts += [
+            "    <docs>http://www.rssboard.org/rss-specification</docs>\n",
+            "    <language>en</language>\n",
+            f"    <lastBuildDate>{format_datetime(_utc(updated))}</lastBuildDate>\n",
+        ]
+        return "".join(parts)
+
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        f"<feed {ATOM_NS}>\n",
+        f"  <id>{escape(self_url)}</id>\n",
+        f"  <title>{escape(title)}</title>\n",
+        f"  <subtitle>{escape(description)}</subtitle>\n",
+        f"  <updated>{_utc(updated).isoformat().replace('+00:00', 'Z')}</updated>\n",
+        f"  <author><name>{escape(title)}</name></author>\n",
+        f'  <link href={quoteattr(self_url)} rel="self"/>\n',
+        f'  <link href={quoteattr(home)} rel="alternate"/>\n',
+    ]
+    parts += [f"  <link href={quoteattr(href)} rel={quoteattr(rel)}/>\n" for rel, href in links]
+    if archive:
+        parts.append("  <fh:archive/>\n")
+    return "".join(parts)
+
+
+def feed_tail(fmt: str) -> str:
+    return "  </channel>\n</rss>\n" if fmt == "rss" else "</feed>\n"
+
+
+def write_feed(path: Path, head: str, entries, tail: str) -> bool:
+    """
+    Stream head, each entry's XML and tail into `path` without building the
+    document in memory; an unchanged feed keeps its file and mtime.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(head)
+            for xml in entries:
+                f.write(xml)
+            f.write(tail)
+        return replace_if_changed(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class FeedEntryCache:
+    """
+    Serialized feed entries keyed by a signature of their sources (normally
+    .build/feed-entries.marshal), so an unchanged article is neither
+    re-read nor re-serialized. save() drops entries not used since load.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._data: dict[str, str] = {}
+        self._seen: set[str] = set()
+        self._dirty = False
+        try:
+            with path.open("rb") as f:
+                blob = marshal.load(f)
+            if blob.get("version") == FORMAT_VERSION:
+                self._data = blob["entries"]
+        except (OSError, EOFError, ValueError, TypeError, KeyError, AttributeError):
+            pass
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        xml = self._data.get(key)
+        if xml is not None:
+            self._seen.add(key)
+            self.hits += 1
+        return xml
+
+    def put(self, key: str, xml: str) -> None:
+        self._data[key] = xml
+        self._seen.add(key)
+        self._dirty = True
+        self.misses += 1
+
+    def save(self) -> None:
+        stale = self._data.keys() - self._seen
+        if not self._dirty and not stale:
+            return
+        self._data = {k: v for k, v in self._data.items() if k in self._seen}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as f:
+            marshal.dump({"version": FORMAT_VERSION, "entries": self._data}, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
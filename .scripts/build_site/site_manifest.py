@@ -0,0 +1,254 @@
+# site_manifest.py
+
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+SCHEMA_VERSION = 3
+MMAP_MIN_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """
+    sha256 of a file. Large files are hashed from an mmap in one update(),
+    which releases the GIL, so several can be hashed in parallel threads.
+    """
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent record of what every build step consumed and produced.
+
+    Stored as SQLite (normally .build/manifest.sqlite). Paths are kept
+    relative to `root` so the manifest survives a checkout being moved.
+
+      digests: path -> (inode, size, mtime_ns, sha256) so unchanged files
+               (sources and outputs) are never re-hashed; on a fresh checkout
+               (new mtimes) each source is hashed once and compared by content.
+      steps:   output -> (step, input_key, size, mtime_ns); input_key hashes the
+               input digests plus the generator parameters of the step.
+      nodes:   dependency-graph node -> signature of its inputs at the last
+               successful build (see DepGraph).
+      outputs: every file the last successful build left under the output
+               directory, so the next one can remove those it no longer
+               produces (deleted or renamed sources), with the mtime_ns of
+               the pages listed in the sitemap.
+
+    An output is fresh when its recorded input_key matches and the file on disk
+    still has the recorded size/mtime.
+    """
+
+    def __init__(self, db_path: Path, root: Path):
+        self.root = root
+        self.path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        db = self._db
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = db.execute("SELECT value FROM meta WHERE key='schema'").fetchone()
+        if row and row[0] != str(SCHEMA_VERSION):
+            for table in ("digests", "steps", "nodes", "outputs"):
+                db.execute(f"DROP TABLE IF EXISTS {table}")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            " path TEXT PRIMARY KEY, ino INTEGER, size INTEGER, mtime_ns INTEGER,"
+            " digest TEXT)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS steps ("
+            " output TEXT PRIMARY KEY, step TEXT, input_key TEXT,"
+            " size INTEGER, mtime_ns INTEGER)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS nodes (node TEXT PRIMARY KEY, signature TEXT)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS outputs (path TEXT PRIMARY KEY, mtime_ns INTEGER)"
+        )
+        db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)",
+            (str(SCHEMA_VERSION),),
+        )
+        db.commit()
+
+    def _key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    # ---------- content digests ----------
+    def digest(self, path: Path) -> str:
+        """sha256 of `path`, re-hashed only when its inode/size/mtime changed."""
+        st = path.stat()
+        key = self._key(path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ino, size, mtime_ns, digest FROM digests WHERE path=?", (key,)
+            ).fetchone()
+        if row and row[:3] == (st.st_ino, st.st_size, st.st_mtime_ns):
+            return row[3]
+        digest = file_sha256(path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO digests (path, ino, size, mtime_ns, digest)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, st.st_ino, st.st_size, st.st_mtime_ns, digest),
+            )
+        return digest
+
+    def prime_digests(self, paths, workers: int) -> None:
+        """Hash every path whose cached digest is stale, `workers` at a time."""
+        def one(p: Path) -> None:
+            try:
+                self.digest(p)
+            except OSError:
+                pass
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(one, paths))
+
+    def input_key(self, step: str, inputs: list[Path], params=None) -> str:
+        """
+        Digest of everything a step consumes: its input files (by content)
+        and its generator parameters (any JSON-serializable value).
+        """
+        h = hashlib.sha256()
+        h.update(step.encode("utf-8"))
+        for p in inputs:
+            h.update(b"\0")
+            h.update(self._key(p).encode("utf-8"))
+            h.update(b"\0")
+            try:
+                h.update(self.digest(p).encode("ascii"))
+            except OSError:
+                h.update(b"<missing>")
+        if params is not None:
+            h.update(b"\0")
+            h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    # ---------- step outputs ----------
+    def is_fresh(self, output: Path, input_key: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT input_key, size, mtime_ns FROM steps WHERE output=?",
+                (self._key(output),),
+            ).fetchone()
+        if not row or row[0] != input_key:
+            return False
+        try:
+            st = output.stat()
+        except OSError:
+            return False
+        return row[1] == st.st_size and row[2] == st.st_mtime_ns
+
+    def record(self, output: Path, step: str, input_key: str) -> None:
+        try:
+            st = output.stat()
+        except OSError:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO steps (output, step, input_key, size, mtime_ns)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self._key(output), step, input_key, st.st_size, st.st_mtime_ns),
+            )
+
+    # ---------- graph nodes ----------
+    def node_signature(self, node: str) -> str | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT signature FROM nodes WHERE node=?", (node,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_node_signature(self, node: str, signature: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO nodes (node, signature) VALUES (?, ?)",
+                (node, signature),
+            )
+
+    # ---------- output set ----------
+    def outputs(self) -> dict[Path, int | None]:
+        """Output -> mtime_ns (None if not recorded) as of the last successful build."""
+        with self._lock:
+            rows = self._db.execute("SELECT path, mtime_ns FROM outputs").fetchall()
+        return {self.root / path: mtime_ns for path, mtime_ns in rows}
+
+    def set_outputs(self, outputs: dict[Path, int | None]) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM outputs")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO outputs (path, mtime_ns) VALUES (?, ?)",
+                ((self._key(p), mtime_ns) for p, mtime_ns in outputs.items()),
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    def rollback(self) -> None:
+        with self._lock:
+            self._db.rollback()
+
+    def close(self) -> None:
+        """Close without committing; a build that did not finish leaves no trace."""
+        with self._lock:
+            self._db.close()
+
+
+class DepGraph:
+    """
+    Build dependency graph for one run.
+
+    Nodes are plain strings ("article:<top>/<stem>", "index:<dir>", "sitemap",
+    ...). Edges point from a node to the nodes derived from it. Nodes whose
+    inputs changed are marked; dirty() is everything reachable from them.
+    """
+
+    def __init__(self):
+        self._dependents: dict[str, set[str]] = defaultdict(set)
+        self._changed: set[str] = set()
+        self._lock = threading.Lock()
+
+    def add_edge(self, node: str, dependent: str) -> None:
+        with self._lock:
+            self._dependents[node].add(dependent)
+
+    def mark(self, node: str) -> None:
+        with self._lock:
+            self._changed.add(node)
+
+    def dirty(self) -> set[str]:
+        with self._lock:
+            seen = set(self._changed)
+            stack = list(self._changed)
+            while stack:
+                for dep in self._dependents.get(stack.pop(), ()):
+                    if dep not in seen:
+                        seen.add(dep)
+                        stack.append(dep)
+        return seen
@@ -0,0 +1,220 @@
+# site_output.py
+
+import filecmp
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Per-process write counters, reported at the end of a build.
+WRITE_STATS = {"written": 0, "unchanged": 0}
+_STATS_LOCK = threading.Lock()
+
+
+# Outputs this process (re)wrote since the caller last cleared it, so the
+# mtimes recorded for every other output can be trusted without a stat.
+WRITTEN: set[Path] = set()
+
+
+def _count(stats: dict[str, int], key: str) -> None:
+    with _STATS_LOCK:
+        stats[key] = stats.get(key, 0) + 1
+
+
+def mark_written(path: Path) -> None:
+    """Record `path` in WRITTEN (done by every writer in this module)."""
+    with _STATS_LOCK:
+        WRITTEN.add(path)
+
+
+def source_date_epoch() -> datetime | None:
+    """SOURCE_DATE_EPOCH (reproducible-builds.org) as an aware UTC datetime."""
+    raw = os.getenv("SOURCE_DATE_EPOCH", "").strip()
+    if not raw:
+        return None
+    try:
+        return datetime.fromtimestamp(int(raw), tz=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def write_if_changed(path: Path, data: str | bytes, encoding: str = "utf-8") -> bool:
+    """
+    Write `data` to `path` unless the file already holds exactly these bytes.
+
+    Unchanged files keep their mtime (and so their ETag / sitemap lastmod).
+    Changed files are replaced atomically, so a reader never sees a partial
+    page. Returns True when the file was written.
+    """
+    raw = data.encode(encoding) if isinstance(data, str) else data
+    try:
+        if path.stat().st_size == len(raw) and path.read_bytes() == raw:
+            _count(WRITE_STATS, "unchanged")
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        tmp.write_bytes(raw)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    mark_written(path)
+    _count(WRITE_STATS, "written")
+    return True
+
+
+def replace_if_changed(tmp: Path, path: Path) -> bool:
+    """
+    Move the finished file `tmp` over `path`, like write_if_changed() but for
+    output streamed to disk; when `path` already holds the same bytes, `tmp`
+    is dropped and `path` keeps its mtime. Returns True when `path` changed.
+    """
+    try:
+        if path.stat().st_size == tmp.stat().st_size and filecmp.cmp(tmp, path, shallow=False):
+            tmp.unlink()
+            _count(WRITE_STATS, "unchanged")
+            return False
+    except OSError:
+        pass
+    os.replace(tmp, path)
+    mark_written(path)
+    _count(WRITE_STATS, "written")
+    return True
+
+
+# ---------- output tree ----------
+class OutputTree:
+    """
+    Directory tree of every file the build placed under `root`, filled in by
+    the phases that write (or confirm) outputs, so directory indexes can be
+    built without re-walking the output directory. Thread-safe.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._files: dict[Path, set[str]] = {}
+        self._subdirs: dict[Path, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, path: Path) -> None:
+        if self.root not in path.parents:
+            return
+        d = path.parent
+        with self._lock:
+            self._files.setdefault(d, set()).add(path.name)
+            while d != self.root:
+                names = self._subdirs.setdefault(d.parent, set())
+                if d.name in names:
+                    break
+                names.add(d.name)
+                d = d.parent
+
+    def discard(self, path: Path) -> None:
+        """Forget `path`; directories left without any output are forgotten too."""
+        if self.root not in path.parents:
+            return
+        d = path.parent
+        with self._lock:
+            self._files.get(d, set()).discard(path.name)
+            while d != self.root and not self._files.get(d) and not self._subdirs.get(d):
+                self._files.pop(d, None)
+                self._subdirs.pop(d, None)
+                self._subdirs.get(d.parent, set()).discard(d.name)
+                d = d.parent
+
+    def files(self):
+        """Every recorded file, directory by directory in sorted order."""
+        for d in self.dirs():
+            _subdirs, names = self.entries(d)
+            for name in names:
+                yield d / name
+
+    def dirs(self) -> list[Path]:
+        """Every directory holding an output, plus their ancestors, sorted."""
+        with self._lock:
+            return sorted({self.root, *self._files, *self._subdirs})
+
+    def entries(self, d: Path) -> tuple[list[str], list[str]]:
+        """(subdir names, file names) recorded directly under `d`."""
+        with self._lock:
+            return sorted(self._subdirs.get(d, ())), sorted(self._files.get(d, ()))
+
+
+# ---------- linked mirroring ----------
+LINK_MODES = ("copy", "hardlink", "reflink", "symlink")
+FICLONE = 0x40049409  # _IOW(0x94, 9, int), linux/fs.h
+
+# How each mirrored file was actually placed, reported at the end of a build.
+LINK_STATS: dict[str, int] = {}
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """Copy-on-write clone (FICLONE), else copy_file_range, which may share extents."""
+    import fcntl
+
+    with src.open("rb") as fs, dst.open("wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+            return
+        except OSError:
+            pass
+        if not hasattr(os, "copy_file_range"):
+            raise OSError("copy_file_range unavailable")
+        remaining = os.fstat(fs.fileno()).st_size
+        while remaining > 0:
+            n = os.copy_file_range(fs.fileno(), fd.fileno(), remaining)
+            if n == 0:
+                break
+            remaining -= n
+
+
+def placement(src: Path, dst: Path) -> str:
+    """How `dst` currently relates to `src`: "symlink", "hardlink" or "copy"."""
+    try:
+        if dst.is_symlink():
+            return "symlink"
+        if os.path.samefile(src, dst):
+            return "hardlink"
+    except OSError:
+        pass
+    return "copy"
+
+
+def place_file(src: Path, dst: Path, mode: str = "copy") -> str:
+    """
+    Materialize `src` at `dst` as a copy, hardlink, reflink or relative
+    symlink, falling back to a plain copy when the filesystem refuses (e.g.
+    EXDEV across devices). `dst` is replaced atomically, never written
+    through, so an old hardlink to a source file is not clobbered.
+    Returns the method that was used.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    used = "copy"
+    try:
+        try:
+            if mode == "hardlink":
+                os.link(src, tmp)
+                used = mode
+            elif mode == "symlink":
+                os.symlink(os.path.relpath(src, dst.parent), tmp)
+                used = mode
+            elif mode == "reflink":
+                _reflink(src, tmp)
+                shutil.copystat(src, tmp)
+                used = mode
+        except OSError:
+            tmp.unlink(missing_ok=True)
+        if used == "copy":
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    mark_written(dst)
+    _count(LINK_STATS, used)
+    return used
@@ -0,0 +1,122 @@
+# site_provcache.py
+
+import hashlib
+import marshal
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+import yaml
+
+# libyaml's loader is several times faster; same semantics as SafeLoader.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+FORMAT_VERSION = 1
+
+
+def safe_load(text: str | bytes):
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def _encode(obj):
+    """
+    Make a safe_load result marshal-able. safe_load never yields tuples, so
+    tagged tuples are free to carry the date/datetime values marshal lacks.
+    """
+    if isinstance(obj, dict):
+        return {_encode(k): _encode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, datetime):
+        return ("datetime", obj.isoformat())
+    if isinstance(obj, date):
+        return ("date", obj.isoformat())
+    return obj
+
+
+def _decode(obj):
+    if isinstance(obj, dict):
+        return {_decode(k): _decode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    if isinstance(obj, tuple):
+        tag, value = obj
+        if tag == "datetime":
+            return datetime.fromisoformat(value)
+        return date.fromisoformat(value)
+    return obj
+
+
+class ParsedYamlCache:
+    """
+    On-disk cache of parsed YAML files (normally .build/provenance.marshal).
+
+      stat: path -> (size, mtime_ns, sha256); a matching stat skips the read.
+      data: sha256 -> parsed document; a fresh checkout (new mtimes) re-hashes
+            each file once but still never re-parses unchanged content.
+
+    Paths are kept relative to `root`. save() rewrites the file atomically and
+    drops entries for paths not loaded since the cache was opened.
+    """
+
+    def __init__(self, cache_path: Path, root: Path):
+        self.path = cache_path
+        self.root = root
+        self._stat: dict[str, tuple[int, int, str]] = {}
+        self._data: dict[str, object] = {}
+        self._seen: set[str] = set()
+        self._dirty = False
+        self._header = (FORMAT_VERSION, yaml.__version__, SafeLoader.__name__)
+        try:
+            with cache_path.open("rb") as f:
+                blob = marshal.load(f)
+            if blob.get("header") == self._header:
+                self._stat = blob["stat"]
+                self._data = blob["data"]
+        except (OSError, EOFError, ValueError, TypeError, KeyError, AttributeError):
+            pass
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def load(self, path: Path):
+        """Parsed contents of the YAML file at `path` (None for an empty file)."""
+        key = self._key(path)
+        self._seen.add(key)
+        st = path.stat()
+        row = self._stat.get(key)
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns and row[2] in self._data:
+            self.hits += 1
+            return _decode(self._data[row[2]])
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        self._stat[key] = (st.st_size, st.st_mtime_ns, digest)
+        self._dirty = True
+        if digest in self._data:
+            self.hits += 1
+            return _decode(self._data[digest])
+
+        self.misses += 1
+        parsed = safe_load(raw.decode("utf-8"))
+        self._data[digest] = _encode(parsed)
+        return parsed
+
+    def save(self) -> None:
+        stale = self._stat.keys() - self._seen
+        if not self._dirty and not stale:
+            return
+        for key in stale:
+            del self._stat[key]
+        live = {row[2] for row in self._stat.values()}
+        self._data = {k: v for k, v in self._data.items() if k in live}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as f:
+            marshal.dump({"header": self._header, "stat": self._stat, "data": self._data}, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,172 @@
+# site_render.py
+
+import asyncio
+import itertools
+import os
+import signal
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Render priorities: lower starts first.
+PRIORITY_HTML = 0
+PRIORITY_PRINT = 1  # PDF / EPUB
+
+# Rough peak memory of one render.py job (pandoc, or LaTeX for PDFs).
+JOB_MEMORY = 1 << 30
+# Grace period between SIGTERM and SIGKILL for a timed-out or cancelled job.
+KILL_GRACE = 5.0
+TIMEOUT_RC = 124
+CANCELLED_RC = 130
+# Job output is read in chunks of this size; longer lines are printed in pieces.
+STREAM_CHUNK = 1 << 16
+
+_SEQ = itertools.count()
+
+
+@dataclass(slots=True, eq=False)
+class RenderJob:
+    """One render.py run; `returncode` is set once it has run."""
+
+    label: str
+    cmd: list[str]
+    cwd: Path
+    priority: int = PRIORITY_HTML
+    timeout: float | None = None
+    returncode: int | None = None
+    seq: int = field(default_factory=lambda: next(_SEQ))
+
+
+def available_memory() -> int | None:
+    """Bytes of memory available for new processes, or None if unknown."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_concurrency(n_jobs: int) -> int:
+    """Jobs to run at once: one per usable CPU, capped by memory headroom."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cpus
+    mem = available_memory()
+    if mem:
+        limit = min(limit, max(1, mem // JOB_MEMORY))
+    return max(1, min(limit, n_jobs))
+
+
+class RenderScheduler:
+    """
+    Runs RenderJobs as asyncio subprocesses, at most `concurrency` at once,
+    starting jobs in (priority, submission) order. Each job's output is
+    streamed line by line with a "[label]" prefix. A job that outlives its
+    timeout is killed with its whole process group (render.py and the docker
+    clients it started) and gets TIMEOUT_RC; interrupting run() does the same
+    to every running job.
+    """
+
+    def __init__(self, concurrency: int, *, env: dict[str, str] | None = None):
+        self.concurrency = max(1, concurrency)
+        self.env = env
+        self.jobs: list[RenderJob] = []
+
+    def submit(self, job: RenderJob) -> RenderJob:
+        self.jobs.append(job)
+        return job
+
+    def run(self) -> list[RenderJob]:
+        """Run every submitted job; returns them with returncode set."""
+        if self.jobs:
+            asyncio.run(self._run())
+        return self.jobs
+
+    async def _run(self) -> None:
+        pending = sorted(self.jobs, key=lambda j: (j.priority, j.seq))
+        running: set[asyncio.Task] = set()
+        try:
+            while pending or running:
+                while pending and len(running) < self.concurrency:
+                    running.add(asyncio.create_task(self._run_job(pending.pop(0))))
+                _done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+    async def _run_job(self, job: RenderJob) -> None:
+        print(f"[{job.label}] started", flush=True)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *job.cmd,
+                cwd=job.cwd,
+                env=self.env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True,
+            )
+        except OSError as e:
+            print(f"[{job.label}] could not start: {e}", flush=True)
+            job.returncode = 127
+            return
+        try:
+            job.returncode = await asyncio.wait_for(self._stream(job, proc), job.timeout)
+        except asyncio.TimeoutError:
+            print(f"[{job.label}] timed out after {job.timeout:g}s; killing", flush=True)
+            await self._kill(proc)
+            job.returncode = TIMEOUT_RC
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            job.returncode = CANCELLED_RC
+            raise
+        except Exception as e:
+            print(f"[{job.label}] lost its output stream ({e!r}); killing", flush=True)
+            await self._kill(proc)
+            job.returncode = proc.returncode if proc.returncode else 1
+        print(f"[{job.label}] finished (rc={job.returncode})", flush=True)
+
+    @staticmethod
+    async def _stream(job: RenderJob, proc: asyncio.subprocess.Process) -> int:
+        """
+        Print the job's output line by line. Read in fixed-size chunks rather
+        than readline(), which fails on a line longer than the stream limit
+        (pandoc and LaTeX can print one); such a line is printed in pieces.
+        """
+        def emit(raw: bytes) -> None:
+            print(f"[{job.label}] {raw.decode('utf-8', errors='replace')}", flush=True)
+
+        pending = b""
+        while chunk := await proc.stdout.read(STREAM_CHUNK):
+            *lines, pending = (pending + chunk).split(b"\n")
+            for raw in lines:
+                emit(raw)
+            while len(pending) >= STREAM_CHUNK:
+                emit(pending[:STREAM_CHUNK])
+                pending = pending[STREAM_CHUNK:]
+        if pending:
+            emit(pending)
+        return await proc.wait()
+
+    @staticmethod
+    async def _kill(proc: asyncio.subprocess.Process) -> None:
+        if proc.returncode is not None:
+            return
+        for sig, wait in ((signal.SIGTERM, KILL_GRACE), (signal.SIGKILL, None)):
+            try:
+                os.killpg(proc.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                break
+            try:
+                await asyncio.wait_for(proc.wait(), wait)
+                return
+            except asyncio.TimeoutError:
+                continue
@@ -0,0 +1,152 @@
+# site_sitemap.py
+
+import gzip
+import os
+import threading
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from site_output import replace_if_changed
+
+# sitemaps.org protocol limits per sitemap file (the byte limit is uncompressed).
+MAX_URLS = 50_000
+MAX_BYTES = 50 * 1024 * 1024
+
+_URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+).encode("utf-8")
+_URLSET_CLOSE = b"</urlset>\n"
+
+
+class SitemapWriter:
+    """
+    Streams <url> entries into sitemap files under `out_dir`, starting a new
+    file whenever the next entry would break MAX_URLS / MAX_BYTES, so memory
+    stays bounded by one entry.
+
+    close() publishes the result: a single uncompressed file becomes
+    `name` (sitemap.xml) itself; otherwise the files become sitemap-1.xml,
+    sitemap-2.xml, ... (".gz" with compress=True) and `name` is a sitemap index
+    pointing at them. Files are replaced only when their bytes change, and
+    shards left over from a larger sitemap are removed.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        origin: str,
+        *,
+        name: str = "sitemap.xml",
+        compress: bool = False,
+        max_urls: int = MAX_URLS,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.out_dir = out_dir
+        self.origin = origin.rstrip("/")
+        self.name = name
+        self.compress = compress
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        # (tmp path, newest lastmod) per finished shard
+        self._shards: list[tuple[Path, str]] = []
+        self._raw = None
+        self._f = None
+        self._tmp_path: Path | None = None
+        self._count = 0
+        self._size = 0
+        self._lastmod = ""
+        self.urls = 0
+
+    def _tmp(self, n: int) -> Path:
+        return self.out_dir / f".sitemap-{n}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+    def _open(self) -> None:
+        tmp = self._tmp(len(self._shards) + 1)
+        self._raw = tmp.open("wb")
+        # mtime=0 and no name in the header keep gzip output byte-stable
+        self._f = (
+            gzip.GzipFile(filename="", mode="wb", fileobj=self._raw, mtime=0)
+            if self.compress
+            else self._raw
+        )
+        self._f.write(_URLSET_OPEN)
+        self._tmp_path = tmp
+        self._count = 0
+        self._size = len(_URLSET_OPEN) + len(_URLSET_CLOSE)
+        self._lastmod = ""
+
+    def _finish(self) -> None:
+        self._f.write(_URLSET_CLOSE)
+        if self._f is not self._raw:
+            self._f.close()
+        self._raw.close()
+        self._shards.append((self._tmp_path, self._lastmod))
+        self._f = None
+
+    def add(self, loc: str, lastmod: str) -> None:
+        entry = (
+            "  <url>\n"
+            f"    <loc>{escape(loc)}</loc>\n"
+            f"    <lastmod>{lastmod}</lastmod>\n"
+            "    <changefreq>weekly</changefreq>\n"
+            "    <priority>0.6</priority>\n"
+            "  </url>\n"
+        ).encode("utf-8")
+        if self._f is not None and (
+            self._count >= self.max_urls or self._size + len(entry) > self.max_bytes
+        ):
+            self._finish()
+        if self._f is None:
+            self._open()
+        self._f.write(entry)
+        self._count += 1
+        self._size += len(entry)
+        self._lastmod = max(self._lastmod, lastmod)
+        self.urls += 1
+
+    def _shard_name(self, n: int) -> str:
+        return f"sitemap-{n}.xml" + (".gz" if self.compress else "")
+
+    def close(self) -> list[Path]:
+        """Publish the sitemap (see class doc); returns the files it consists of."""
+        if self._f is not None or not self._shards:
+            if self._f is None:
+                self._open()
+            self._finish()
+        index = self.out_dir / self.name
+        try:
+            if len(self._shards) == 1 and not self.compress:
+                replace_if_changed(self._shards[0][0], index)
+                files = [index]
+            else:
+                files = []
+                entries = []
+                for n, (tmp, lastmod) in enumerate(self._shards, start=1):
+                    dst = self.out_dir / self._shard_name(n)
+                    replace_if_changed(tmp, dst)
+                    files.append(dst)
+                    loc = escape(f"{self.origin}/{dst.name}")
+                    entries.append(
+                        f"  <sitemap>\n    <loc>{loc}</loc>\n"
+                        + (f"    <lastmod>{lastmod}</lastmod>\n" if lastmod else "")
+                        + "  </sitemap>\n"
+                    )
+                tmp = self._tmp(0)
+                tmp.write_text(
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                    + "".join(entries)
+                    + "</sitemapindex>\n",
+                    encoding="utf-8",
+                )
+                replace_if_changed(tmp, index)
+                files.append(index)
+        finally:
+            for tmp, _ in self._shards:
+                tmp.unlink(missing_ok=True)
+        keep = {p.name for p in files}
+        for old in self.out_dir.glob("sitemap-*.xml*"):
+            if old.name not in keep:
+                old.unlink()
+        return files
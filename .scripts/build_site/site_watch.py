@@ -0,0 +1,176 @@
+# site_watch.py
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _walk_dirs(root: Path, skip_dir: Callable[[Path], bool]):
+    for dirpath, dirnames, _filenames in os.walk(root):
+        d = Path(dirpath)
+        dirnames[:] = [dd for dd in dirnames if not skip_dir(d / dd)]
+        yield d
+
+
+class PollingWatcher:
+    """Portable fallback: re-stat the tree every `interval` seconds."""
+
+    kind = "polling"
+
+    def __init__(self, root: Path, skip_dir: Callable[[Path], bool], interval: float = 1.0):
+        self.root = root
+        self.skip_dir = skip_dir
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snap: dict[Path, tuple[int, int]] = {}
+        for d in _walk_dirs(self.root, self.skip_dir):
+            try:
+                entries = list(os.scandir(d))
+            except OSError:
+                continue
+            for e in entries:
+                if e.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                snap[Path(e.path)] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def wait(self) -> set[Path]:
+        """Block until something changes; return the changed paths."""
+        while True:
+            time.sleep(self.interval)
+            snap = self._scan()
+            old = self._snapshot
+            self._snapshot = snap
+            changed = set(snap.keys() ^ old.keys())
+            changed.update(p for p, sig in snap.items() if old.get(p, sig) != sig)
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify via libc; one watch per directory, added as dirs appear."""
+
+    kind = "inotify"
+
+    def __init__(self, root: Path, skip_dir: Callable[[Path], bool], debounce: float = 0.2):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root = root
+        self.skip_dir = skip_dir
+        self.debounce = debounce
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, Path] = {}
+        for d in _walk_dirs(root, skip_dir):
+            self._add(d)
+
+    def _add(self, d: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(d), WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = d
+
+    def _drain(self, changed: set[Path]) -> bool:
+        """Read pending events into `changed`; False on queue overflow."""
+        ok = True
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return ok
+            off = 0
+            while off < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, off)
+                off += _EVENT.size
+                name = buf[off:off + length].rstrip(b"\0")
+                off += length
+                if mask & IN_Q_OVERFLOW:
+                    ok = False
+                    continue
+                base = self._dirs.get(wd)
+                if base is None:
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                p = base / os.fsdecode(name) if name else base
+                changed.add(p)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    if self.skip_dir(p):
+                        continue
+                    # Files may land before the new watch exists; report them too.
+                    for d in _walk_dirs(p, self.skip_dir):
+                        self._add(d)
+                        try:
+                            changed.update(Path(e.path) for e in os.scandir(d) if e.is_file())
+                        except OSError:
+                            pass
+
+    def wait(self) -> set[Path]:
+        """Block until something changes; return the changed paths (debounced)."""
+        changed: set[Path] = set()
+        while not changed:
+            select.select([self._fd], [], [])
+            if not self._drain(changed):
+                changed.add(self.root)
+        # let editors finish their write/rename dance
+        while select.select([self._fd], [], [], self.debounce)[0]:
+            if not self._drain(changed):
+                changed.add(self.root)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_watcher(
+    root: Path,
+    skip_dir: Callable[[Path], bool],
+    *,
+    interval: float = 1.0,
+    polling: bool = False,
+):
+    """inotify when the platform has it, polling otherwise (or when asked)."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, skip_dir)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, skip_dir, interval=interval)
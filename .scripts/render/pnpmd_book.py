@@ -7,7 +7,7 @@ import shutil
 
 from pnpmd_util import title_from_book_yaml, die, run_visible
 from pnpmd_preprocess import prepare_preprocessed
-from pnpmd_pandoc import render_pdf, render_html, render_epub
+from pnpmd_pandoc import failure_summary, render_outputs
 
 
 def _split_front_matter(text: str) -> tuple[Optional[str], str]:
@@ -144,6 +144,7 @@ def render_book_yaml(
     auto_shift: bool = True,
     number_offset: Optional[str] = None,
     epub_chapter_level: Optional[int] = None,
+    jobs: int = 0,
 ) -> tuple[Optional[Path], Optional[Path]]:
     """
     Book mode:
@@ -156,7 +157,8 @@ def render_book_yaml(
               - strip its own front matter
               - inject '# <chapter title>' from that front matter (or filename)
               - append body
-      - produce <Title>.pdf / <Title>.html / <Title>.epub
+      - produce <Title>.pdf / <Title>.html / <Title>.epub (concurrently,
+        at most `jobs` at once; see render_outputs())
     """
     if not src.exists():
         die(f"Missing source: {src}")
@@ -266,26 +268,18 @@ def render_book_yaml(
     html_path = big_md_path.with_suffix(".html") if make_html else None
     epub_path = big_md_path.with_suffix(".epub") if make_epub else None
 
-    if make_pdf:
-        out_pdf = in_tmp.parent / "out.pdf"
-        rc = render_pdf(in_tmp, out_pdf, meta_args, shift_args, common_args, timeout)
-        if rc != 0:
-            die(f"Docker pandoc (PDF) failed (rc={rc})")
-        shutil.copy2(out_pdf, pdf_path)
-
-    if make_html:
-        out_html = in_tmp.parent / "out.html"
-        rc = render_html(in_tmp, out_html, meta_args, shift_args, common_args, timeout)
-        if rc != 0:
-            die(f"Docker pandoc (HTML) failed (rc={rc})")
-        shutil.copy2(out_html, html_path)
-
-    if make_epub:
-        out_epub = in_tmp.parent / "out.epub"
-        rc = render_epub(in_tmp, out_epub, meta_args, shift_args, common_args, timeout)
-        if rc != 0:
-            die(f"Docker pandoc (EPUB) failed (rc={rc})")
-        shutil.copy2(out_epub, epub_path)
+    dests = {
+        fmt: path
+        for fmt, path in (("pdf", pdf_path), ("html", html_path), ("epub", epub_path))
+        if path
+    }
+    rcs = render_outputs(in_tmp, dests, meta_args, shift_args, common_args, timeout, jobs=jobs)
+    failed = failure_summary(rcs)
+    if failed:
+        wrote = [str(p) for fmt, p in dests.items() if rcs[fmt] == 0]
+        if wrote:
+            print("✅ Wrote " + ", ".join(wrote))
+        die(failed)
 
     wrote = [
         str(p)
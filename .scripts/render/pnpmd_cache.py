@@ -0,0 +1,83 @@
+# pnpmd_cache.py
+
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+# PNPMD_CACHE_DIR=<dir> moves the cache; "" / "off" disables it.
+# Default: $XDG_CACHE_HOME/pnpmd (~/.cache/pnpmd).
+CACHE_ENV = "PNPMD_CACHE_DIR"
+
+
+def cache_root() -> Optional[Path]:
+    raw = os.environ.get(CACHE_ENV)
+    if raw is not None:
+        raw = raw.strip()
+        if not raw or raw.lower() in ("0", "off", "none"):
+            return None
+        return Path(raw).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "pnpmd"
+
+
+def content_key(*parts: Union[str, bytes, Path, list, tuple]) -> str:
+    """sha256 over `parts` (files by content, lists element-wise), unambiguously framed."""
+    h = hashlib.sha256()
+
+    def feed(part) -> None:
+        if isinstance(part, (list, tuple)):
+            h.update(b"L%d:" % len(part))
+            for p in part:
+                feed(p)
+            return
+        if isinstance(part, Path):
+            data = part.read_bytes()
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = part
+        h.update(b"%d:" % len(data))
+        h.update(data)
+
+    for part in parts:
+        feed(part)
+    return h.hexdigest()
+
+
+def _entry(kind: str, key: str, suffix: str) -> Optional[Path]:
+    root = cache_root()
+    if root is None:
+        return None
+    return root / kind / key[:2] / f"{key}{suffix}"
+
+
+def cache_get(kind: str, key: str, dest: Path) -> bool:
+    """Copy the cached `kind` entry for `key` to `dest`; False on a miss."""
+    entry = _entry(kind, key, dest.suffix)
+    if entry is None or not entry.is_file():
+        return False
+    try:
+        shutil.copyfile(entry, dest)
+    except OSError:
+        return False
+    return True
+
+
+def cache_put(kind: str, key: str, src: Path) -> None:
+    """Store `src` as the `kind` entry for `key` (atomic; errors are ignored)."""
+    entry = _entry(kind, key, src.suffix)
+    if entry is None:
+        return
+    tmp = entry.with_name(f".{entry.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, entry)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
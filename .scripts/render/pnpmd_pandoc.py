@@ -1,39 +1,362 @@
 # pnpmd_pandoc.py
 
+import atexit
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from pnpmd_util import run_visible
+from pnpmd_cache import cache_get, cache_put, content_key
+from pnpmd_util import captured_output, log, run_visible
 
+PANDOC_IMAGE = "pandoc/extra"
 
-def render_pdf(
+# Backend selection (environment):
+#   PNPMD_PANDOC_BACKEND=worker   (default) one long-lived container per process,
+#                                 conversions submitted with `docker exec`
+#   PNPMD_PANDOC_BACKEND=oneshot  a fresh `docker run --rm` per conversion
+#   PNPMD_PANDOC_WORKER=<name>    use this already-running worker container
+#                                 (e.g. started by build_site.py) instead of
+#                                 starting one; it is not stopped on exit
+#   PNPMD_PANDOC_WORKDIR=<dir>    the directory that shared worker mounts;
+#                                 work dirs are created under it
+BACKEND_ENV = "PNPMD_PANDOC_BACKEND"
+WORKER_ENV = "PNPMD_PANDOC_WORKER"
+WORKDIR_ENV = "PNPMD_PANDOC_WORKDIR"
+
+_WORK_ROOT: Optional[Path] = None
+_WORK_ROOT_LOCK = threading.Lock()
+
+
+def work_root() -> Path:
+    """
+    Parent of every conversion's working directory, and the only host path
+    the worker container mounts. Taken from WORKDIR_ENV when a shared worker
+    owns it; otherwise a private temp dir created on first use and removed at
+    exit.
+    """
+    global _WORK_ROOT
+    with _WORK_ROOT_LOCK:
+        if _WORK_ROOT is None:
+            shared = os.environ.get(WORKDIR_ENV, "").strip()
+            if shared:
+                _WORK_ROOT = Path(shared).resolve()
+            else:
+                _WORK_ROOT = Path(tempfile.mkdtemp(prefix="pnpmd-work-")).resolve()
+                atexit.register(shutil.rmtree, _WORK_ROOT, True)
+        return _WORK_ROOT
+
+
+def make_workdir(prefix: str = "pnpmd_") -> Path:
+    """A new working directory for one document (in.md, ASTs, outputs)."""
+    return Path(tempfile.mkdtemp(prefix=prefix, dir=work_root()))
+
+
+class PandocWorker:
+    """
+    A detached `pandoc/extra` container that idles until conversions are
+    submitted to it with `docker exec`, so container startup is paid once per
+    worker instead of once per format.
+
+    Only work_root() (where make_workdir() puts in.md) is bind-mounted, at the
+    same path inside the container, so a conversion runs in the same working
+    directory it would use on the host and anything the container writes as
+    root stays inside that directory.
+    """
+
+    def __init__(self, name: Optional[str] = None, *, image: str = PANDOC_IMAGE):
+        self.name = name or f"pnpmd-pandoc-{os.getpid()}"
+        self.image = image
+        self.mount = work_root()
+        self.owned = False
+
+    def start(self) -> bool:
+        """Start the container; False when docker refuses (caller falls back)."""
+        cmd = [
+            "docker",
+            "run",
+            "-d",
+            "--rm",
+            "--name",
+            self.name,
+            "--mount",
+            f"type=bind,source={self.mount},target={self.mount}",
+            "--entrypoint",
+            "tail",
+            self.image,
+            "-f",
+            "/dev/null",
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+        except OSError:
+            return False
+        if proc.returncode != 0:
+            log(f"NOTE: pandoc worker did not start: {proc.stderr.strip()}")
+            return False
+        self.owned = True
+        return True
+
+    def running(self) -> bool:
+        try:
+            proc = subprocess.run(
+                ["docker", "inspect", "-f", "{{.State.Running}}", self.name],
+                capture_output=True,
+                text=True,
+            )
+        except OSError:
+            return False
+        return proc.returncode == 0 and proc.stdout.strip() == "true"
+
+    def stop(self) -> None:
+        if not self.owned:
+            return
+        self.owned = False
+        # files pandoc/LaTeX created as root can only be removed from inside
+        subprocess.run(
+            ["docker", "exec", self.name, "find", str(self.mount), "-mindepth", "1", "-delete"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # `tail` as PID 1 ignores SIGTERM; remove at once instead of waiting
+        subprocess.run(
+            ["docker", "rm", "-f", self.name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def covers(self, workdir: Path) -> bool:
+        workdir = workdir.resolve()
+        return workdir == self.mount or self.mount in workdir.parents
+
+    def command(self, workdir: Path, argv: List[str], timeout: int = 0) -> List[str]:
+        cmd = ["docker", "exec", "-w", str(workdir.resolve()), self.name]
+        if timeout:
+            # stop the tool inside the container too, not just the exec client
+            cmd += ["timeout", str(timeout)]
+        return cmd + argv
+
+
+_WORKER: Optional[PandocWorker] = None
+_WORKER_FAILED = False
+_WORKER_LOCK = threading.Lock()
+
+
+def pandoc_worker() -> Optional[PandocWorker]:
+    """
+    The worker this process submits conversions to, started on first use and
+    stopped at exit; None selects one-shot containers (see BACKEND_ENV).
+    """
+    with _WORKER_LOCK:
+        return _pandoc_worker()
+
+
+def _pandoc_worker() -> Optional[PandocWorker]:
+    global _WORKER, _WORKER_FAILED
+    if _WORKER is not None or _WORKER_FAILED:
+        return _WORKER
+    if os.environ.get(BACKEND_ENV, "worker").strip().lower() == "oneshot":
+        _WORKER_FAILED = True
+        return None
+    shared = os.environ.get(WORKER_ENV, "").strip()
+    if shared and not os.environ.get(WORKDIR_ENV, "").strip():
+        log(f"NOTE: pandoc worker {shared!r} given without {WORKDIR_ENV}; using one-shot containers")
+        _WORKER_FAILED = True
+        return None
+    worker = PandocWorker(shared or None)
+    if shared:
+        ok = worker.running()
+        if not ok:
+            log(f"NOTE: pandoc worker {shared!r} is not running; using one-shot containers")
+    else:
+        ok = worker.start()
+        if ok:
+            atexit.register(worker.stop)
+    if not ok:
+        _WORKER_FAILED = True
+        return None
+    _WORKER = worker
+    return worker
+
+
+def _oneshot_command(workdir: Path, argv: List[str]) -> List[str]:
+    entry = [] if argv[0] == "pandoc" else ["--entrypoint", argv[0]]
+    return [
+        "docker",
+        "run",
+        "--rm",
+        "--mount",
+        f"type=bind,source={str(workdir)},target=/data",
+        "-w",
+        "/data",
+        *entry,
+        PANDOC_IMAGE,
+        *argv[1:],
+    ]
+
+
+def run_tool(workdir: Path, argv: List[str], timeout: int) -> int:
+    """Run `argv` from the pandoc image in `workdir` (worker if available, else one-shot)."""
+    worker = pandoc_worker()
+    if worker is not None and worker.covers(workdir):
+        return run_visible(worker.command(workdir, argv, timeout), timeout=timeout)
+    return run_visible(_oneshot_command(workdir, argv), timeout=timeout)
+
+
+def run_pandoc(workdir: Path, pandoc_args: List[str], timeout: int) -> int:
+    return run_tool(workdir, ["pandoc", *pandoc_args], timeout)
+
+
+_IMAGE_ID: Optional[str] = None
+
+
+def image_id() -> str:
+    """Content id of PANDOC_IMAGE (cache keys change with the image); "" if unknown."""
+    global _IMAGE_ID
+    if _IMAGE_ID is None:
+        try:
+            proc = subprocess.run(
+                ["docker", "image", "inspect", "-f", "{{.Id}}", PANDOC_IMAGE],
+                capture_output=True,
+                text=True,
+            )
+            _IMAGE_ID = proc.stdout.strip() if proc.returncode == 0 else ""
+        except OSError:
+            _IMAGE_ID = ""
+    return _IMAGE_ID
+
+
+# ---------- AST stage ----------
+# pandoc reads the document and runs pandoc-crossref once per output target,
+# writing the filtered JSON AST (ast.<target>.json); the writer then starts
+# from it with `-f json`. The filtered ASTs are kept in the content-addressed
+# cache (pnpmd_cache), so an unchanged document skips reading and filtering on
+# later runs.
+#
+# A JSON filter gets the writer name as argv[1] and pandoc-crossref branches
+# on it, so it must see what the inline `--filter pandoc-crossref` call of a
+# direct conversion passed ("latex" for PDF), not "json". It runs through a
+# one-line wrapper (crossref-<target>) from the reading pandoc itself, which
+# also gives it the same PANDOC_VERSION / PANDOC_READER_OPTIONS environment.
+CROSSREF_TARGET = {"pdf": "latex", "html": "html5", "epub": "epub3"}
+
+_AST_LOCKS: Dict[Path, threading.Lock] = {}
+_AST_LOCKS_GUARD = threading.Lock()
+
+
+def _ast_lock(path: Path) -> threading.Lock:
+    with _AST_LOCKS_GUARD:
+        return _AST_LOCKS.setdefault(path, threading.Lock())
+
+
+def split_reader_args(common_args: List[str]) -> Tuple[List[str], List[str]]:
+    """Split common_args into reader options (-f/--from) and writer options."""
+    reader: List[str] = []
+    writer: List[str] = []
+    it = iter(common_args)
+    for a in it:
+        if a in ("-f", "--from", "-r", "--read"):
+            reader += [a, next(it, "")]
+        elif a.startswith(("--from=", "--read=")):
+            reader.append(a)
+        else:
+            writer.append(a)
+    return reader, writer
+
+
+def _crossref_wrapper(workdir: Path, target: str) -> Path:
+    """Executable filter in `workdir` running pandoc-crossref for `target`."""
+    wrapper = workdir / f"crossref-{target}"
+    wrapper.write_text(f"#!/bin/sh\nexec pandoc-crossref {shlex.quote(target)}\n", encoding="utf-8")
+    wrapper.chmod(0o755)
+    return wrapper
+
+
+def filtered_ast(
+    in_tmp: Path,
+    fmt: str,
+    meta_args: List[str],
+    shift_args: List[str],
+    common_args: List[str],
+    timeout: int,
+) -> Tuple[int, Path]:
+    """
+    The crossref-filtered AST for output `fmt` ("pdf" / "html" / "epub") next
+    to in_tmp, built or restored from the cache on first use.
+    """
+    target = CROSSREF_TARGET[fmt]
+    out = in_tmp.parent / f"ast.{target}.json"
+    reader_args, _ = split_reader_args(common_args)
+    key = content_key("ast-crossref", image_id(), target, in_tmp, reader_args, shift_args, meta_args)
+    with _ast_lock(out):
+        if out.exists() or cache_get("ast-crossref", key, out):
+            return 0, out
+        wrapper = _crossref_wrapper(in_tmp.parent, target)
+        rc = run_pandoc(
+            in_tmp.parent,
+            [
+                *reader_args,
+                *shift_args,
+                *meta_args,
+                "--filter",
+                f"./{wrapper.name}",
+                in_tmp.name,
+                "-t",
+                "json",
+                "-o",
+                out.name,
+            ],
+            timeout,
+        )
+        if rc == 0:
+            cache_put("ast-crossref", key, out)
+        else:
+            out.unlink(missing_ok=True)
+        return rc, out
+
+
+def _convert(
     in_tmp: Path,
     out_tmp: Path,
     meta_args: List[str],
     shift_args: List[str],
     common_args: List[str],
     timeout: int,
+    fmt: str,
+    writer_args: List[str],
 ) -> int:
-    cmd = [
-        "docker",
-        "run",
-        "--rm",
-        "--mount",
-        f"type=bind,source={str(in_tmp.parent)},target=/data",
-        "-w",
-        "/data",
-        "pandoc/extra",
+    rc, ast = filtered_ast(in_tmp, fmt, meta_args, shift_args, common_args, timeout)
+    if rc != 0:
+        return rc
+    _, options = split_reader_args(common_args)
+    args = [
         "--standalone",
-        *common_args,
-        *shift_args,
-        *meta_args,
-        "--filter",
-        "pandoc-crossref",
-        "in.md",
+        *options,
+        "-f",
+        "json",
+        ast.name,
+        *writer_args,
         "-o",
         out_tmp.name,
     ]
-    return run_visible(cmd, timeout=timeout)
+    return run_pandoc(in_tmp.parent, args, timeout)
+
+
+def render_pdf(
+    in_tmp: Path,
+    out_tmp: Path,
+    meta_args: List[str],
+    shift_args: List[str],
+    common_args: List[str],
+    timeout: int,
+) -> int:
+    return _convert(in_tmp, out_tmp, meta_args, shift_args, common_args, timeout, "pdf", [])
 
 
 def render_html(
@@ -44,28 +367,9 @@ def render_html(
     common_args: List[str],
     timeout: int,
 ) -> int:
-    cmd = [
-        "docker",
-        "run",
-        "--rm",
-        "--mount",
-        f"type=bind,source={str(in_tmp.parent)},target=/data",
-        "-w",
-        "/data",
-        "pandoc/extra",
-        "--standalone",
-        *common_args,
-        *shift_args,
-        *meta_args,
-        "--filter",
-        "pandoc-crossref",
-        "in.md",
-        "-t",
-        "html5",
-        "-o",
-        out_tmp.name,
-    ]
-    return run_visible(cmd, timeout=timeout)
+    return _convert(
+        in_tmp, out_tmp, meta_args, shift_args, common_args, timeout, "html", ["-t", "html5"]
+    )
 
 
 def render_epub(
@@ -76,25 +380,116 @@ def render_epub(
     common_args: List[str],
     timeout: int,
 ) -> int:
-    cmd = [
-        "docker",
-        "run",
-        "--rm",
-        "--mount",
-        f"type=bind,source={str(in_tmp.parent)},target=/data",
-        "-w",
-        "/data",
-        "pandoc/extra",
-        "--standalone",
-        *common_args,
-        *shift_args,
-        *meta_args,
-        "--filter",
-        "pandoc-crossref",
-        "in.md",
-        "-t",
-        "epub3",
-        "-o",
-        out_tmp.name,
-    ]
-    return run_visible(cmd, timeout=timeout)
+    return _convert(
+        in_tmp, out_tmp, meta_args, shift_args, common_args, timeout, "epub", ["-t", "epub3"]
+    )
+
+
+RENDERERS = {"pdf": render_pdf, "html": render_html, "epub": render_epub}
+
+# Files pandoc (or filtered_ast) writes next to in.md; everything else there is an input.
+_DERIVED_RE = re.compile(r"^(?:ast\.\w+\.json|out\.\w+|crossref-\w+)$")
+
+
+def output_key(
+    in_tmp: Path,
+    fmt: str,
+    meta_args: List[str],
+    shift_args: List[str],
+    common_args: List[str],
+) -> str:
+    """
+    Cache key of one rendered output: in.md and every other input file in its
+    directory (e.g. a book cover), the pandoc arguments, the format and the
+    pandoc image.
+    """
+    inputs = sorted(
+        p for p in in_tmp.parent.iterdir() if p.is_file() and not _DERIVED_RE.match(p.name)
+    )
+    files = [[p.name, p] for p in inputs]
+    return content_key("out", image_id(), fmt, files, meta_args, shift_args, common_args)
+
+
+def render_format(
+    fmt: str,
+    in_tmp: Path,
+    out_tmp: Path,
+    meta_args: List[str],
+    shift_args: List[str],
+    common_args: List[str],
+    timeout: int,
+) -> int:
+    """
+    Render `fmt` ("pdf" / "html" / "epub") to out_tmp, restoring it from the
+    output cache without starting a container when the same inputs were
+    rendered before.
+    """
+    key = output_key(in_tmp, fmt, meta_args, shift_args, common_args)
+    if cache_get(f"out-{fmt}", key, out_tmp):
+        log(f"Cached {fmt.upper()} (key {key[:12]})")
+        return 0
+    rc = RENDERERS[fmt](in_tmp, out_tmp, meta_args, shift_args, common_args, timeout)
+    if rc == 0 and out_tmp.is_file():
+        cache_put(f"out-{fmt}", key, out_tmp)
+    return rc
+
+
+# Serializes the per-format blocks printed by render_outputs().
+_PRINT_LOCK = threading.Lock()
+
+
+def render_outputs(
+    in_tmp: Path,
+    dests: Dict[str, Path],
+    meta_args: List[str],
+    shift_args: List[str],
+    common_args: List[str],
+    timeout: int,
+    *,
+    jobs: int = 0,
+) -> Dict[str, int]:
+    """
+    Render every format in `dests` ({"pdf": path, ...}) from the same in_tmp,
+    up to `jobs` at once (0 => all formats in parallel), HTML first, and copy
+    each output that succeeded to its destination. With more than one job,
+    each format's output is captured and printed as one "[fmt]"-prefixed
+    block when it finishes. Returns the exit code per format; one failure
+    never stops the other formats.
+    """
+    workers = max(1, min(jobs or len(dests), len(dests)))
+    # the page readers open first; PDF (LaTeX) is the slowest to finish
+    order = sorted(dests, key=lambda fmt: fmt != "html")
+
+    def one(fmt: str) -> int:
+        out_tmp = in_tmp.parent / f"out.{fmt}"
+        try:
+            rc = render_format(fmt, in_tmp, out_tmp, meta_args, shift_args, common_args, timeout)
+            if rc == 0:
+                shutil.copy2(out_tmp, dests[fmt])
+        except Exception as e:
+            log(f"ERROR: {fmt.upper()}: {e}")
+            rc = 1
+        return rc
+
+    if workers == 1:
+        rcs = {fmt: one(fmt) for fmt in order}
+        return {fmt: rcs[fmt] for fmt in dests}
+
+    def captured(fmt: str) -> int:
+        with captured_output() as lines:
+            rc = one(fmt)
+        status = "ok" if rc == 0 else f"failed (rc={rc})"
+        block = [f"[{fmt}] {line}" for line in lines] + [f"[{fmt}] {status}"]
+        with _PRINT_LOCK:
+            print("\n".join(block), flush=True)
+        return rc
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {fmt: ex.submit(captured, fmt) for fmt in order}
+        return {fmt: futures[fmt].result() for fmt in dests}
+
+
+def failure_summary(rcs: Dict[str, int]) -> Optional[str]:
+    """"Docker pandoc failed: PDF (rc=1), ..." for the failed formats, or None."""
+    failed = [f"{fmt.upper()} (rc={rc})" for fmt, rc in rcs.items() if rc != 0]
+    return "Docker pandoc failed: " + ", ".join(failed) if failed else None
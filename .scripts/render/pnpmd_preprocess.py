@@ -1,10 +1,10 @@
 # pnpmd_preprocess.py
 
 import re
-import tempfile
 from pathlib import Path
 from typing import Optional, Tuple, Set, Dict, List
 
+from pnpmd_pandoc import make_workdir
 from pnpmd_util import find_repo_root, load_map
 
 # ---------- Protection of code, math ----------
@@ -348,7 +348,7 @@ def prepare_preprocessed(
         body2 = insert_toc_after_keywords_content(body2)
         body2, has_toc_marker = replace_toc_marker(body2)
 
-    tmpdir = Path(tempfile.mkdtemp(prefix="pnpmd_"))
+    tmpdir = make_workdir()
     in_tmp = tmpdir / "in.md"
     text_for_pandoc = keep_head + (body2 if not omit_toc else body)
     in_tmp.write_text(text_for_pandoc, encoding="utf-8")
@@ -3,13 +3,41 @@
 import re
 import subprocess
 import sys
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
+
+
+# Per-thread output capture (see captured_output()); unset => print directly.
+_CAPTURE = threading.local()
+
+
+@contextmanager
+def captured_output() -> Iterator[List[str]]:
+    """
+    Collect what log() and run_visible() would print in this thread into the
+    yielded list instead, so concurrent jobs can report one block each.
+    """
+    prev = getattr(_CAPTURE, "lines", None)
+    _CAPTURE.lines = lines = []
+    try:
+        yield lines
+    finally:
+        _CAPTURE.lines = prev
+
+
+def log(msg: str) -> None:
+    lines = getattr(_CAPTURE, "lines", None)
+    if lines is None:
+        print(msg, flush=True)
+    else:
+        lines.extend(msg.splitlines() or [""])
 
 
 def echo_cmd(cmd_list: List[str]):
-    print("+", " ".join(_quote(x) for x in cmd_list), flush=True)
+    log("+ " + " ".join(_quote(x) for x in cmd_list))
 
 
 def _quote(s: str) -> str:
@@ -19,22 +47,29 @@ def _quote(s: str) -> str:
 
 def run_visible(cmd_list: List[str], *, timeout: int = 0) -> int:
     echo_cmd(cmd_list)
-    start = time.time()
+    lines = getattr(_CAPTURE, "lines", None)
     import subprocess as sp
     try:
-        p = sp.Popen(cmd_list)
-        while True:
-            if p.poll() is not None:
-                return p.returncode
-            if timeout and time.time() - start > timeout:
-                try:
-                    p.terminate()
-                    time.sleep(0.5)
-                    p.kill()
-                except Exception:
-                    pass
-                return 124
-            time.sleep(0.1)
+        if lines is None:
+            p = sp.Popen(cmd_list)
+        else:
+            p = sp.Popen(cmd_list, stdout=sp.PIPE, stderr=sp.STDOUT, text=True, errors="replace")
+        try:
+            out, _ = p.communicate(timeout=timeout or None)
+        except sp.TimeoutExpired:
+            try:
+                p.terminate()
+                time.sleep(0.5)
+                p.kill()
+                out, _ = p.communicate()
+            except Exception:
+                out = ""
+            if lines is not None and out:
+                lines.extend(out.splitlines())
+            return 124
+        if lines is not None and out:
+            lines.extend(out.splitlines())
+        return p.returncode
     except KeyboardInterrupt:
         try:
             p.kill()
@@ -2,11 +2,13 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import os
 from pathlib import Path
 from typing import Optional
 
 from pnpmd_preprocess import prepare_preprocessed
-from pnpmd_pandoc import render_pdf, render_html, render_epub
+from pnpmd_cache import CACHE_ENV
+from pnpmd_pandoc import BACKEND_ENV, failure_summary, make_workdir, render_outputs
 from pnpmd_book import render_book_yaml
 from pnpmd_util import discover_md_in_cwd, die
 
@@ -26,9 +28,11 @@ def render(
     auto_shift: bool = True,
     number_offset: Optional[str] = None,
     epub_chapter_level: Optional[int] = None,
+    jobs: int = 0,
 ) -> tuple[Optional[Path], Optional[Path]]:
     """
-    Main render entrypoint.
+    Main render entrypoint. The requested formats render concurrently, at
+    most `jobs` at once (0 => one per format).
 
     Returns: (pdf_path or None, html_path or None)
     """
@@ -51,14 +55,12 @@ def render(
             auto_shift=auto_shift,
             number_offset=number_offset,
             epub_chapter_level=epub_chapter_level,
+            jobs=jobs,
         )
 
     # --- Normal (single .md) mode ---
     if as_is:
-        from tempfile import mkdtemp
-        import shutil
-
-        tmpdir = Path(mkdtemp(prefix="pnpmd_"))
+        tmpdir = make_workdir()
         in_tmp = tmpdir / "in.md"
         in_tmp.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
 
@@ -85,33 +87,18 @@ def render(
         html_path = src.with_suffix(".html") if make_html else None
         epub_path = src.with_suffix(".epub") if make_epub else None
 
-        if make_pdf:
-            out_pdf = tmpdir / "out.pdf"
-            rc = render_pdf(in_tmp, out_pdf, [], shift_args, common_args, timeout)
-            if rc != 0:
-                die(f"Docker pandoc (PDF) failed (rc={rc})")
-            shutil.copy2(out_pdf, pdf_path)
-
-        if make_html:
-            out_html = tmpdir / "out.html"
-            rc = render_html(in_tmp, out_html, [], shift_args, common_args, timeout)
-            if rc != 0:
-                die(f"Docker pandoc (HTML) failed (rc={rc})")
-            shutil.copy2(out_html, html_path)
-
-        if make_epub:
-            out_epub = tmpdir / "out.epub"
-            rc = render_epub(in_tmp, out_epub, [], shift_args, common_args, timeout)
-            if rc != 0:
-                die(f"Docker pandoc (EPUB) failed (rc={rc})")
-            shutil.copy2(out_epub, epub_path)
-
-        if make_pdf:
-            print(f"✅ Wrote {pdf_path}")
-        if make_html:
-            print(f"✅ Wrote {html_path}")
-        if make_epub:
-            print(f"✅ Wrote {epub_path}")
+        dests = {
+            fmt: path
+            for fmt, path in (("pdf", pdf_path), ("html", html_path), ("epub", epub_path))
+            if path
+        }
+        rcs = render_outputs(in_tmp, dests, [], shift_args, common_args, timeout, jobs=jobs)
+        for fmt, path in dests.items():
+            if rcs[fmt] == 0:
+                print(f"✅ Wrote {path}")
+        failed = failure_summary(rcs)
+        if failed:
+            die(failed)
 
         return (
             pdf_path.resolve() if pdf_path else None,
@@ -134,28 +121,18 @@ def render(
     html_path = src.with_suffix(".html") if make_html else None
     epub_path = src.with_suffix(".epub") if make_epub else None
 
-    import shutil
-
-    if make_pdf:
-        out_pdf = in_tmp.parent / "out.pdf"
-        rc = render_pdf(in_tmp, out_pdf, meta_args, shift_args, common_args, timeout)
-        if rc != 0:
-            die(f"Docker pandoc (PDF) failed (rc={rc})")
-        shutil.copy2(out_pdf, pdf_path)
-
-    if make_html:
-        out_html = in_tmp.parent / "out.html"
-        rc = render_html(in_tmp, out_html, meta_args, shift_args, common_args, timeout)
-        if rc != 0:
-            die(f"Docker pandoc (HTML) failed (rc={rc})")
-        shutil.copy2(out_html, html_path)
-
-    if make_epub:
-        out_epub = in_tmp.parent / "out.epub"
-        rc = render_epub(in_tmp, out_epub, meta_args, shift_args, common_args, timeout)
-        if rc != 0:
-            die(f"Docker pandoc (EPUB) failed (rc={rc})")
-        shutil.copy2(out_epub, epub_path)
+    dests = {
+        fmt: path
+        for fmt, path in (("pdf", pdf_path), ("html", html_path), ("epub", epub_path))
+        if path
+    }
+    rcs = render_outputs(in_tmp, dests, meta_args, shift_args, common_args, timeout, jobs=jobs)
+    failed = failure_summary(rcs)
+    if failed:
+        wrote = [str(p) for fmt, p in dests.items() if rcs[fmt] == 0]
+        if wrote:
+            print("✅ Wrote " + ", ".join(wrote))
+        die(failed)
 
     wrote = [str(p) for p in [pdf_path, html_path, epub_path, final_pandoc_md] if p]
     print("✅ Wrote " + ", ".join(wrote))
@@ -166,7 +143,7 @@ def render(
     )
 
 
-def main(argv=None):
+def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(
         description="PNPMD → PDF/HTML/EPUB (Pandoc + crossref; TOC after Keywords; spacing; link/anchor sugar)."
     )
@@ -214,20 +191,47 @@ def main(argv=None):
         type=int,
         help="Heading level to start new EPUB chapters (pandoc --epub-chapter-level).",
     )
-
-    g = ap.add_mutually_exclusive_group()
-    g.add_argument("--pdf", action="store_true", help="Render PDF only.")
-    g.add_argument("--html", action="store_true", help="Render HTML only.")
     ap.add_argument(
-        "--epub",
+        "--pandoc-backend",
+        choices=("worker", "oneshot"),
+        help="worker: one long-lived pandoc container, conversions via `docker exec` "
+        "(default); oneshot: a fresh `docker run --rm` per format.",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Formats rendered at once (default: all requested; 1 renders them in turn).",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        help=f"Render cache directory (pandoc ASTs and outputs by content hash); "
+        f"default ${CACHE_ENV} or ~/.cache/pnpmd.",
+    )
+    ap.add_argument(
+        "--no-cache",
         action="store_true",
-        help="Also render EPUB in addition to PDF/HTML selection.",
+        help="Neither read nor write the render cache.",
     )
-    g.add_argument(
-        "--all", action="store_true", help="Render both PDF and HTML (default)."
+
+    # Format flags combine: --html --pdf renders both in one run.
+    ap.add_argument("--pdf", action="store_true", help="Render PDF.")
+    ap.add_argument("--html", action="store_true", help="Render HTML.")
+    ap.add_argument("--epub", action="store_true", help="Render EPUB.")
+    ap.add_argument(
+        "--all", action="store_true", help="Render PDF, HTML and EPUB."
     )
+    return ap
 
-    args = ap.parse_args(argv)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.pandoc_backend:
+        os.environ[BACKEND_ENV] = args.pandoc_backend
+    if args.no_cache:
+        os.environ[CACHE_ENV] = "off"
+    elif args.cache_dir:
+        os.environ[CACHE_ENV] = args.cache_dir
 
     try:
         make_pdf = args.pdf or args.all
@@ -248,6 +252,7 @@ def main(argv=None):
             auto_shift=not args.no_auto_shift,
             number_offset=args.number_offset,
             epub_chapter_level=args.epub_chapter_level,
+            jobs=args.jobs,
         )
     except SystemExit:
         raise
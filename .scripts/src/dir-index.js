@@ -0,0 +1,139 @@
+// Directory indexes: the page ships sorted by name; other sorts
+// (Sort: links, index.html#sort=<key>&page=<n>) re-render the listing from
+// the directory's index.json, which for long listings names the other
+// chunks (index.p2.json, ...) to load. Sort keys map to entry fields.
+(function () {
+    var FIELDS = { modified: "mtime", created: "ctime" };
+    var listing = null;
+
+    function esc(s) {
+        return String(s).replace(/&/g, "&amp;").replace(/</g, "&lt;")
+            .replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+    }
+
+    function pad(s, n) {
+        while (s.length < n) s += " ";
+        return s;
+    }
+
+    function stamp(sec) {
+        var d = new Date(sec * 1000);
+        function two(n) { return (n < 10 ? "0" : "") + n; }
+        return d.getUTCFullYear() + "-" + two(d.getUTCMonth() + 1) + "-" + two(d.getUTCDate()) +
+            " " + two(d.getUTCHours()) + ":" + two(d.getUTCMinutes());
+    }
+
+    function row(e) {
+        var name = esc(e.name), cell;
+        if (e.is_dir) {
+            cell = '📂 <a href="' + esc(e.href) + '">' + name + "/</a>";
+        } else if (e.href) {
+            cell = '<a href="' + esc(e.href) + '">📄 ' + name + "</a>";
+            var extra = [];
+            for (var label in (e.links || {})) {
+                extra.push('<a href="' + esc(e.links[label]) + '">' + esc(label) + "</a>");
+            }
+            if (extra.length) cell += " (" + extra.join(", ") + ")";
+        } else {
+            cell = "📄 " + name;
+        }
+        return pad(stamp(e.mtime), 16) + "  " + cell;
+    }
+
+    function compare(key) {
+        var field = FIELDS[key] || key;
+        return function (a, b) {
+            var x = key === "name" ? (a.is_dir ? 0 : 1) : (a[field] || 0);
+            var y = key === "name" ? (b.is_dir ? 0 : 1) : (b[field] || 0);
+            if (x !== y) return x < y ? -1 : 1;
+            var m = a.name.toLowerCase(), n = b.name.toLowerCase();
+            return m < n ? -1 : m > n ? 1 : 0;
+        };
+    }
+
+    function load(url) {
+        if (listing) return Promise.resolve(listing);
+        var base = url.slice(0, url.lastIndexOf("/") + 1);
+        function get(u) { return fetch(u).then(function (r) { return r.json(); }); }
+        return get(url).then(function (first) {
+            var rest = (first.chunks || []).slice(1).map(function (c) { return get(base + c); });
+            return Promise.all(rest).then(function (chunks) {
+                var entries = first.entries.slice();
+                for (var i = 0; i < chunks.length; i++) entries = entries.concat(chunks[i].entries);
+                listing = { dir: first.dir, entries: entries };
+                return listing;
+            });
+        });
+    }
+
+    function pager(table, key, page, pages) {
+        var el = document.querySelector(".dir-index-pager");
+        if (pages <= 1) {
+            if (el) el.innerHTML = "";
+            return;
+        }
+        if (!el) {
+            el = document.createElement("div");
+            el.className = "dir-index-pager";
+            table.parentNode.insertBefore(el, table);
+        }
+        var nav = [];
+        if (page > 1) nav.push('<a href="#sort=' + key + "&page=" + (page - 1) + '" data-page-link="' + (page - 1) + '">← prev</a>');
+        if (page < pages) nav.push('<a href="#sort=' + key + "&page=" + (page + 1) + '" data-page-link="' + (page + 1) + '">next →</a>');
+        el.innerHTML = "Page " + page + " of " + pages + ": " + nav.join(" | ");
+    }
+
+    function render(table, key, dir, page) {
+        var entries = listing.entries.slice().sort(compare(key));
+        if (dir === "desc") entries.reverse();
+        var size = +table.getAttribute("data-page-size") || 0;
+        var pages = size ? Math.max(1, Math.ceil(entries.length / size)) : 1;
+        page = Math.min(Math.max(1, page), pages);
+        if (size) entries = entries.slice((page - 1) * size, page * size);
+        var lines = [pad("Modified", 16) + "  Name", "----------------  ----"];
+        for (var i = 0; i < entries.length; i++) lines.push(row(entries[i]));
+        table.innerHTML = lines.join("\n");
+        table.setAttribute("data-sort", key);
+        table.setAttribute("data-dir", dir);
+        table.setAttribute("data-page", page);
+        pager(table, key, page, pages);
+        var links = document.querySelectorAll("[data-sort-link]");
+        for (var j = 0; j < links.length; j++) {
+            links[j].classList.toggle("is-active", links[j].getAttribute("data-sort-link") === key);
+        }
+    }
+
+    function show(key, page) {
+        var table = document.querySelector("pre.dir-index-table[data-index]");
+        var link = document.querySelector('[data-sort-link="' + key + '"]');
+        if (!table || !link) return;
+        var dir = link.getAttribute("data-dir") || "asc";
+        history.replaceState(null, "", "#sort=" + key + (page > 1 ? "&page=" + page : ""));
+        load(table.getAttribute("data-index"))
+            .then(function () { render(table, key, dir, page); })
+            .catch(function () { });
+    }
+
+    document.addEventListener("click", function (ev) {
+        var el = ev.target.closest && ev.target.closest("[data-sort-link], [data-page-link]");
+        var table = document.querySelector("pre.dir-index-table[data-index]");
+        if (!el || !table) return;
+        ev.preventDefault();
+        if (el.hasAttribute("data-sort-link")) {
+            show(el.getAttribute("data-sort-link"), 1);
+        } else {
+            show(table.getAttribute("data-sort"), +el.getAttribute("data-page-link"));
+        }
+    });
+
+    document.addEventListener("DOMContentLoaded", function () {
+        var hash = window.location.hash || "";
+        var sort = /(?:^#|&)sort=([\w-]+)/.exec(hash);
+        var page = /(?:^#|&)page=(\d+)/.exec(hash);
+        var table = document.querySelector("pre.dir-index-table[data-index]");
+        if (!table || !sort) return;
+        if (sort[1] !== table.getAttribute("data-sort") || page) {
+            show(sort[1], page ? +page[1] : 1);
+        }
+    });
+})();
@@ -0,0 +1,61 @@
+# conftest.py
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+
+# build_site.py and render.py import their sibling modules by bare name.
+for d in (SCRIPTS / "render", SCRIPTS / "build_site"):
+    if str(d) not in sys.path:
+        sys.path.insert(0, str(d))
+
+
+class SiteRepo:
+    """A throwaway git checkout holding a copy of .scripts, built with build_site.py."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        shutil.copytree(
+            SCRIPTS, root / ".scripts", ignore=shutil.ignore_patterns("__pycache__", "tests")
+        )
+        (root / "CNAME").write_text("preprints.example.org\n")
+        (root / ".gitignore").write_text("site/\n.build/\n")
+
+    def commit(self) -> None:
+        git = ["git", "-c", "user.email=t@t", "-c", "user.name=t"]
+        subprocess.run([*git, "init", "-q", "."], cwd=self.root, check=True)
+        subprocess.run([*git, "add", "-A"], cwd=self.root, check=True)
+        subprocess.run([*git, "commit", "-qm", "fixture"], cwd=self.root, check=True)
+
+    def build(self, *args: str, **env: str) -> str:
+        env = {
+            **os.environ,
+            "SOURCE_DATE_EPOCH": "1700000000",
+            "BASE_URL": "https://preprints.example.org",
+            **env,
+        }
+        proc = subprocess.run(
+            [
+                sys.executable,
+                str(self.root / ".scripts" / "build_site" / "build_site.py"),
+                "--skip-books",
+                *args,
+            ],
+            cwd=self.root,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        assert proc.returncode == 0, proc.stdout + proc.stderr
+        return proc.stdout
+
+
+@pytest.fixture
+def site_repo(tmp_path) -> SiteRepo:
+    return SiteRepo(tmp_path / "repo")
@@ -0,0 +1,16 @@
+# test_build_stamp.py
+
+
+def test_stamp_file_pruned_after_switch_to_page_mode(site_repo):
+    root = site_repo.root
+    (root / "notes").mkdir()
+    (root / "notes" / "Note.md").write_text("# Note\n")
+    site_repo.commit()
+
+    site_repo.build("--build-stamp", "file")
+    stamp = root / "site" / "build.txt"
+    assert stamp.exists()
+
+    site_repo.build("--build-stamp", "page")
+    assert not stamp.exists()
+    assert (root / "site" / "notes" / "Note.md.html").exists()
@@ -0,0 +1,34 @@
+# test_feed_deps.py
+
+PROVENANCE = """\
+title: "{title}"
+journal: Preferred Frame Pre-Prints
+authors:
+  - name: Ada Lovelace
+publication_date: 2024-01-15
+doi: 10.5281/zenodo.101
+summary: Summary of the paper
+artifacts:
+  md: "Paper.md"
+"""
+
+
+def test_unversioned_provenance_edit_rebuilds_feeds(site_repo):
+    """An edited record outside any version dir still reaches rss.xml / atom.xml."""
+    root = site_repo.root
+    paper = root / "prints" / "Paper"
+    paper.mkdir(parents=True)
+    (paper / "Paper.md").write_text("# Paper\n")
+    prov = paper / "provenance.yaml"
+    prov.write_text(PROVENANCE.format(title="Old title"))
+    site_repo.commit()
+
+    site_repo.build()
+    assert "Old title" in (root / "site" / "rss.xml").read_text()
+
+    prov.write_text(PROVENANCE.format(title="New title"))
+    out = site_repo.build()
+    assert "feeds up to date" not in out
+    for name in ("rss.xml", "atom.xml"):
+        text = (root / "site" / name).read_text()
+        assert "New title" in text and "Old title" not in text
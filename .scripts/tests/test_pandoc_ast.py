@@ -0,0 +1,52 @@
+# test_pandoc_ast.py
+
+import os
+
+import pytest
+
+import pnpmd_pandoc
+
+# Writer name pandoc hands a --filter for the inline conversion of each format.
+INLINE_FILTER_TARGET = {"pdf": "latex", "html": "html5", "epub": "epub3"}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record pandoc invocations instead of running a container."""
+    seen = []
+
+    def fake_run_pandoc(workdir, args, timeout):
+        seen.append(args)
+        (workdir / args[args.index("-o") + 1]).write_text("{}")
+        return 0
+
+    monkeypatch.setenv("PNPMD_CACHE_DIR", "off")
+    monkeypatch.setattr(pnpmd_pandoc, "run_pandoc", fake_run_pandoc)
+    monkeypatch.setattr(pnpmd_pandoc, "image_id", lambda: "")
+    return seen
+
+
+@pytest.mark.parametrize("fmt", ["pdf", "html", "epub"])
+def test_crossref_sees_the_writer_target(tmp_path, calls, fmt):
+    """pandoc-crossref gets the same argv[1] as with `--filter` on the direct conversion."""
+    in_md = tmp_path / "in.md"
+    in_md.write_text("# Title {#sec:a}\n\nSee @sec:a.\n")
+    common = ["--toc", "-f", "markdown+tex_math_dollars+raw_tex"]
+    rc, ast = pnpmd_pandoc.filtered_ast(in_md, fmt, ["-M", "title=T"], [], common, 0)
+    assert rc == 0
+    target = INLINE_FILTER_TARGET[fmt]
+    assert ast.name == f"ast.{target}.json"
+    (args,) = calls
+    assert args[:4] == ["-f", "markdown+tex_math_dollars+raw_tex", "-M", "title=T"]
+    wrapper = tmp_path / args[args.index("--filter") + 1]
+    assert os.access(wrapper, os.X_OK)
+    assert wrapper.read_text().splitlines()[-1] == f"exec pandoc-crossref {target}"
+    assert args[-4:] == ["-t", "json", "-o", ast.name]
+
+
+def test_wrapper_is_not_an_output_input(tmp_path, calls):
+    in_md = tmp_path / "in.md"
+    in_md.write_text("text\n")
+    before = pnpmd_pandoc.output_key(in_md, "html", [], [], [])
+    pnpmd_pandoc.filtered_ast(in_md, "html", [], [], [], 0)
+    assert pnpmd_pandoc.output_key(in_md, "html", [], [], []) == before
@@ -0,0 +1,35 @@
+# test_render_cli.py
+
+import itertools
+
+import pytest
+
+import build_site
+import render
+
+FORMATS = list(itertools.product([True, False], repeat=3))
+
+
+@pytest.mark.parametrize("include_html,include_pdf,include_epub", FORMATS)
+def test_book_job_argv_parses(tmp_path, include_html, include_pdf, include_epub):
+    """The argv of every book job is accepted by render.py and selects its formats."""
+    render_py = build_site.ROOT / ".scripts" / "render" / "render.py"
+    job = build_site._book_render_job(
+        tmp_path,
+        "book.yml",
+        render_py,
+        include_html=include_html,
+        include_pdf=include_pdf,
+        include_epub=include_epub,
+    )
+    assert job.cmd[1] == str(render_py)
+    args = render.build_parser().parse_args(job.cmd[2:])
+    assert args.file == "book.yml"
+    assert (args.html or args.all) == include_html
+    assert (args.pdf or args.all) == include_pdf
+    assert (args.epub or args.all) == include_epub
+
+
+def test_format_flags_combine():
+    args = render.build_parser().parse_args(["--html", "--pdf", "--epub", "doc.md"])
+    assert args.html and args.pdf and args.epub and not args.all
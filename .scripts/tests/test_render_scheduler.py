@@ -0,0 +1,30 @@
+# test_render_scheduler.py
+
+import sys
+
+from site_render import STREAM_CHUNK, RenderJob, RenderScheduler
+
+
+def _job(tmp_path, code: str, **kw) -> RenderJob:
+    return RenderJob(label="t", cmd=[sys.executable, "-c", code], cwd=tmp_path, **kw)
+
+
+def test_long_output_line(tmp_path, capsys):
+    """A line far beyond the stream chunk size is printed in pieces, not fatal."""
+    n = 3 * STREAM_CHUNK + 17
+    code = f"import sys; sys.stdout.write('x' * {n} + '\\nafter\\n'); sys.exit(3)"
+    scheduler = RenderScheduler(1)
+    job = scheduler.submit(_job(tmp_path, code))
+    scheduler.run()
+    assert job.returncode == 3
+    out = capsys.readouterr().out.splitlines()
+    pieces = [line[len("[t] "):] for line in out if line.startswith("[t] x")]
+    assert "".join(pieces) == "x" * n
+    assert "[t] after" in out
+
+
+def test_timeout_sets_returncode(tmp_path):
+    scheduler = RenderScheduler(1)
+    job = scheduler.submit(_job(tmp_path, "import time; time.sleep(30)", timeout=0.5))
+    scheduler.run()
+    assert job.returncode == 124
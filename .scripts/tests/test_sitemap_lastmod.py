@@ -0,0 +1,45 @@
+# test_sitemap_lastmod.py
+
+import os
+import re
+import time
+from datetime import datetime, timezone
+from urllib.parse import unquote
+
+
+def _lastmods(site):
+    """(output file, lastmod) for every <url> in site/sitemap.xml."""
+    text = (site / "sitemap.xml").read_text()
+    for loc, lastmod in re.findall(r"<loc>(.*?)</loc>\s*<lastmod>(.*?)</lastmod>", text):
+        rel = unquote(loc.removeprefix("https://preprints.example.org/"))
+        yield site / (rel + "index.html" if rel.endswith("/") or not rel else rel), lastmod
+
+
+def _stamp(path):
+    return datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def test_lastmod_follows_rewritten_pages(site_repo):
+    """Recorded mtimes stand in for unchanged pages; rewritten pages are re-read."""
+    root = site_repo.root
+    for name in ("One", "Two"):
+        (root / "notes" / name).mkdir(parents=True)
+        (root / "notes" / name / f"{name}.md").write_text(f"# {name}\n")
+    site_repo.commit()
+    site_repo.build(SOURCE_DATE_EPOCH="")
+
+    time.sleep(1.1)
+    edited = root / "notes" / "One" / "One.md"
+    edited.write_text("# One, edited\n")
+    (root / "site" / "sitemap.xml").unlink()
+    site_repo.build(SOURCE_DATE_EPOCH="")
+
+    entries = dict(_lastmods(root / "site"))
+    page = root / "site" / "notes" / "One" / "One.md.html"
+    untouched = root / "site" / "notes" / "Two" / "Two.md.html"
+    assert page in entries and untouched in entries
+    assert _stamp(page) > _stamp(untouched)
+    for path, lastmod in entries.items():
+        assert lastmod == _stamp(path), os.fspath(path)